@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import User
+
+from .cache import get_cache
+
+# Поля пользователя, которые кладутся в токен и проверяются по кэшу
+TOKEN_CLAIMS = ('username', 'role', 'is_superuser')
+USER_STATE_KEY = 'auth-user-state:{}'
+USER_DELETED = 'deleted'
+
+
+def access_token_for(user):
+    """Access-токен с ролью и именем пользователя в claims"""
+    token = AccessToken.for_user(user)
+    for claim in TOKEN_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def get_user_state(user_id):
+    """Актуальные claims и is_active пользователя из кэша с коротким TTL.
+
+    Удалённый пользователь тоже кэшируется, чтобы отозванный токен
+    не приводил к запросу в базу на каждый запрос. Читается с основной
+    базы: отстающая реплика вернула бы в кэш отозванную роль.
+    """
+    key = USER_STATE_KEY.format(user_id)
+    state = get_cache().get(key)
+    if state is None:
+        users = User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user_id)
+        state = users.values_list(
+            *TOKEN_CLAIMS, 'is_active').first() or USER_DELETED
+        get_cache().set(key, state, settings.AUTH_USER_STATE_TIMEOUT)
+    return state
+
+
+def forget_user_state(user_id):
+    get_cache().delete(USER_STATE_KEY.format(user_id))
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без загрузки пользователя из базы.
+
+    Пользователь собирается из claims токена как экземпляр User с
+    отложенными полями: остальные поля подгружаются только при обращении.
+    Claims сверяются с кэшем состояния пользователя, поэтому смена роли,
+    блокировка или удаление отзывают токен не позже чем через
+    AUTH_USER_STATE_TIMEOUT секунд. Токены без claims обрабатываются
+    как раньше, с запросом в базу.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user '
+                               'identification')
+        claims = tuple(validated_token.get(claim) for claim in TOKEN_CLAIMS)
+        if None in claims:
+            return super().get_user(validated_token)
+
+        state = get_user_state(user_id)
+        if state == USER_DELETED:
+            raise AuthenticationFailed(
+                'Пользователь не найден', code='user_not_found')
+        *current_claims, is_active = state
+        if not is_active:
+            raise AuthenticationFailed(
+                'Пользователь неактивен', code='user_inactive')
+        if tuple(current_claims) != claims:
+            raise AuthenticationFailed(
+                'Токен устарел, получите новый', code='token_outdated')
+
+        loaded = dict(zip(TOKEN_CLAIMS, claims))
+        loaded.update({User._meta.pk.attname: user_id, 'is_active': True})
+        fields = [
+            field.attname for field in User._meta.concrete_fields
+            if field.attname in loaded
+        ]
+        return User.from_db(
+            DEFAULT_DB_ALIAS, fields, [loaded[name] for name in fields])
@@ -0,0 +1,241 @@
+from django.db import connection, transaction
+from django.db.models import prefetch_related_objects
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.validators import UniqueValidator
+from reviews.models import Categories, Genres, GenresTitles, Title
+
+from .cache import TITLES_LIST, invalidate, title_group
+from .permissions import IsAdmin
+from .serializers import TitlesBulkSerializer, TitlesCreateSerializer
+
+BULK_MAX_ITEMS = 1000
+NOT_A_LIST = 'Ожидается список объектов'
+TOO_MANY_ITEMS = f'Не больше {BULK_MAX_ITEMS} объектов за запрос'
+NOT_FOUND = 'Объект не найден'
+DUPLICATE_ID = 'Объект уже изменяется другим элементом запроса'
+
+
+def get_items(request):
+    items = request.data
+    if not isinstance(items, list):
+        raise ValidationError({'non_field_errors': [NOT_A_LIST]})
+    if len(items) > BULK_MAX_ITEMS:
+        raise ValidationError({'non_field_errors': [TOO_MANY_ITEMS]})
+    return items
+
+
+def is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def item_value(item, key):
+    return item.get(key) if isinstance(item, dict) else None
+
+
+def ok(data, code=status.HTTP_200_OK):
+    return {'status': code, 'data': data}
+
+
+def error(errors, code=status.HTTP_400_BAD_REQUEST):
+    return {'status': code, 'errors': errors}
+
+
+def bulk_response(results, success_status=status.HTTP_200_OK):
+    """Ответ со статусом по каждому элементу, 207 при частичных ошибках"""
+    if any(result['status'] >= 400 for result in results):
+        return Response(results, status=status.HTTP_207_MULTI_STATUS)
+    return Response(results, status=success_status)
+
+
+def save_objects(model, objects):
+    """bulk_create, а на СУБД без RETURNING id - сохранение по одному"""
+    if connection.features.can_return_ids_from_bulk_insert:
+        model.objects.bulk_create(objects)
+        return
+    for obj in objects:
+        obj.save()
+
+
+class BulkMixin:
+    """Эндпоинт .../bulk/ для пакетной записи списком объектов.
+
+    Запрос передаётся методу bulk_<http-метод> с разобранным списком.
+    """
+
+    def dispatch_bulk(self, request):
+        handler = getattr(self, f'bulk_{request.method.lower()}')
+        return handler(get_items(request))
+
+
+class BulkSlugMixin(BulkMixin):
+    """Пакетное создание и удаление по слагу для категорий и жанров"""
+
+    @action(detail=False, methods=['post', 'delete'],
+            permission_classes=[IsAdmin])
+    def bulk(self, request):
+        return self.dispatch_bulk(request)
+
+    def bulk_post(self, items):
+        model = self.get_queryset().model
+        slugs = [item_value(item, 'slug') for item in items]
+        taken = set(model.objects.filter(
+            slug__in=[slug for slug in slugs if isinstance(slug, str)]
+        ).values_list('slug', flat=True))
+        results, objects = [], []
+        for item in items:
+            serializer = self.get_serializer(data=item)
+            slug_field = serializer.fields['slug']
+            slug_field.validators = [
+                validator for validator in slug_field.validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+            if not serializer.is_valid():
+                results.append(error(serializer.errors))
+                continue
+            slug = serializer.validated_data['slug']
+            if slug in taken:
+                results.append(error({'slug': [UniqueValidator.message]}))
+                continue
+            taken.add(slug)
+            objects.append(model(**serializer.validated_data))
+            results.append(ok(serializer.data, status.HTTP_201_CREATED))
+        with transaction.atomic():
+            model.objects.bulk_create(objects)
+        if objects:
+            invalidate(*self.cache_groups)
+        return bulk_response(results, status.HTTP_201_CREATED)
+
+    def bulk_delete(self, items):
+        found = self.get_queryset().filter(
+            slug__in=[slug for slug in items if isinstance(slug, str)])
+        deleted = set(found.values_list('slug', flat=True))
+        with transaction.atomic():
+            found.delete()
+        return bulk_response([
+            ok(slug, status.HTTP_204_NO_CONTENT) if slug in deleted
+            else error({'slug': [NOT_FOUND]}, status.HTTP_404_NOT_FOUND)
+            for slug in items
+        ])
+
+
+class TitlesBulkMixin(BulkMixin):
+    """Пакетное создание, изменение и удаление произведений"""
+
+    @action(detail=False, methods=['post', 'patch', 'delete'],
+            permission_classes=[IsAdmin])
+    def bulk(self, request):
+        return self.dispatch_bulk(request)
+
+    @staticmethod
+    def get_bulk_context(items):
+        """Все жанры и категории пачки - по одному запросу на модель"""
+        genre_slugs, category_slugs = set(), set()
+        for item in items:
+            genres = item_value(item, 'genre')
+            if isinstance(genres, list):
+                genre_slugs.update(
+                    slug for slug in genres if isinstance(slug, str))
+            category = item_value(item, 'category')
+            if isinstance(category, str):
+                category_slugs.add(category)
+        return {
+            'genres': Genres.objects.in_bulk(
+                genre_slugs, field_name='slug'),
+            'categories': Categories.objects.in_bulk(
+                category_slugs, field_name='slug'),
+        }
+
+    @staticmethod
+    def title_data(titles):
+        prefetch_related_objects(titles, 'genre')
+        return [TitlesCreateSerializer(title).data for title in titles]
+
+    @staticmethod
+    def link_genres(links):
+        GenresTitles.objects.bulk_create(
+            GenresTitles(title=title, genre=genre)
+            for title, genres in links for genre in genres
+        )
+
+    def bulk_post(self, items):
+        context = self.get_bulk_context(items)
+        results, titles, links = [None] * len(items), [], []
+        for index, item in enumerate(items):
+            serializer = TitlesBulkSerializer(data=item, context=context)
+            if not serializer.is_valid():
+                results[index] = error(serializer.errors)
+                continue
+            data = dict(serializer.validated_data)
+            genres = data.pop('genre', [])
+            title = Title(**data)
+            titles.append((index, title))
+            links.append((title, genres))
+        with transaction.atomic():
+            save_objects(Title, [title for _, title in titles])
+            self.link_genres(links)
+        if titles:
+            invalidate(TITLES_LIST)
+        for (index, _), data in zip(
+                titles, self.title_data([title for _, title in titles])):
+            results[index] = ok(data, status.HTTP_201_CREATED)
+        return bulk_response(results, status.HTTP_201_CREATED)
+
+    def bulk_patch(self, items):
+        context = self.get_bulk_context(items)
+        ids = [item_value(item, 'id') for item in items]
+        existing = Title.objects.in_bulk(
+            [pk for pk in ids if is_id(pk)])
+        results, titles, links, fields = [None] * len(items), [], [], set()
+        seen = set()
+        for index, (item, pk) in enumerate(zip(items, ids)):
+            title = existing.get(pk) if is_id(pk) else None
+            if title is None:
+                results[index] = error(
+                    {'id': [NOT_FOUND]}, status.HTTP_404_NOT_FOUND)
+                continue
+            # Повтор id задвоил бы связи с жанрами и перезаписал изменения
+            if pk in seen:
+                results[index] = error({'id': [DUPLICATE_ID]})
+                continue
+            seen.add(pk)
+            serializer = TitlesBulkSerializer(
+                title, data=item, partial=True, context=context)
+            if not serializer.is_valid():
+                results[index] = error(serializer.errors)
+                continue
+            data = dict(serializer.validated_data)
+            if 'genre' in data:
+                links.append((title, data.pop('genre')))
+            for attr, value in data.items():
+                setattr(title, attr, value)
+            fields.update(data)
+            titles.append((index, title))
+        with transaction.atomic():
+            if fields:
+                Title.objects.bulk_update(
+                    [title for _, title in titles], fields)
+            GenresTitles.objects.filter(
+                title__in=[title for title, _ in links]).delete()
+            self.link_genres(links)
+        if titles:
+            invalidate(TITLES_LIST, *(
+                title_group(title.pk) for _, title in titles))
+        for (index, _), data in zip(
+                titles, self.title_data([title for _, title in titles])):
+            results[index] = ok(data)
+        return bulk_response(results)
+
+    def bulk_delete(self, items):
+        found = Title.objects.filter(
+            pk__in=[pk for pk in items if is_id(pk)])
+        deleted = set(found.values_list('pk', flat=True))
+        with transaction.atomic():
+            found.delete()
+        return bulk_response([
+            ok(pk, status.HTTP_204_NO_CONTENT) if pk in deleted
+            else error({'id': [NOT_FOUND]}, status.HTTP_404_NOT_FOUND)
+            for pk in items
+        ])
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.cache import patch_cache_control
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'api-cache-version:{}'
+# Отметка недавнего сброса группы, пока реплики могут отставать
+CHANGED_KEY = 'api-cache-changed:{}'
+RESPONSE_KEY = 'api-cache:{}:{}:{}'
+
+TITLES_LIST = 'titles-list'
+TITLES_DETAIL = 'titles-detail'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def title_group(pk):
+    return f'title:{pk}'
+
+
+def get_versions(groups):
+    """Текущие поколения групп кэша.
+
+    Отсутствующее поколение заводится от текущего времени, чтобы после
+    вытеснения ключа версии не поднялись старые ответы.
+    """
+    cache = get_cache()
+    keys = [VERSION_KEY.format(group) for group in groups]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [str(versions[key]) for key in keys]
+
+
+def invalidate(*groups):
+    """Сдвигает поколения групп после фиксации транзакции"""
+    def bump():
+        cache = get_cache()
+        for group in groups:
+            key = VERSION_KEY.format(group)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, time.time_ns(), None)
+        if settings.DATABASE_REPLICAS:
+            cache.set_many(
+                {CHANGED_KEY.format(group): True for group in groups},
+                settings.DB_PRIMARY_STICKY_SECONDS)
+    transaction.on_commit(bump)
+
+
+def recently_changed(groups):
+    return bool(get_cache().get_many(
+        [CHANGED_KEY.format(group) for group in groups]))
+
+
+class CachedResponseMixin:
+    """Кэш ответов GET для list/retrieve с ETag и ответом 304.
+
+    Ключ строится из пути, нормализованной строки запроса (включая
+    параметры страницы) и поколений групп, от которых зависит ответ.
+    Поколения сдвигаются сигналами при записи в связанные модели.
+    """
+
+    cache_name = None
+    cache_groups = ()
+
+    def get_cache_groups(self):
+        return self.cache_groups
+
+    def get_cache_timeout(self):
+        return settings.API_CACHE_TIMEOUTS.get(self.cache_name, 0)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, super().retrieve, *args, **kwargs)
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        timeout = self.get_cache_timeout()
+        if not timeout:
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        key = self.get_response_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cached = (response.data, self.make_etag(response.data))
+            # Реплика могла ещё не получить недавнюю запись
+            if not (self.get_queryset().db != DEFAULT_DB_ALIAS
+                    and recently_changed(self.get_cache_groups())):
+                cache.set(key, cached, timeout)
+        data, etag = cached
+        if etag in self.parse_if_none_match(request):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data)
+        response['ETag'] = etag
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def get_response_key(self, request):
+        params = sorted(
+            (name, value)
+            for name, values in request.query_params.lists()
+            for value in values
+        )
+        versions = ':'.join(get_versions(self.get_cache_groups()))
+        return RESPONSE_KEY.format(
+            self.cache_name, versions,
+            hashlib.md5(
+                f'{request.path}?{urlencode(params)}'.encode()).hexdigest()
+        )
+
+    @staticmethod
+    def make_etag(data):
+        body = json.dumps(data, sort_keys=True, ensure_ascii=False)
+        return f'"{hashlib.md5(body.encode()).hexdigest()}"'
+
+    @staticmethod
+    def parse_if_none_match(request):
+        header = request.META.get('HTTP_IF_NONE_MATCH', '')
+        return {
+            tag.strip().replace('W/', '', 1) for tag in header.split(',')
+        }
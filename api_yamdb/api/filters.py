@@ -0,0 +1,60 @@
+import django_filters
+from django.db.models import F
+from rest_framework.filters import OrderingFilter
+from reviews.models import Title
+
+
+class GenreFilter(django_filters.FilterSet):
+    """Фильтры произведений, каждый сужает уже переданный queryset"""
+
+    genre = django_filters.CharFilter(field_name='genre__slug')
+    category = django_filters.CharFilter(field_name='category__slug')
+    year = django_filters.NumberFilter(field_name='year')
+    year_min = django_filters.NumberFilter(
+        field_name='year', lookup_expr='gte')
+    year_max = django_filters.NumberFilter(
+        field_name='year', lookup_expr='lte')
+    name = django_filters.CharFilter(
+        field_name='name', lookup_expr='icontains')
+
+    class Meta:
+        model = Title
+        fields = ('genre', 'category', 'name', 'year',)
+
+
+class TitleOrderingFilter(OrderingFilter):
+    """?ordering=-rating,-review_count,year,name по хранимым колонкам.
+
+    Порядок дополняется id, чтобы страницы не пересекались, а
+    произведения без оценок всегда идут после оценённых.
+    """
+
+    ordering_fields = ('rating', 'review_count', 'year', 'name')
+    field_names = {'review_count': 'rating_count'}
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        if not ordering:
+            return queryset
+        return queryset.order_by(
+            *(self.order_by(queryset.model, term) for term in ordering),
+            'pk')
+
+    def get_keyset_ordering(self, request, queryset, view):
+        """Тот же порядок по колонкам модели как ключ KeysetPagination"""
+        ordering = self.get_ordering(request, queryset, view) or ()
+        return (*(self.column(term) for term in ordering), 'pk')
+
+    def column(self, term):
+        prefix, name = ('-', term[1:]) if term.startswith('-') else ('', term)
+        return prefix + self.field_names.get(name, name)
+
+    def order_by(self, model, term):
+        descending = term.startswith('-')
+        name = self.column(term).lstrip('-')
+        if not model._meta.get_field(name).null:
+            return f'-{name}' if descending else name
+        expression = F(name)
+        if descending:
+            return expression.desc(nulls_last=True)
+        return expression.asc(nulls_last=True)
@@ -0,0 +1,321 @@
+"""Метрики запросов: время, SQL, сериализация и размер ответа.
+
+MetricsMiddleware считает для каждого запроса время ответа, число и
+время SQL-запросов (через execute_wrapper всех соединений), время
+сериализаторов и размер ответа, отдаёт их в заголовке Server-Timing и
+копит гистограммы по маршрутам. Каждый воркер gunicorn раз в
+METRICS_FLUSH_INTERVAL секунд сбрасывает свои счётчики в файл
+METRICS_DIR/<pid>.json, эндпоинт /metrics суммирует файлы всех
+воркеров и удаляет файлы завершившихся.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager, suppress
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+REQUESTS = 'yamdb_http_requests_total'
+DURATION = 'yamdb_http_request_duration_seconds'
+RESPONSE_SIZE = 'yamdb_http_response_size_bytes'
+QUERIES = 'yamdb_db_queries_per_request'
+QUERY_TIME = 'yamdb_db_query_duration_seconds_total'
+SLOW_QUERIES = 'yamdb_db_slow_queries_total'
+SERIALIZER_TIME = 'yamdb_serializer_duration_seconds_total'
+SERIALIZER_QUERIES = 'yamdb_serializer_db_queries_total'
+
+HISTOGRAMS = {
+    DURATION: (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    RESPONSE_SIZE: (256, 1024, 4096, 16384, 65536, 262144, 1048576),
+    QUERIES: (0, 1, 2, 3, 5, 10, 20, 50, 100),
+}
+HELP = {
+    REQUESTS: 'HTTP requests by route, method and status',
+    DURATION: 'HTTP request latency',
+    RESPONSE_SIZE: 'HTTP response body size',
+    QUERIES: 'SQL queries per HTTP request',
+    QUERY_TIME: 'Time spent in SQL queries',
+    SLOW_QUERIES: 'SQL queries slower than SLOW_QUERY_MS',
+    SERIALIZER_TIME: 'Time spent in serializers, without their SQL',
+    SERIALIZER_QUERIES: 'SQL queries made while serializing (N+1)',
+}
+
+
+class Registry:
+    """Счётчики и кумулятивные гистограммы процесса"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flushed = 0
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.counters = defaultdict(float)
+            self.histograms = {}
+
+    def inc(self, name, labels=(), value=1):
+        with self.lock:
+            self.counters[(name, labels)] += value
+
+    def observe(self, name, labels, value):
+        buckets = HISTOGRAMS[name]
+        with self.lock:
+            # Счётчики по границам le, затем сумма и количество
+            values = self.histograms.setdefault(
+                (name, labels), [0] * len(buckets) + [0, 0])
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    values[index] += 1
+            values[-2] += value
+            values[-1] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [
+                    [name, labels, value]
+                    for (name, labels), value in self.counters.items()],
+                'histograms': [
+                    [name, labels, list(values)]
+                    for (name, labels), values in self.histograms.items()],
+            }
+
+    def flush(self, force=False):
+        """Сохраняет снимок в METRICS_DIR для /metrics других воркеров"""
+        directory = settings.METRICS_DIR
+        now = time.monotonic()
+        if not directory or (
+                not force
+                and now - self.flushed < settings.METRICS_FLUSH_INTERVAL):
+            return
+        self.flushed = now
+        descriptor, path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(descriptor, 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(path, os.path.join(directory, f'{os.getpid()}.json'))
+
+
+registry = Registry()
+
+
+def worker_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect():
+    """Снимки всех воркеров, или только текущего процесса без METRICS_DIR.
+
+    Файлы воркеров, которых уже нет, удаляются: иначе их счётчики
+    суммировались бы вечно, а pid мог бы достаться новому воркеру.
+    """
+    directory = settings.METRICS_DIR
+    if not directory:
+        return [registry.snapshot()]
+    registry.flush(force=True)
+    snapshots = []
+    for name in os.listdir(directory):
+        pid, extension = os.path.splitext(name)
+        if extension != '.json':
+            continue
+        path = os.path.join(directory, name)
+        # Файл мог удалить /metrics другого воркера
+        with suppress(FileNotFoundError):
+            if pid.isdigit() and not worker_alive(int(pid)):
+                os.remove(path)
+                continue
+            with open(path) as file:
+                snapshots.append(json.load(file))
+    return snapshots
+
+
+def format_labels(labels, **extra):
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ''
+    escaped = (
+        str(value).replace('\\', r'\\').replace('"', r'\"')
+        .replace('\n', r'\n')
+        for _, value in pairs
+    )
+    return '{' + ','.join(
+        f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)
+    ) + '}'
+
+
+def merge(snapshots):
+    """Сумма счётчиков и гистограмм из снимков воркеров"""
+    counters, histograms = defaultdict(float), {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            counters[(name, tuple(map(tuple, labels)))] += value
+        for name, labels, values in snapshot['histograms']:
+            key = name, tuple(map(tuple, labels))
+            total = histograms.setdefault(key, [0] * len(values))
+            for index, value in enumerate(values):
+                total[index] += value
+    return counters, histograms
+
+
+def histogram_lines(name, labels, values):
+    for bound, count in zip(HISTOGRAMS[name], values):
+        yield f'{name}_bucket{format_labels(labels, le=bound)} {count}'
+    yield f'{name}_bucket{format_labels(labels, le="+Inf")} {values[-1]}'
+    yield f'{name}_sum{format_labels(labels)} {values[-2]:g}'
+    yield f'{name}_count{format_labels(labels)} {values[-1]}'
+
+
+def render(snapshots):
+    """Сумма снимков в текстовом формате Prometheus"""
+    counters, histograms = merge(snapshots)
+    lines = []
+    for name, help_text in HELP.items():
+        kind = 'histogram' if name in HISTOGRAMS else 'counter'
+        metrics = histograms if name in HISTOGRAMS else counters
+        series = sorted(item for item in metrics.items() if item[0][0] == name)
+        if not series:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for (_, labels), values in series:
+            if kind == 'histogram':
+                lines.extend(histogram_lines(name, labels, values))
+            else:
+                lines.append(f'{name}{format_labels(labels)} {values:g}')
+    return '\n'.join(lines) + '\n'
+
+
+class RequestMetrics:
+    __slots__ = ('path', 'queries', 'db_time', 'serializer_time',
+                 'serializer_queries', 'serializing')
+
+    def __init__(self, path):
+        self.path = path
+        self.queries = self.serializer_queries = 0
+        self.db_time = self.serializer_time = 0.0
+        self.serializing = False
+
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    """execute_wrapper: время SQL-запроса и журнал медленных запросов"""
+    metrics = _current.get()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        if metrics is not None:
+            metrics.queries += 1
+            metrics.db_time += elapsed
+            if metrics.serializing:
+                metrics.serializer_queries += 1
+        if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+            registry.inc(SLOW_QUERIES)
+            logger.warning(
+                'Slow query %.1f ms (%s): %s', elapsed * 1000,
+                metrics.path if metrics is not None else '-', sql)
+
+
+@contextmanager
+def serializing():
+    """Время блока идёт в метрики запроса как время сериализации.
+
+    Вложенные блоки отдельно не считаются, а SQL-запросы внутри
+    сериализации вычитаются из её времени и считаются отдельно.
+    """
+    metrics = _current.get()
+    if metrics is None or metrics.serializing:
+        yield
+        return
+    metrics.serializing = True
+    db_time, started = metrics.db_time, time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializing = False
+        metrics.serializer_time += (
+            time.perf_counter() - started - (metrics.db_time - db_time))
+
+
+class TimedSerializationMixin:
+    """list и retrieve вьюсета, где serializer.data идёт в метрики.
+
+    Страница или объект читаются до блока serializing(), поэтому в
+    запросы сериализации попадают только догрузки (N+1).
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.serialize(page))
+        return Response(self.serialize(list(queryset)))
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(self.serialize(self.get_object(), many=False))
+
+    def serialize(self, instance, many=True):
+        serializer = self.get_serializer(instance, many=many)
+        with serializing():
+            return serializer.data
+
+
+class MetricsMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics(request.path)
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(time_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        elapsed = time.perf_counter() - started
+        self.record(request, response, metrics, elapsed)
+        response['Server-Timing'] = (
+            f'db;dur={metrics.db_time * 1000:.1f};'
+            f'desc="{metrics.queries} queries", '
+            f'serializer;dur={metrics.serializer_time * 1000:.1f}, '
+            f'total;dur={elapsed * 1000:.1f}'
+        )
+        return response
+
+    @staticmethod
+    def record(request, response, metrics, elapsed):
+        match = request.resolver_match
+        labels = (('route', match.view_name if match else '<unmatched>'),
+                  ('method', request.method))
+        registry.inc(REQUESTS, labels + (('status', response.status_code),))
+        registry.observe(DURATION, labels, elapsed)
+        registry.observe(QUERIES, labels, metrics.queries)
+        registry.inc(QUERY_TIME, labels, metrics.db_time)
+        registry.inc(SERIALIZER_TIME, labels, metrics.serializer_time)
+        registry.inc(SERIALIZER_QUERIES, labels, metrics.serializer_queries)
+        if not response.streaming:
+            registry.observe(RESPONSE_SIZE, labels, len(response.content))
+        registry.flush()
@@ -0,0 +1,205 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from functools import partial
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATE = 'estimate'
+
+
+def estimate_count(queryset):
+    """Оценка количества строк без полного COUNT(*).
+
+    В PostgreSQL для всей таблицы берётся pg_class.reltuples, для
+    отфильтрованного queryset - оценка планировщика из EXPLAIN.
+    На остальных СУБД выполняется обычный count().
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table])
+            estimate = cursor.fetchone()[0]
+        else:
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = plan[0]['Plan']['Plan Rows']
+    if estimate < 0:
+        return queryset.count()
+    return int(estimate)
+
+
+def keyset_ordering(view):
+    """Ключ курсора вью: поля с '-' для убывания, последним - pk"""
+    if hasattr(view, 'get_keyset_ordering'):
+        return tuple(view.get_keyset_ordering())
+    return tuple(getattr(view, 'keyset_ordering', ('pk',)))
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """Пагинация limit/offset с опциональным режимом keyset (курсор).
+
+    Режим курсора включается параметром ?pagination=cursor или наличием
+    ?cursor=. Страница выбирается условием по ключу сортировки вьюсета
+    (метод get_keyset_ordering или атрибут keyset_ordering, по умолчанию
+    pk) вместо OFFSET, поэтому глубокие страницы не медленнее первой.
+    Поля с '-' идут по убыванию, NULL в nullable-полях - в конце.
+    Общее количество по умолчанию не считается, ?count=estimate или
+    ?count=exact включают его.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.ordering = keyset_ordering(view)
+        self.fields = [self.get_field(queryset.model, term.lstrip('-'))
+                       for term in self.ordering]
+        self.count = self.get_keyset_count(queryset, request)
+        position, reverse = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.order_by(reverse))
+        if position is not None:
+            queryset = queryset.filter(
+                self.keyset_filter(position, reverse))
+        rows = list(queryset[:self.limit + 1])
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if reverse:
+            rows.reverse()
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = has_more if reverse else position is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+
+    def get_keyset_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == COUNT_EXACT:
+            return queryset.count()
+        if mode == COUNT_ESTIMATE:
+            return estimate_count(queryset)
+        return None
+
+    def order_by(self, reverse):
+        """Порядок ключа, в обратном проходе развёрнутый вместе с NULL"""
+        for term, field in zip(self.ordering, self.fields):
+            name = term.lstrip('-')
+            descending = term.startswith('-') != reverse
+            if not field.null:
+                yield f'-{name}' if descending else name
+                continue
+            nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+            expression = F(name)
+            yield expression.desc(**nulls) if descending else expression.asc(
+                **nulls)
+
+    def keyset_filter(self, position, reverse):
+        """Условие (a, b) > (x, y), развёрнутое в OR по префиксам ключа"""
+        condition, prefix = Q(), Q()
+        for term, field, value in zip(self.ordering, self.fields, position):
+            name = term.lstrip('-')
+            following = self.following(
+                name, field, value, term.startswith('-') != reverse, reverse)
+            if following is not None:
+                condition |= prefix & following
+            prefix &= (Q(**{f'{name}__isnull': True}) if value is None
+                       else Q(**{name: value}))
+        return condition
+
+    @staticmethod
+    def following(name, field, value, descending, reverse):
+        """Значения поля после value в порядке прохода, None - таких нет"""
+        if value is None:
+            # NULL в конце прямого порядка: за ним идут только NULL,
+            # в обратном проходе - все непустые значения
+            return Q(**{f'{name}__isnull': False}) if reverse else None
+        following = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+        if field.null and not reverse:
+            following |= Q(**{f'{name}__isnull': True})
+        return following
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            values = cursor['p']
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = []
+            for field, value in zip(self.fields, values):
+                if value is None and not field.null:
+                    raise ValueError
+                position.append(field.to_python(value))
+            return position, bool(cursor.get('r'))
+        except (KeyError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse):
+        # Строки страницы - объекты модели или словари values()
+        get = row.get if isinstance(row, dict) else partial(getattr, row)
+        values = (get(term.lstrip('-')) for term in self.ordering)
+        position = [None if value is None else str(value) for value in values]
+        cursor = json.dumps({'p': position, 'r': int(reverse)})
+        encoded = urlsafe_b64encode(cursor.encode('ascii')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.mode_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    @staticmethod
+    def get_field(model, name):
+        if name == 'pk':
+            return model._meta.pk
+        return model._meta.get_field(name)
@@ -0,0 +1,37 @@
+"""JSON-рендерер на orjson с тем же выводом, что у JSONRenderer DRF.
+
+orjson - необязательная зависимость: без неё, а также для отступов
+(браузерный API, ?indent) и данных, которые orjson не принимает,
+работает обычный JSONRenderer. Числа с плавающей точкой orjson пишет
+иначе, чем json (1e-05 и 0.00001), поэтому рендерер ставится только
+на вью, в ответах которых их нет.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or not self.use_orjson(
+                accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(data, default=self.encoder_class().default)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как в JSONRenderer: U+2028 и U+2029 недопустимы в JavaScript
+        return content.replace(
+            '\u2028'.encode(), b'\\u2028').replace(
+            '\u2029'.encode(), b'\\u2029')
+
+    def use_orjson(self, accepted_media_type, renderer_context):
+        """orjson пишет только компактный UTF-8 без отступов"""
+        return (orjson is not None and self.compact and self.strict
+                and not self.ensure_ascii
+                and self.get_indent(accepted_media_type, renderer_context)
+                is None)
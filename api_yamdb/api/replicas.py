@@ -0,0 +1,73 @@
+"""Чтение с реплик для безопасных HTTP-запросов.
+
+Middleware выбирает для GET, HEAD и OPTIONS одну реплику из
+settings.DATABASE_REPLICAS на весь запрос, роутер отдаёт её Django для
+чтения. Записи, небезопасные запросы и код вне HTTP-запросов (команды,
+воркеры) работают с основной базой. После успешной записи клиент
+DB_PRIMARY_STICKY_SECONDS секунд читает с основной базы, чтобы видеть
+свои изменения, пока реплики отстают.
+"""
+import hashlib
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+from .cache import get_cache
+
+PRIMARY_KEY = 'db-primary:{}'
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+def sticky_key(request):
+    """Ключ клиента по заголовку Authorization или сессии"""
+    credentials = (request.META.get('HTTP_AUTHORIZATION')
+                   or request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+    if not credentials:
+        return None
+    return PRIMARY_KEY.format(
+        hashlib.sha256(credentials.encode()).hexdigest())
+
+
+def choose_read_alias(request, key):
+    if request.method not in SAFE_METHODS:
+        return None
+    if key is not None and get_cache().get(key):
+        return None
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+class ReplicaMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        key = sticky_key(request)
+        token = _read_alias.set(choose_read_alias(request, key))
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        if (key is not None and request.method not in SAFE_METHODS
+                and response.status_code < 400):
+            get_cache().set(key, True, settings.DB_PRIMARY_STICKY_SECONDS)
+        return response
+
+
+class ReplicaRouter:
+    """Чтение с реплики, выбранной для текущего запроса, запись в default"""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
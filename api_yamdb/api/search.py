@@ -0,0 +1,190 @@
+import heapq
+import re
+import threading
+from collections import defaultdict, namedtuple
+
+from django.db import connection, transaction
+from reviews.models import Comment, Review, Title
+
+# Конфигурация PostgreSQL, с которой построены колонки search_vector
+SEARCH_CONFIG = 'russian'
+TEXT_LENGTH = 200
+
+SearchSource = namedtuple(
+    'SearchSource', ('model', 'parts', 'text', 'title', 'review'))
+
+# Что индексируется: поля с весами (A важнее всего), текст в выдаче
+# и поля, по которым строится ссылка на объект
+SOURCES = {
+    'title': SearchSource(
+        Title, (('name', 'A'), ('description', 'B')), 'name', 'pk', None),
+    'review': SearchSource(
+        Review, (('text', 'B'),), 'text', 'title_id', None),
+    'comment': SearchSource(
+        Comment, (('text', 'C'),), 'text', 'review__title_id', 'review_id'),
+}
+KINDS = {source.model: kind for kind, source in SOURCES.items()}
+
+# Веса как у ts_rank_cd по умолчанию
+WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2, 'D': 0.1}
+
+POSTGRES_QUERIES = {
+    'title': (
+        "SELECT 'title', t.id, t.id, NULL, "
+        'ts_rank_cd(t.search_vector, q.query), left(t.name, %(length)s) '
+        'FROM reviews_title t, q WHERE t.search_vector @@ q.query'
+    ),
+    'review': (
+        "SELECT 'review', r.id, r.title_id, NULL, "
+        'ts_rank_cd(r.search_vector, q.query), left(r.text, %(length)s) '
+        'FROM reviews_review r, q WHERE r.search_vector @@ q.query'
+    ),
+    'comment': (
+        "SELECT 'comment', c.id, r.title_id, c.review_id, "
+        'ts_rank_cd(c.search_vector, q.query), left(c.text, %(length)s) '
+        'FROM reviews_comment c JOIN reviews_review r ON r.id = c.review_id, '
+        'q WHERE c.search_vector @@ q.query'
+    ),
+}
+
+SearchResult = namedtuple(
+    'SearchResult', ('type', 'id', 'title_id', 'review_id', 'rank', 'text'))
+
+
+def tokenize(text):
+    return re.findall(r'\w+', (text or '').lower())
+
+
+def postgres_search(query, kinds, limit, offset):
+    """Поиск по GIN-индексам колонок search_vector с ранжированием"""
+    union = ' UNION ALL '.join(POSTGRES_QUERIES[kind] for kind in kinds)
+    sql = (
+        'WITH q AS (SELECT plainto_tsquery(%(config)s, %(query)s) AS query) '
+        f'{union} ORDER BY 5 DESC, 1, 2 LIMIT %(limit)s OFFSET %(offset)s'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {
+            'config': SEARCH_CONFIG, 'query': query, 'length': TEXT_LENGTH,
+            'limit': limit, 'offset': offset,
+        })
+        return [SearchResult(*row) for row in cursor.fetchall()]
+
+
+class InvertedIndex:
+    """Обратный индекс в памяти процесса для СУБД без полнотекстового поиска.
+
+    Строится из базы при первом поиске и дальше обновляется сигналами
+    после фиксации транзакций. Как и plainto_tsquery, ищет документы со
+    всеми словами запроса, ранг - сумма весов вхождений слов.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.built = False
+            self.postings = defaultdict(dict)
+            self.documents = {}
+
+    def add(self, key, parts, title_id, review_id, text):
+        with self.lock:
+            self.remove(key)
+            terms = defaultdict(float)
+            for content, weight in parts:
+                for token in tokenize(content):
+                    terms[token] += WEIGHTS[weight]
+            for token, score in terms.items():
+                self.postings[token][key] = score
+            self.documents[key] = (
+                tuple(terms), title_id, review_id, text[:TEXT_LENGTH])
+
+    def remove(self, key):
+        with self.lock:
+            document = self.documents.pop(key, None)
+            if document is None:
+                return
+            for token in document[0]:
+                postings = self.postings[token]
+                postings.pop(key, None)
+                if not postings:
+                    del self.postings[token]
+
+    def build(self):
+        with self.lock:
+            if self.built:
+                return
+            for kind, source in SOURCES.items():
+                fields = [name for name, _ in source.parts]
+                rows = source.model.objects.values_list(
+                    'pk', source.title, source.review or 'pk', source.text,
+                    *fields)
+                for pk, title_id, review_id, text, *contents in rows:
+                    self.add(
+                        (kind, pk),
+                        list(zip(contents, (w for _, w in source.parts))),
+                        title_id, review_id if source.review else None,
+                        text or '')
+            self.built = True
+
+    def search(self, query, kinds, limit, offset):
+        self.build()
+        tokens = set(tokenize(query))
+        if not tokens:
+            return []
+        with self.lock:
+            postings = sorted(
+                (self.postings.get(token, {}) for token in tokens), key=len)
+            first, rest = postings[0], postings[1:]
+            ranked = (
+                (-score - sum(posting[key] for posting in rest), key)
+                for key, score in first.items()
+                if key[0] in kinds and all(key in posting for posting in rest)
+            )
+            # Порядок как в PostgreSQL: ранг по убыванию, затем тип и id
+            top = heapq.nsmallest(offset + limit, ranked)[offset:]
+            return [
+                SearchResult(kind, pk, *self.documents[(kind, pk)][1:3],
+                             -rank, self.documents[(kind, pk)][3])
+                for rank, (kind, pk) in top
+            ]
+
+
+inverted_index = InvertedIndex()
+
+
+def uses_inverted_index():
+    return connection.vendor != 'postgresql'
+
+
+def search(query, kinds=tuple(SOURCES), limit=10, offset=0):
+    """Найденные произведения, отзывы и комментарии по убыванию ранга"""
+    if uses_inverted_index():
+        return inverted_index.search(query, kinds, limit, offset)
+    return postgres_search(query, kinds, limit, offset)
+
+
+def index_instance(instance):
+    """Обновляет документ в индексе процесса после фиксации транзакции"""
+    if not uses_inverted_index() or not inverted_index.built:
+        return
+    kind = KINDS[type(instance)]
+    source = SOURCES[kind]
+    if kind == 'comment':
+        title_id = instance.review.title_id
+    else:
+        title_id = getattr(instance, source.title)
+    parts = [(getattr(instance, name), weight)
+             for name, weight in source.parts]
+    review_id = instance.review_id if source.review else None
+    text = getattr(instance, source.text) or ''
+    transaction.on_commit(lambda: inverted_index.add(
+        (kind, instance.pk), parts, title_id, review_id, text))
+
+
+def unindex_instance(instance):
+    if not uses_inverted_index() or not inverted_index.built:
+        return
+    key = (KINDS[type(instance)], instance.pk)
+    transaction.on_commit(lambda: inverted_index.remove(key))
@@ -1,21 +1,36 @@
 from datetime import datetime as dt
 
-from django.shortcuts import get_object_or_404
 from rest_framework.relations import SlugRelatedField
 from rest_framework.serializers import (CharField, CurrentUserDefault,
-                                        EmailField, HiddenField, IntegerField,
-                                        ModelSerializer, Serializer,
+                                        EmailField, FloatField, IntegerField,
+                                        ListField, ModelSerializer, Serializer,
+                                        SerializerMethodField, SlugField,
                                         ValidationError)
-from reviews.models import Categories, Comment, Genres, Review, Title, User
+from reviews.models import (SCORES, Categories, Comment, Genres, Review,
+                            Title, User)
 
+from .search import SOURCES
 
-class CategoriesSerializer(ModelSerializer):
+
+# Слаги, совпадающие с маршрутами вьюсетов категорий и жанров
+RESERVED_SLUGS = frozenset(('bulk',))
+RESERVED_SLUG = 'Слаг «{}» зарезервирован'
+
+
+class ReservedSlugMixin:
+    def validate_slug(self, value):
+        if value in RESERVED_SLUGS:
+            raise ValidationError(RESERVED_SLUG.format(value))
+        return value
+
+
+class CategoriesSerializer(ReservedSlugMixin, ModelSerializer):
     class Meta:
         model = Categories
         fields = ('name', 'slug',)
 
 
-class GenresSerializer(ModelSerializer):
+class GenresSerializer(ReservedSlugMixin, ModelSerializer):
     class Meta:
         model = Genres
         fields = ('name', 'slug',)
@@ -33,7 +48,7 @@ class TitlesCreateSerializer(ModelSerializer):
         required=False,
         slug_field='slug',
     )
-    rating = IntegerField(required=False,)
+    rating = IntegerField(read_only=True)
 
     class Meta:
         model = Title
@@ -50,6 +65,17 @@ class TitlesCreateSerializer(ModelSerializer):
         return value
 
 
+class TitleStatsSerializer(Serializer):
+    """Статистика оценок по сохранённой в произведении гистограмме"""
+    count = IntegerField(source='rating_count')
+    rating = IntegerField()
+    median = FloatField(source='score_median')
+    distribution = SerializerMethodField()
+
+    def get_distribution(self, title):
+        return dict(zip(map(str, SCORES), title.score_histogram))
+
+
 class TitlesSerializer(TitlesCreateSerializer):
     genre = GenresSerializer(
         required=False,
@@ -58,6 +84,48 @@ class TitlesSerializer(TitlesCreateSerializer):
     category = CategoriesSerializer(
         required=False,
     )
+    stats = TitleStatsSerializer(source='*', read_only=True)
+
+    class Meta(TitlesCreateSerializer.Meta):
+        fields = TitlesCreateSerializer.Meta.fields + ('stats',)
+
+    def get_fields(self):
+        """Поле stats выводится только по запросу с ?stats=true"""
+        fields = super().get_fields()
+        request = self.context.get('request')
+        stats = request.query_params.get('stats', '') if request else ''
+        if stats.lower() not in ('1', 'true'):
+            fields.pop('stats')
+        return fields
+
+
+class TitlesBulkSerializer(TitlesCreateSerializer):
+    """Элемент пакетной записи произведений.
+
+    Слаги жанров и категории сверяются со словарями из context,
+    загруженными одним запросом на всю пачку.
+    """
+    genre = ListField(child=SlugField(), required=False)
+    category = SlugField(required=False, allow_null=True)
+    does_not_exist = SlugRelatedField.default_error_messages['does_not_exist']
+
+    def validate_genre(self, value):
+        genres = self.context['genres']
+        for slug in value:
+            if slug not in genres:
+                raise ValidationError(self.does_not_exist.format(
+                    slug_name='slug', value=slug))
+        # Повтор жанра нарушил бы уникальность связи
+        return [genres[slug] for slug in dict.fromkeys(value)]
+
+    def validate_category(self, value):
+        if value is None:
+            return None
+        category = self.context['categories'].get(value)
+        if category is None:
+            raise ValidationError(self.does_not_exist.format(
+                slug_name='slug', value=value))
+        return category
 
 
 class UserSerializer(ModelSerializer):
@@ -74,67 +142,37 @@ class UserRegisterSerializer(Serializer):
     username = CharField(required=True, write_only=True)
 
     def validate_username(self, value):
-        """Проверка, что username больше 2х символов и != 'me' """
-        user = User.objects.filter(username=value)
-        if user.exists():
-            raise ValidationError('Имя пользователя уже занято')
+        """Проверка, что username больше 2х символов и != 'me'.
+
+        Уникальность username и email проверяет база при вставке.
+        """
         if len(value) < 2:
             raise ValidationError('Username too short')
         if value == 'me':
             raise ValidationError('Username cannot be equal to "me"')
         return value
 
-    def validate_email(self, value):
-        """Проверка, что email уникальный для нового пользователя"""
-        user = User.objects.filter(email=value)
-        if user.exists():
-            raise ValidationError('Данный email уже используется')
-        return value
-
 
 class UserConfirmationSerializer(Serializer):
     username = CharField(required=True, write_only=True)
     confirmation_code = CharField(required=True, write_only=True)
 
 
-class CurrentTitle:
-    requires_context = True
-
-    def __call__(self, serializer_field):
-        c_view = serializer_field.context['view']
-        title_id = c_view.kwargs.get('title_id')
-        title = get_object_or_404(Title, id=title_id)
-        return title
-
-    def __repr__(self):
-        return f'{self.__class__.__name__}()'
-
-
 class ReviewSerializer(ModelSerializer):
+    """Отзыв на произведение.
+
+    Произведение и автор задаются во вью, повторный отзыв отсекает
+    ограничение unique_title_author в базе.
+    """
     author = SlugRelatedField(
         default=CurrentUserDefault(),
         slug_field='username',
         read_only=True)
-    title = HiddenField(default=CurrentTitle())
 
     class Meta:
         model = Review
         read_only_fields = ('author',)
-        fields = '__all__'
-
-    def validate(self, data):
-        """Проверка на наличие отзыва у текущего пользователя"""
-
-        if self.context.get('request').method != 'POST':
-            return data
-        author = self.context['request'].user.id
-        title_id = self.context['view'].kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        if Review.objects.filter(title=title, author=author).exists():
-            raise ValidationError(
-                'Вы уже оставили Ваш отзыв!'
-            )
-        return data
+        fields = ('id', 'author', 'text', 'pub_date', 'score')
 
 
 class CommentSerializer(ModelSerializer):
@@ -144,3 +182,27 @@ class CommentSerializer(ModelSerializer):
         model = Comment
         read_only_fields = ('author',)
         fields = ('id', 'text', 'author', 'pub_date')
+
+
+class SearchQuerySerializer(Serializer):
+    """Параметры поиска: ?q=...&type=title,review&limit=10&offset=0"""
+    q = CharField(max_length=200)
+    type = CharField(required=False)
+    limit = IntegerField(min_value=1, max_value=100, default=10)
+    offset = IntegerField(min_value=0, default=0)
+
+    def validate_type(self, value):
+        kinds = tuple(kind for kind in SOURCES if kind in value.split(','))
+        if not kinds or len(kinds) != len(set(value.split(','))):
+            raise ValidationError(
+                f'Допустимые типы: {", ".join(SOURCES)}')
+        return kinds
+
+
+class SearchResultSerializer(Serializer):
+    type = CharField()
+    id = IntegerField()
+    title_id = IntegerField()
+    review_id = IntegerField(allow_null=True)
+    rank = FloatField()
+    text = CharField()
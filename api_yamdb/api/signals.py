@@ -0,0 +1,78 @@
+from django.core.signals import request_started
+from django.db import connections, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import (Categories, Comment, Genres, GenresTitles, Review,
+                            Title, User)
+
+from .authentication import forget_user_state
+from .cache import TITLES_DETAIL, TITLES_LIST, invalidate, title_group
+from .search import index_instance, unindex_instance
+from .utils import forget_confirmation_code
+
+
+@receiver((post_save, post_delete), sender=Categories)
+def categories_changed(sender, **kwargs):
+    invalidate('categories', TITLES_LIST, TITLES_DETAIL)
+
+
+@receiver((post_save, post_delete), sender=Genres)
+def genres_changed(sender, **kwargs):
+    invalidate('genres', TITLES_LIST, TITLES_DETAIL)
+
+
+@receiver((post_save, post_delete), sender=Title)
+def title_changed(sender, instance, **kwargs):
+    invalidate(TITLES_LIST, title_group(instance.pk))
+
+
+@receiver((post_save, post_delete), sender=GenresTitles)
+@receiver((post_save, post_delete), sender=Review)
+def title_relation_changed(sender, instance, **kwargs):
+    invalidate(TITLES_LIST, title_group(instance.title_id))
+
+
+@receiver(m2m_changed, sender=GenresTitles)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate(TITLES_LIST, title_group(instance.pk))
+    else:
+        invalidate(TITLES_LIST, TITLES_DETAIL)
+
+
+@receiver((post_save, post_delete), sender=User)
+def user_changed(sender, instance, **kwargs):
+    pk, username = instance.pk, instance.username
+    transaction.on_commit(lambda: forget_user_state(pk))
+    transaction.on_commit(lambda: forget_confirmation_code(username))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+def search_document_saved(sender, instance, **kwargs):
+    index_instance(instance)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+def search_document_deleted(sender, instance, **kwargs):
+    unindex_instance(instance)
+
+
+@receiver(request_started)
+def check_connections(**kwargs):
+    """Закрывает переиспользуемые соединения, которые оборвал сервер.
+
+    Вызывается после close_old_connections Django, поэтому проверяются
+    только соединения, оставшиеся от прошлых запросов (CONN_MAX_AGE).
+    """
+    for connection in connections.all():
+        if (connection.connection is not None
+                and connection.settings_dict.get('CONN_HEALTH_CHECKS')
+                and not connection.is_usable()):
+            connection.close()
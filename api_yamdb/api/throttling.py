@@ -0,0 +1,71 @@
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Token bucket в кэше: до N запросов подряд, дальше N за период.
+
+    Частота берётся из DEFAULT_THROTTLE_RATES по ключу
+    '<throttle_scope вида>_<key_type>'. Решение принимается только по
+    кэшу, до обращения к базе.
+    """
+
+    key_type = None
+
+    def __init__(self):
+        # Частота зависит от вида и определяется в allow_request
+        pass
+
+    def get_ident_value(self, request):
+        # Без ключа запрос не ограничивается
+        return None
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_value(request)
+        if ident is None:
+            return None
+        return self.cache_format % {
+            'scope': f'{self.scope}-{self.key_type}', 'ident': ident}
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, 'throttle_scope', None)
+        self.rate = api_settings.DEFAULT_THROTTLE_RATES.get(
+            f'{self.scope}_{self.key_type}')
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        tokens, updated = self.cache.get(self.key, (self.num_requests, now))
+        tokens = min(self.num_requests, tokens + (
+            now - updated) * self.num_requests / self.duration)
+        if tokens < 1:
+            self.wait_time = (1 - tokens) * self.duration / self.num_requests
+            return False
+        self.cache.set(self.key, (tokens - 1, now), self.duration)
+        return True
+
+    def wait(self):
+        return self.wait_time
+
+
+class IPThrottle(TokenBucketThrottle):
+    key_type = 'ip'
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+
+class UsernameThrottle(TokenBucketThrottle):
+    key_type = 'username'
+
+    def get_ident_value(self, request):
+        if not isinstance(request.data, dict):
+            return None
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username:
+            return None
+        return username
@@ -2,8 +2,8 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from api.views import (CategoriesViewSet, CommentsViewSet, CreateTokenView,
-                       GenresViewSet, ReviewsViewSet, SignUp, TitlesViewSet,
-                       UserViewSet)
+                       GenresViewSet, ReviewsViewSet, SearchView, SignUp,
+                       TitlesViewSet, UserViewSet)
 
 router_v1 = DefaultRouter()
 
@@ -25,4 +25,5 @@ auth_url = [
 urlpatterns = [
     path('', include(router_v1.urls)),
     path('auth/', include(auth_url)),
+    path('search/', SearchView.as_view(), name='search'),
 ]
@@ -1,12 +1,74 @@
-from django.core.mail import send_mail
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, get_random_string
+from reviews.models import EmailOutbox, User
+
+from .cache import get_cache
+
+CONFIRMATION_FROM_EMAIL = 'webmaster@localhost'
+CONFIRMATION_CODE_KEY = 'confirmation-code:{}'
+CONFIRMATION_CODE_LENGTH = 12
 
 
 def send_confirmation_email(confirmation_code, email):
-    """Функция отправляющая код подтверждения пользователю"""
-    send_mail(
+    """Ставит письмо с кодом подтверждения в очередь на отправку.
+
+    Письмо сохраняется в текущей транзакции и уходит командой send_emails.
+    """
+    EmailOutbox.objects.create(
         subject='Ваш код подтверждения',
-        message=f'Ваш код подтверждения: {confirmation_code}',
-        from_email='webmaster@localhost',
-        recipient_list=[email],
-        fail_silently=False
+        body=f'Ваш код подтверждения: {confirmation_code}',
+        from_email=CONFIRMATION_FROM_EMAIL,
+        to=email,
     )
+
+
+def make_confirmation_code():
+    """Новый код подтверждения и время, до которого он действует"""
+    expires = timezone.now() + timedelta(
+        seconds=settings.CONFIRMATION_CODE_TIMEOUT)
+    return get_random_string(CONFIRMATION_CODE_LENGTH), expires
+
+
+def remember_confirmation_code(user):
+    """Кладёт код в кэш вместе с полями для токена после фиксации"""
+    entry = (user.confirmation_code, user.confirmation_code_expires,
+             user.pk, user.role, user.is_superuser)
+    timeout = (user.confirmation_code_expires - timezone.now()).total_seconds()
+    transaction.on_commit(lambda: get_cache().set(
+        CONFIRMATION_CODE_KEY.format(user.username), entry, timeout))
+
+
+def forget_confirmation_code(username):
+    get_cache().delete(CONFIRMATION_CODE_KEY.format(username))
+
+
+def get_confirmation(username):
+    """Код подтверждения пользователя: из кэша, при промахе - из базы.
+
+    Возвращает (код, срок, id, роль, is_superuser) или None, если
+    пользователя нет.
+    """
+    key = CONFIRMATION_CODE_KEY.format(username)
+    entry = get_cache().get(key)
+    if entry is not None:
+        return entry
+    entry = User.objects.filter(username=username).values_list(
+        'confirmation_code', 'confirmation_code_expires',
+        'id', 'role', 'is_superuser').first()
+    if entry is not None and entry[0] and entry[1]:
+        timeout = (entry[1] - timezone.now()).total_seconds()
+        if timeout > 0:
+            get_cache().set(key, entry, timeout)
+    return entry
+
+
+def check_confirmation_code(entry, confirmation_code):
+    """Сравнение кода за постоянное время с проверкой срока действия"""
+    code, expires = entry[:2]
+    if not code or (expires is not None and expires <= timezone.now()):
+        return False
+    return constant_time_compare(code, confirmation_code)
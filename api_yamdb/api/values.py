@@ -0,0 +1,201 @@
+"""Быстрый путь чтения списков через QuerySet.values().
+
+Сериализатор вью разбирается один раз на запрос в план: для каждого
+поля - столбец values() и функция, собирающая значение из строки.
+Простые поля отдаются как есть, даты проходят через to_representation
+своего поля DRF, SlugRelatedField читает связанный столбец через JOIN,
+вложенный сериализатор FK - столбцы связанной модели, many-to-many
+выбирается одним запросом на страницу по промежуточной таблице.
+Порядок и формат полей совпадают с обычным сериализатором. Если в
+сериализаторе есть поле, которое так не собрать (метод, source='*'),
+план не строится и вью идёт обычным путём.
+"""
+from collections import defaultdict
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import fields, relations, serializers
+from rest_framework.response import Response
+
+from .metrics import serializing
+from .pagination import keyset_ordering
+
+# Поля, значение которых из values() совпадает с to_representation
+AS_IS = (fields.IntegerField, fields.CharField, fields.BooleanField,
+         fields.NullBooleanField)
+
+
+class Unsupported(Exception):
+    pass
+
+
+def model_field(model, name):
+    if name == 'pk':
+        return model._meta.pk
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        raise Unsupported(name)
+
+
+def scalar(field, column):
+    """Значение столбца в представлении поля DRF, None остаётся None"""
+    if type(field) in AS_IS:
+        return itemgetter(column)
+    represent = field.to_representation
+
+    def get(row):
+        value = row[column]
+        return None if value is None else represent(value)
+    return get
+
+
+def field_plan(model, field, prefix=''):
+    """Столбец values() и функция значения для простого поля"""
+    source = field.source
+    if '.' in source or source == '*':
+        raise Unsupported(source)
+    if isinstance(field, relations.SlugRelatedField):
+        if model_field(model, source).many_to_many:
+            raise Unsupported(source)
+        column = f'{prefix}{source}__{field.slug_field}'
+        return column, itemgetter(column)
+    if isinstance(field, (serializers.BaseSerializer, relations.RelatedField,
+                          fields.SerializerMethodField)):
+        raise Unsupported(source)
+    if model_field(model, source).is_relation:
+        raise Unsupported(source)
+    column = f'{prefix}{source}'
+    return column, scalar(field, column)
+
+
+def nested_plan(serializer, prefix):
+    """Столбцы и сборка словаря вложенного сериализатора"""
+    model = serializer.Meta.model
+    columns, getters = [], []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        column, getter = field_plan(model, field, prefix)
+        columns.append(column)
+        getters.append((name, getter))
+
+    def build(row):
+        return {name: getter(row) for name, getter in getters}
+    return columns, build
+
+
+class ValuesReader:
+    """План чтения страницы списка для сериализатора вью"""
+
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.columns = ['pk']
+        # Для many-to-many вместо функции None: значения из self.many
+        self.getters = []
+        self.many = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                self.add_many(name, field)
+            elif isinstance(field, serializers.BaseSerializer):
+                self.add_nested(name, field)
+            else:
+                column, getter = field_plan(self.model, field)
+                self.columns.append(column)
+                self.getters.append((name, getter))
+
+    def add_nested(self, name, field):
+        """Вложенный сериализатор FK, None без связи"""
+        relation = model_field(self.model, field.source)
+        if not relation.many_to_one:
+            raise Unsupported(name)
+        columns, build = nested_plan(field, f'{field.source}__')
+        link = relation.attname
+        self.columns += [link, *columns]
+        self.getters.append((name, lambda row: (
+            None if row[link] is None else build(row))))
+
+    def add_many(self, name, field):
+        """many=True по связи many-to-many с порядком связанной модели"""
+        relation = model_field(self.model, field.source)
+        child = field.child
+        if not (relation.many_to_many
+                and isinstance(child, serializers.ModelSerializer)
+                and child.Meta.model is relation.related_model):
+            raise Unsupported(name)
+        target = relation.m2m_reverse_field_name()
+        columns, build = nested_plan(child, f'{target}__')
+        ordering = [
+            f'-{target}__{key[1:]}' if key.startswith('-')
+            else f'{target}__{key}'
+            for key in relation.related_model._meta.ordering or ('pk',)
+        ]
+        self.many.append((
+            name, relation.remote_field.through._default_manager,
+            relation.m2m_field_name(), ordering, columns, build))
+        self.getters.append((name, None))
+
+    def fetch(self, queryset, *extra):
+        """Строки словарями со столбцами плана и ключа пагинации"""
+        columns = dict.fromkeys((*self.columns, *extra))
+        return queryset.prefetch_related(None).values(*columns)
+
+    def to_representation(self, rows):
+        # Связи страницы читаются до сериализации, как и сами строки
+        pks = [row['pk'] for row in rows]
+        many = {
+            name: self.related(pks, *plan)
+            for name, *plan in self.many
+        }
+        with serializing():
+            return [
+                {name: many[name][row['pk']] if getter is None
+                 else getter(row) for name, getter in self.getters}
+                for row in rows
+            ]
+
+    @staticmethod
+    def related(pks, manager, owner, ordering, columns, build):
+        """Связанные объекты страницы одним запросом, по владельцу"""
+        result = defaultdict(list)
+        if not pks:
+            return result
+        links = manager.filter(**{f'{owner}__in': pks}).order_by(
+            owner, *ordering).values(owner, *columns)
+        for link in links:
+            result[link[owner]].append(build(link))
+        return result
+
+
+def get_reader(serializer):
+    """ValuesReader или None, если сериализатор не сводится к values()"""
+    try:
+        return ValuesReader(serializer)
+    except Unsupported:
+        return None
+
+
+class ValuesListMixin:
+    """list через values() с тем же ответом, что у сериализатора.
+
+    Включается настройкой API_FAST_READS. Фильтры, пагинация и кэш
+    ответов работают как в обычном list, меняется только то, как
+    строки страницы превращаются в данные ответа.
+    """
+
+    def list(self, request, *args, **kwargs):
+        reader = None
+        if settings.API_FAST_READS:
+            reader = get_reader(self.get_serializer())
+        if reader is None:
+            return super().list(request, *args, **kwargs)
+        queryset = reader.fetch(
+            self.filter_queryset(self.get_queryset()),
+            *(term.lstrip('-') for term in keyset_ordering(self)))
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(reader.to_representation(list(queryset)))
+        return self.get_paginated_response(reader.to_representation(page))
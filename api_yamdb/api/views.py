@@ -1,49 +1,80 @@
-import django_filters
-from django.contrib.auth.tokens import default_token_generator
-from django.db.models import Avg
+import json
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q, prefetch_related_objects
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Categories, Comment, Genres, Review, Title, User
-
+from reviews.models import (SCORE_FIELDS, Categories, Comment, Genres, Review,
+                            Title, User)
+
+from .authentication import access_token_for
+from .bulk import BulkSlugMixin, TitlesBulkMixin
+from .cache import (TITLES_DETAIL, TITLES_LIST, CachedResponseMixin,
+                    title_group)
+from .filters import GenreFilter, TitleOrderingFilter
+from .metrics import TimedSerializationMixin, collect, render, serializing
+from .pagination import KeysetPagination
 from .permissions import IsAdmin, IsAdminModeratorAuthorOrReadOnly, IsReadOnly
+from .renderers import FastJSONRenderer
+from .search import SOURCES, search
 from .serializers import (CategoriesSerializer, CommentSerializer,
                           GenresSerializer, ReviewSerializer,
+                          SearchQuerySerializer, SearchResultSerializer,
                           TitlesCreateSerializer, TitlesSerializer,
-                          UserConfirmationSerializer, UserRegisterSerializer,
-                          UserSerializer)
-from .utils import send_confirmation_email
+                          TitleStatsSerializer, UserConfirmationSerializer,
+                          UserRegisterSerializer, UserSerializer)
+from .throttling import IPThrottle, UsernameThrottle
+from .utils import (check_confirmation_code, get_confirmation,
+                    make_confirmation_code, remember_confirmation_code,
+                    send_confirmation_email)
+from .values import ValuesListMixin
 
+EXPORT_CHUNK_SIZE = 1000
+# Ответы списков без float: orjson отдаёт те же байты, что и json
+READ_RENDERERS = (FastJSONRenderer, BrowsableAPIRenderer)
 
-class CreateListDestroyViewSet(mixins.CreateModelMixin,
+
+class CreateListDestroyViewSet(TimedSerializationMixin,
+                               mixins.CreateModelMixin,
                                mixins.ListModelMixin,
                                mixins.DestroyModelMixin,
                                viewsets.GenericViewSet):
     pass
 
 
-class CategoriesViewSet(CreateListDestroyViewSet):
+class CategoriesViewSet(CachedResponseMixin, BulkSlugMixin,
+                        CreateListDestroyViewSet):
     queryset = Categories.objects.all()
     serializer_class = CategoriesSerializer
     permission_classes = [IsAdmin | IsReadOnly]
     filter_backends = (filters.SearchFilter,)
     lookup_field = 'slug'
     search_fields = ('name',)
+    cache_name = 'categories'
+    cache_groups = ('categories',)
 
 
-class GenresViewSet(ModelViewSet):
+class GenresViewSet(CachedResponseMixin, BulkSlugMixin,
+                    TimedSerializationMixin, ModelViewSet):
     queryset = Genres.objects.all()
     serializer_class = GenresSerializer
     permission_classes = [IsAdmin | IsReadOnly]
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
+    cache_name = 'genres'
+    cache_groups = ('genres',)
 
     @action(
         detail=False, methods=['delete'],
@@ -57,38 +88,64 @@ class GenresViewSet(ModelViewSet):
         return Response(serializer.data, status=status.HTTP_204_NO_CONTENT)
 
 
-class GenreFilter(django_filters.FilterSet):
-    genre = django_filters.CharFilter(
-        field_name='genre__slug', method='filter_genre')
-    category = django_filters.CharFilter(
-        field_name='category__slug', method='filter_category')
-    year = django_filters.CharFilter(field_name='year', method='filter_year')
-    name = django_filters.CharFilter(field_name='name', method='filter_name')
-
-    class Meta:
-        model = Title
-        fields = ('genre', 'category', 'name', 'year',)
-
-    def filter_genre(self, queryset, name, genre):
-        return Title.objects.filter(genre__slug__contains=genre)
-
-    def filter_category(self, queryset, name, category):
-        return Title.objects.filter(category__slug__contains=category)
-
-    def filter_year(self, queryset, name, year):
-        return Title.objects.filter(year__contains=year)
-
-    def filter_name(self, queryset, names, name):
-        return Title.objects.filter(name__contains=name)
-
-
-class TitlesViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all().annotate(rating=Avg('reviews__score'))
+class TitlesViewSet(CachedResponseMixin, ValuesListMixin, TitlesBulkMixin,
+                    TimedSerializationMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.select_related(
+        'category').prefetch_related('genre')
     serializer_class = TitlesCreateSerializer
-    filter_backends = (filters.SearchFilter, DjangoFilterBackend)
+    filter_backends = (filters.SearchFilter, DjangoFilterBackend,
+                       TitleOrderingFilter)
     filterset_class = GenreFilter
     filterset_fields = ('name', 'year')
     permission_classes = [IsAdmin | IsReadOnly]
+    pagination_class = KeysetPagination
+    renderer_classes = READ_RENDERERS
+    cache_name = 'titles'
+
+    def get_cache_groups(self):
+        if self.action == 'retrieve':
+            return (TITLES_DETAIL, title_group(self.kwargs['pk']))
+        return (TITLES_LIST,)
+
+    def get_keyset_ordering(self):
+        # Курсор идёт по порядку ?ordering, а не только по id
+        return TitleOrderingFilter().get_keyset_ordering(
+            self.request, self.get_queryset(), self)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdmin])
+    def export(self, request):
+        """Потоковая выгрузка произведений в NDJSON с учётом фильтров"""
+        queryset = self.filter_queryset(
+            self.get_queryset()).prefetch_related(None).order_by('pk')
+        # Тело читается после ReplicaMiddleware, поэтому реплика,
+        # выбранная для запроса, закрепляется за queryset сейчас
+        queryset = queryset.using(queryset.db)
+        response = StreamingHttpResponse(
+            self.export_rows(queryset), content_type='application/x-ndjson')
+        response['Content-Disposition'] = (
+            'attachment; filename="titles.ndjson"')
+        return response
+
+    @staticmethod
+    def export_rows(queryset):
+        """Читает произведения курсором, подгружая жанры пачками"""
+        titles = queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        chunk = list(islice(titles, EXPORT_CHUNK_SIZE))
+        while chunk:
+            prefetch_related_objects(chunk, 'genre')
+            for title in chunk:
+                yield json.dumps(
+                    TitlesSerializer(title).data, ensure_ascii=False) + '\n'
+            chunk = list(islice(titles, EXPORT_CHUNK_SIZE))
+
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        """Распределение оценок, медиана и количество из одной строки"""
+        title = get_object_or_404(Title.objects.only(
+            'pk', 'rating', 'rating_count', *SCORE_FIELDS), pk=pk)
+        with serializing():
+            data = TitleStatsSerializer(title).data
+        return Response({'id': title.pk, **data})
 
     def get_serializer_class(self):
         if (self.request.method == 'POST'
@@ -98,8 +155,48 @@ class TitlesViewSet(viewsets.ModelViewSet):
         return TitlesSerializer
 
 
+class MetricsView(APIView):
+    """Метрики всех воркеров в текстовом формате Prometheus"""
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return HttpResponse(
+            render(collect()),
+            content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class SearchView(APIView):
+    """Полнотекстовый поиск по произведениям, отзывам и комментариям.
+
+    Результаты идут по убыванию ранга, страницы без подсчёта общего
+    количества: ссылка next есть, пока нашлось больше limit.
+    """
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        params = SearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        query = params.validated_data['q']
+        kinds = params.validated_data.get('type', tuple(SOURCES))
+        limit = params.validated_data['limit']
+        offset = params.validated_data['offset']
+        results = search(query, kinds, limit + 1, offset)
+        with serializing():
+            data = SearchResultSerializer(results[:limit], many=True).data
+        url = request.build_absolute_uri()
+        return Response({
+            'next': replace_query_param(url, 'offset', offset + limit)
+            if len(results) > limit else None,
+            'previous': replace_query_param(
+                url, 'offset', max(0, offset - limit)) if offset else None,
+            'results': data,
+        })
+
+
 class CreateTokenView(APIView):
     permission_classes = (AllowAny,)
+    throttle_classes = (IPThrottle, UsernameThrottle)
+    throttle_scope = 'token'
 
     def post(self, request):
         serializer = UserConfirmationSerializer(data=request.data)
@@ -107,10 +204,15 @@ class CreateTokenView(APIView):
         username = serializer.validated_data['username']
         confirmation_code = serializer.validated_data['confirmation_code']
 
-        user = get_object_or_404(User, username=username)
+        confirmation = get_confirmation(username)
+        if confirmation is None:
+            raise Http404
 
-        if user.confirmation_code == confirmation_code:
-            access_token = AccessToken.for_user(user=user)
+        if check_confirmation_code(confirmation, confirmation_code):
+            *_, user_id, role, is_superuser = confirmation
+            user = User(id=user_id, username=username, role=role,
+                        is_superuser=is_superuser)
+            access_token = access_token_for(user)
             return Response({"access_token": str(access_token)},
                             status=status.HTTP_200_OK)
         return Response('Please check your credentials',
@@ -119,6 +221,8 @@ class CreateTokenView(APIView):
 
 class SignUp(APIView):
     permission_classes = [AllowAny, ]
+    throttle_classes = (IPThrottle, UsernameThrottle)
+    throttle_scope = 'signup'
 
     def post(self, request):
         serializer = UserRegisterSerializer(data=request.data)
@@ -126,30 +230,44 @@ class SignUp(APIView):
 
         email = serializer.validated_data['email']
         username = serializer.validated_data['username']
-        user, created = User.objects.get_or_create(
-            email=email,
-            username=username
-        )
-
-        if created:
-            user.confirmation_code = self._generate_code(user)
-            send_confirmation_email(user.confirmation_code, email)
-            return Response({"email": email, "username": username},
-                            status=status.HTTP_200_OK)
-        if not created and not user.confirmation_code:
-            user.confirmation_code = self._generate_code(user)
-            send_confirmation_email(user.confirmation_code, email)
-            return Response({"email": email, "username": username},
-                            status=status.HTTP_200_OK)
-        return Response('user already exists',
-                        status=status.HTTP_400_BAD_REQUEST)
+        code, expires = make_confirmation_code()
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    user = User.objects.create(
+                        email=email,
+                        username=username,
+                        confirmation_code=code,
+                        confirmation_code_expires=expires
+                    )
+            except IntegrityError:
+                user = self._get_existing_user(email, username)
+                user.confirmation_code = code
+                user.confirmation_code_expires = expires
+                user.save(update_fields=(
+                    'confirmation_code', 'confirmation_code_expires'))
+            send_confirmation_email(code, email)
+            remember_confirmation_code(user)
+        return Response({"email": email, "username": username},
+                        status=status.HTTP_200_OK)
 
     @staticmethod
-    def _generate_code(user):
-        return default_token_generator.make_token(user)
-
-
-class UserViewSet(ModelViewSet):
+    def _get_existing_user(email, username):
+        """Пользователь с теми же username и email получает новый код"""
+        users = list(User.objects.filter(
+            Q(username=username) | Q(email=email)))
+        if len(users) == 1 and (users[0].username, users[0].email) == (
+                username, email):
+            return users[0]
+        errors = {}
+        if any(user.username == username for user in users):
+            errors['username'] = ['Имя пользователя уже занято']
+        if any(user.email == email for user in users):
+            errors['email'] = ['Данный email уже используется']
+        raise ValidationError(errors)
+
+
+class UserViewSet(TimedSerializationMixin, ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAdmin]
@@ -163,11 +281,13 @@ class UserViewSet(ModelViewSet):
         permission_classes=[IsAuthenticated | IsAdmin]
     )
     def me(self, request):
-        serializer = UserSerializer(request.user,
+        # request.user собран из токена, профилю нужны все поля
+        user = get_object_or_404(User, pk=request.user.pk)
+        serializer = UserSerializer(user,
                                     data=request.data,
                                     partial=True)
 
-        if request.user.is_admin or request.user.is_moderator:
+        if user.is_admin or user.is_moderator:
             serializer.is_valid(raise_exception=True)
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -176,42 +296,52 @@ class UserViewSet(ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class ReviewsViewSet(viewsets.ModelViewSet):
+class ReviewsViewSet(ValuesListMixin, TimedSerializationMixin,
+                     viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = [IsAdminModeratorAuthorOrReadOnly, ]
+    pagination_class = KeysetPagination
+    renderer_classes = READ_RENDERERS
+    keyset_ordering = ('pub_date', 'pk')
 
     def get_queryset(self):
-        queryset = Review.objects.all()
+        queryset = Review.objects.select_related('author')
         title_id = self.kwargs.get('title_id')
         queryset = queryset.filter(title_id=title_id)
         return queryset
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, id=title_id)
-        review = title.reviews.filter(author_id=self.request.user.id,
-                                      title_id=title.id)
-        if review.exists():
-            raise ValidationError('Вы уже оставили Ваш отзыв!')
-        serializer.save(author=self.request.user, title=title)
-
-
-class CommentsViewSet(viewsets.ModelViewSet):
+        title = get_object_or_404(
+            Title.objects.only('pk'), pk=self.kwargs.get('title_id'))
+        try:
+            serializer.save(author=self.request.user, title=title)
+        except IntegrityError:
+            if not Review.objects.filter(
+                    author_id=self.request.user.pk, title=title).exists():
+                raise
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY:
+                    ['Вы уже оставили Ваш отзыв!']
+            })
+
+
+class CommentsViewSet(ValuesListMixin, TimedSerializationMixin,
+                      viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = [IsAdminModeratorAuthorOrReadOnly, ]
+    pagination_class = KeysetPagination
+    renderer_classes = READ_RENDERERS
+    keyset_ordering = ('pub_date', 'pk')
 
     def get_queryset(self):
-        queryset = Comment.objects.all()
+        queryset = Comment.objects.select_related('author')
         review_id = self.kwargs.get('review_id')
         queryset = queryset.filter(review_id=review_id)
         return queryset
 
     def perform_create(self, serializer):
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, id=review_id)
-        serializer.save(author=self.request.user, review=review)
-
-    def perform_update(self, serializer):
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, id=review_id)
+        review = get_object_or_404(
+            Review.objects.only('pk', 'title_id'),
+            pk=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id'))
         serializer.save(author=self.request.user, review=review)
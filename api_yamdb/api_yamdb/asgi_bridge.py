@@ -0,0 +1,124 @@
+"""ASGI-приложение поверх WSGI-обработчика Django.
+
+В Django 2.2 нет асинхронных представлений и ORM, поэтому представления
+DRF выполняются как есть в ограниченном пуле потоков, а событийный цикл
+сервера (uvicorn) только принимает и отдаёт данные:
+
+- тело запроса читается до того, как занят поток, медленная загрузка
+  не держит поток и его соединение с базой;
+- обычный ответ собирается в потоке целиком, поток освобождается до
+  отправки, и медленный клиент ждёт уже в цикле; потоковые ответы
+  (выгрузка) отдаются из потока по мере готовности;
+- горячие маршруты чтения выполняются в отдельном пуле
+  ASGI_READ_THREADS и не стоят в очереди за запросами на запись.
+
+Права, пагинация, middleware и сигналы запроса работают как под WSGI,
+число потоков ограничивает число соединений с базой в процессе.
+"""
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from asgiref.wsgi import WsgiToAsgiInstance
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.urls import Resolver404, resolve
+
+READ_ROUTES = frozenset((
+    'title-list', 'title-detail', 'reviews-list', 'comments-list',
+    'categories-list', 'genres-list',
+))
+READ_METHODS = frozenset(('GET', 'HEAD'))
+
+
+class ASGIHandler:
+
+    def __init__(self, wsgi_application, threads, read_threads):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            threads, thread_name_prefix='asgi')
+        self.read_executor = ThreadPoolExecutor(
+            read_threads, thread_name_prefix='asgi-read')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Unsupported ASGI scope type {scope["type"]}')
+        await RequestInstance(self)(scope, receive, send)
+
+    def executor_for(self, scope):
+        if scope['method'] not in READ_METHODS:
+            return self.executor
+        try:
+            match = resolve(scope['path'])
+        except Resolver404:
+            return self.executor
+        if match.url_name in READ_ROUTES:
+            return self.read_executor
+        return self.executor
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # Соединения с базой закрываются вместе с потоками
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.shutdown)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def shutdown(self):
+        self.executor.shutdown()
+        self.read_executor.shutdown()
+
+
+class RequestInstance(WsgiToAsgiInstance):
+    """Один запрос: environ и start_response как у asgiref, но поток
+    берётся из пула обработчика и освобождается до отправки ответа"""
+
+    def __init__(self, handler):
+        super().__init__(handler.wsgi_application)
+        self.handler = handler
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await super().__call__(scope, receive, send)
+
+    async def run_wsgi_app(self, body):
+        context = contextvars.copy_context()
+        content = await asyncio.get_running_loop().run_in_executor(
+            self.handler.executor_for(self.scope),
+            context.run, self.run_in_thread, body)
+        if content is None:
+            return
+        await self.send(self.response_start)
+        await self.send({'type': 'http.response.body', 'body': content})
+
+    def run_in_thread(self, body):
+        """Ответ целиком или None, если потоковый ответ уже отправлен"""
+        response = self.wsgi_application(
+            self.build_environ(self.scope, body), self.start_response)
+        try:
+            if not getattr(response, 'streaming', False):
+                return b''.join(response)
+            self.response_started = True
+            self.sync_send(self.response_start)
+            for chunk in response:
+                if chunk:
+                    self.sync_send({'type': 'http.response.body',
+                                    'body': chunk, 'more_body': True})
+            self.sync_send({'type': 'http.response.body'})
+            return None
+        finally:
+            # request_finished закрывает соединения потока как под WSGI
+            response.close()
+
+
+def get_asgi_application():
+    django.setup(set_prefix=False)
+    return ASGIHandler(
+        WSGIHandler(), settings.ASGI_THREADS, settings.ASGI_READ_THREADS)
@@ -0,0 +1,102 @@
+"""PostgreSQL с пулом соединений в процессе.
+
+Включается переменной DB_POOL_SIZE, настройки при этом ставят
+CONN_MAX_AGE = 0. Соединения берутся из общего для потоков процесса
+пула psycopg2, а закрытие соединения Django в конце запроса
+возвращает его в пул. Свободное
+соединение ждут до POOL_TIMEOUT секунд, взятое из пула проверяется
+SELECT 1.
+"""
+import threading
+
+import psycopg2
+from django.db.backends.postgresql import base
+from psycopg2 import pool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool(pool.ThreadedConnectionPool):
+    """Пул, в котором getconn ждёт свободное соединение, а не падает"""
+
+    def __init__(self, size, timeout, **params):
+        super().__init__(0, size, **params)
+        self.slots = threading.BoundedSemaphore(size)
+        self.timeout = timeout
+
+    def getconn(self):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise psycopg2.OperationalError(
+                f'No free connection in pool after {self.timeout} s')
+        try:
+            return super().getconn()
+        except Exception:
+            self.slots.release()
+            raise
+
+    def putconn(self, conn, close=False):
+        try:
+            super().putconn(conn, close=close)
+        finally:
+            self.slots.release()
+
+
+def is_usable(connection):
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except psycopg2.Error:
+        return False
+    return True
+
+
+def close_pools():
+    """Закрывает свободные соединения всех пулов процесса"""
+    with _pools_lock:
+        for connection_pool in _pools.values():
+            connection_pool.closeall()
+        _pools.clear()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    @property
+    def pool(self):
+        # Тестовая база меняет NAME, поэтому пул привязан и к нему
+        key = self.alias, self.settings_dict['NAME']
+        with _pools_lock:
+            if key not in _pools:
+                _pools[key] = ConnectionPool(
+                    self.settings_dict['POOL_SIZE'],
+                    self.settings_dict.get('POOL_TIMEOUT', 10),
+                    **self.get_connection_params())
+            return _pools[key]
+
+    def get_new_connection(self, conn_params):
+        connection = self.pool.getconn()
+        if not is_usable(connection):
+            self.pool.putconn(connection, close=True)
+            connection = self.pool.getconn()
+        # Как в базовом бэкенде: уровень изоляции из OPTIONS или базы
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # Соединение, брошенное посреди транзакции или после ошибки,
+        # в пул не возвращается
+        discard = bool(self.in_atomic_block or self.errors_occurred
+                       or self.connection.closed)
+        with self.wrap_database_errors:
+            self.pool.putconn(self.connection, close=discard)
@@ -1,5 +1,6 @@
 import os
 from datetime import timedelta
+from itertools import zip_longest
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -23,7 +24,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'api.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -53,6 +56,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
+# Потоки для представлений под ASGI (api_yamdb.asgi): общий пул и
+# отдельный для горячих маршрутов чтения
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', default=8))
+ASGI_READ_THREADS = int(os.getenv('ASGI_READ_THREADS', default=8))
+
 DATABASES = {
     'default': {
         'ENGINE': os.getenv('DB_ENGINE', default='django.db.backends.postgresql'),
@@ -60,10 +68,103 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        # Постоянные соединения, проверяемые в начале каждого запроса
+        # (api.signals.check_connections)
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', default='true').lower() == 'true',
+        # За PgBouncer в режиме transaction серверные курсоры (.iterator())
+        # живут дольше транзакции и ломаются
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+            'DB_POOLER', default='') == 'transaction',
     }
 }
 
+# Пул соединений в процессе, общий для потоков воркера gunicorn.
+# Соединение возвращается в пул только при закрытии в конце запроса,
+# поэтому постоянные соединения (CONN_MAX_AGE) с пулом выключаются
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', default=0))
+if (DB_POOL_SIZE
+        and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'):
+    DATABASES['default'].update(
+        ENGINE='api_yamdb.db_pool',
+        CONN_MAX_AGE=0,
+        POOL_SIZE=DB_POOL_SIZE,
+        POOL_TIMEOUT=float(os.getenv('DB_POOL_TIMEOUT', default=10)),
+    )
+
+# Реплики для чтения replica1, replica2...: настройки основной базы с
+# другим хостом (DB_REPLICA_HOSTS) или именем базы (DB_REPLICA_NAMES,
+# например второй файл SQLite). В тестах реплики зеркалят default.
+DATABASE_REPLICAS = []
+for index, (host, name) in enumerate(zip_longest(
+        filter(None, os.getenv('DB_REPLICA_HOSTS', default='').split(',')),
+        filter(None, os.getenv('DB_REPLICA_NAMES', default='').split(','))),
+        1):
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host or DATABASES['default']['HOST'],
+        'NAME': name or DATABASES['default']['NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+# Сколько секунд после записи клиент читает с основной базы
+DB_PRIMARY_STICKY_SECONDS = int(
+    os.getenv('DB_PRIMARY_STICKY_SECONDS', default=10))
+
+# Метрики запросов (api.metrics): порог медленного SQL-запроса и общая
+# папка, через которую /metrics собирает счётчики всех воркеров
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', default=100))
+METRICS_DIR = os.getenv('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = float(
+    os.getenv('METRICS_FLUSH_INTERVAL', default=1))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.metrics': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
+    }
+}
+
+API_CACHE_ALIAS = 'default'
+
+# Время жизни кэша ответов по эндпоинтам в секундах, 0 отключает кэш
+API_CACHE_TIMEOUTS = {
+    'categories': int(os.getenv('CACHE_TIMEOUT_CATEGORIES', default=3600)),
+    'genres': int(os.getenv('CACHE_TIMEOUT_GENRES', default=3600)),
+    'titles': int(os.getenv('CACHE_TIMEOUT_TITLES', default=300)),
+}
+
+# Списки произведений, отзывов и комментариев через values() вместо
+# объектов модели и сериализатора (api.values)
+API_FAST_READS = os.getenv(
+    'API_FAST_READS', default='false').lower() == 'true'
+
+# Сколько секунд кэшируется роль пользователя для проверки claims токена
+AUTH_USER_STATE_TIMEOUT = int(
+    os.getenv('AUTH_USER_STATE_TIMEOUT', default=60))
+
+# Срок действия кода подтверждения в секундах
+CONFIRMATION_CODE_TIMEOUT = int(
+    os.getenv('CONFIRMATION_CODE_TIMEOUT', default=24 * 60 * 60))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -108,10 +209,17 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10,
+    # Token bucket для регистрации и выдачи токена: по IP и по username
+    'DEFAULT_THROTTLE_RATES': {
+        'signup_ip': os.getenv('THROTTLE_SIGNUP_IP', default='20/m'),
+        'signup_username': os.getenv('THROTTLE_SIGNUP_USERNAME', default='3/m'),
+        'token_ip': os.getenv('THROTTLE_TOKEN_IP', default='30/m'),
+        'token_username': os.getenv('THROTTLE_TOKEN_USERNAME', default='5/m'),
+    },
 }
 
 SIMPLE_JWT = {
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Categories, Comment, Genres, Review, Title, User
+from .models import (Categories, Comment, EmailOutbox, Genres, Review, Title,
+                     User)
 
 
 @admin.register(User)
@@ -53,6 +54,7 @@ class TitleAdmin(admin.ModelAdmin):
         'name',
         'year',
         'description',
+        'rating',
     )
     search_fields = ('name', 'slug')
     list_filter = ('category', 'genre', 'year')
@@ -71,3 +73,18 @@ class ReviewAdmin(admin.ModelAdmin):
     search_fields = ('text', 'title')
     list_filter = ('author', 'score')
     empty_value_display = '-пусто-'
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = (
+        'to',
+        'subject',
+        'status',
+        'attempts',
+        'send_after',
+        'sent_at',
+    )
+    list_filter = ('status',)
+    search_fields = ('to',)
+    empty_value_display = '-пусто-'
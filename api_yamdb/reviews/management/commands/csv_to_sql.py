@@ -1,7 +1,16 @@
 import csv
 import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from itertools import chain, islice
 
-from django.core.management import BaseCommand
+import django
+from django.apps import apps
+from django.core.management import BaseCommand, CommandError, call_command
+from django.core.management.color import no_style
+from django.db import DatabaseError, connection, connections, transaction
+from django.db.models import Max
 from reviews.models import (Categories, Comment, Genres, GenresTitles, Review,
                             Title, User)
 
@@ -15,13 +24,368 @@ TABLES_DICT = {
     GenresTitles: 'genre_title.csv'
 }
 
+BATCH_SIZE = 5000
+LOAD_OPTIONS = ('path', 'batch_size', 'resume', 'no_copy')
+
+
+def read_rows(model, path):
+    """Построчно читает CSV, приводя имена колонок к attname полей модели"""
+    attnames = {}
+    nullable = set()
+    for field in model._meta.concrete_fields:
+        attnames[field.name] = attnames[field.attname] = field.attname
+        if field.null:
+            nullable.add(field.attname)
+    with open(path, 'r', encoding='utf-8', newline='') as csv_file:
+        for row in csv.DictReader(csv_file):
+            data = {}
+            for name, value in row.items():
+                attname = attnames.get(name, name)
+                if value == '' and attname in nullable:
+                    value = None
+                data[attname] = value
+            yield data
+
+
+def skip_loaded(model, rows):
+    """Пропускает строки, уже загруженные прошлым запуском (по id)"""
+    last_pk = model.objects.aggregate(last=Max('pk'))['last']
+    if last_pk is None:
+        yield from rows
+        return
+    for row in rows:
+        if int(row[model._meta.pk.attname]) > last_pk:
+            yield row
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+def copy_value(value):
+    """Значение в текстовом формате COPY"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+class CopyStream:
+    """Файлоподобный объект для COPY FROM STDIN поверх итератора строк"""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            self.buffer += line
+        if size < 0:
+            size = len(self.buffer)
+        chunk, self.buffer = self.buffer[:size], self.buffer[size:]
+        return chunk
+
+
+def copy_rows(model, rows):
+    """Загружает строки через COPY FROM STDIN (только PostgreSQL).
+
+    Значения из CSV сохраняются как есть, для отсутствующих колонок
+    берутся значения по умолчанию полей модели.
+    """
+    rows = iter(rows)
+    head = next(rows, None)
+    if head is None:
+        return 0
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key or field.attname in head
+    ]
+    loaded = 0
+
+    def lines():
+        nonlocal loaded
+        for row in chain([head], rows):
+            obj = model(**row)
+            values = (
+                getattr(obj, field.attname) if field.attname in row
+                else field.pre_save(obj, add=True)
+                for field in fields
+            )
+            loaded += 1
+            yield '\t'.join(
+                copy_value(field.get_db_prep_save(value, connection))
+                for field, value in zip(fields, values)
+            ) + '\n'
+
+    columns = ', '.join(
+        connection.ops.quote_name(field.column) for field in fields)
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {table} ({columns}) FROM STDIN', CopyStream(lines()))
+    return loaded
+
+
+@contextmanager
+def keep_loaded_dates(model, row):
+    """auto_now и auto_now_add не перезаписывают даты из CSV.
+
+    COPY берёт значения строки как есть, bulk_create вызывает pre_save
+    полей, который подставил бы текущее время.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if field.attname in row
+        and (getattr(field, 'auto_now', False)
+             or getattr(field, 'auto_now_add', False))
+    ]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def bulk_create_rows(model, rows, batch_size):
+    loaded = 0
+    for batch in batches(rows, batch_size):
+        with keep_loaded_dates(model, batch[0]):
+            model.objects.bulk_create(model(**row) for row in batch)
+        loaded += len(batch)
+    return loaded
+
+
+def reset_sequences(models):
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def truncate(models):
+    """Очищает таблицы в порядке, обратном зависимостям"""
+    tables = [model._meta.db_table for model in reversed(models)]
+    sequences = [
+        {'table': model._meta.db_table, 'column': model._meta.pk.column}
+        for model in models
+    ]
+    statements = connection.ops.sql_flush(
+        no_style(), tables, sequences, allow_cascade=True)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def table_dependencies(models):
+    """Граф зависимостей таблиц по внешним ключам моделей"""
+    return {
+        model: {
+            field.related_model for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model in models
+            and field.related_model is not model
+        }
+        for model in models
+    }
+
+
+def deferred_indexes(models):
+    """Определения вторичных индексов и ограничений таблиц (PostgreSQL).
+
+    Первичные ключи не трогаются. Индексы, на которых держатся
+    ограничения, пересоздаются вместе с ограничениями.
+    """
+    deferred = []
+    with connection.cursor() as cursor:
+        for model in models:
+            table = model._meta.db_table
+            cursor.execute(
+                'SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint '
+                "WHERE conrelid = %s::regclass AND contype IN ('f', 'u')",
+                [table])
+            for name, definition in cursor.fetchall():
+                deferred.append((
+                    f'ALTER TABLE {table} DROP CONSTRAINT {name}',
+                    f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}',
+                ))
+            cursor.execute(
+                'SELECT indexrelid::regclass::text, '
+                'pg_get_indexdef(indexrelid) FROM pg_index '
+                'WHERE indrelid = %s::regclass AND NOT indisprimary '
+                'AND NOT EXISTS (SELECT 1 FROM pg_constraint '
+                'WHERE conindid = indexrelid)',
+                [table])
+            for name, definition in cursor.fetchall():
+                deferred.append((f'DROP INDEX {name}', definition))
+    return deferred
+
+
+def drop_deferred(deferred):
+    with transaction.atomic(), connection.cursor() as cursor:
+        for drop, _ in deferred:
+            cursor.execute(drop)
+
+
+def restore_order(item):
+    """Индексы, затем уникальные ограничения, внешние ключи последними"""
+    create = item[1]
+    return 'FOREIGN KEY' in create, 'ADD CONSTRAINT' in create
+
+
+def restore_deferred(deferred):
+    """Пересоздаёт индексы и ограничения, каждое в своей транзакции.
+
+    Ограничение, которое нарушают загруженные данные, не откатывает
+    остальные. Возвращает [(определение, ошибка)] несозданных.
+    """
+    failed = []
+    for _, create in sorted(deferred, key=restore_order):
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(create)
+        except DatabaseError as error:
+            failed.append((create, error))
+    return failed
+
+
+def init_worker():
+    django.setup()
+    connections.close_all()
+
+
+def load_table(label, options):
+    """Загружает одну таблицу, возвращает (метка, строк, секунд)"""
+    model = apps.get_model(label)
+    use_copy = (connection.vendor == 'postgresql'
+                and not options['no_copy'])
+    started = time.monotonic()
+    rows = read_rows(model, os.path.join(
+        options['path'], TABLES_DICT[model]))
+    if options['resume']:
+        rows = skip_loaded(model, rows)
+    with transaction.atomic():
+        if use_copy:
+            loaded = copy_rows(model, rows)
+        else:
+            loaded = bulk_create_rows(model, rows, options['batch_size'])
+    return label, loaded, time.monotonic() - started
+
 
 class Command(BaseCommand):
     help = 'Load data from csv to sql'
+    executor_class = ProcessPoolExecutor
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=os.path.abspath('./static/data'),
+            help='Directory with csv files')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Rows per bulk_create batch')
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Skip rows with id not greater than the loaded ones')
+        parser.add_argument(
+            '--truncate', action='store_true',
+            help='Empty the tables before loading')
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Use bulk_create even if COPY is available')
+        parser.add_argument(
+            '--workers', type=int, default=min(4, os.cpu_count() or 1),
+            help='Parallel loader processes (PostgreSQL only)')
+        parser.add_argument(
+            '--keep-indexes', action='store_true',
+            help='Do not drop secondary indexes and constraints during load')
+
+    def handle(self, *args, **options):
+        models = list(TABLES_DICT)
+        workers = options['workers']
+        if connection.vendor != 'postgresql':
+            workers = 1
+        defer = (connection.vendor == 'postgresql'
+                 and not options['keep_indexes'])
+        if options['truncate']:
+            truncate(models)
+        deferred = deferred_indexes(models) if defer else []
+        drop_deferred(deferred)
+        load_options = {name: options[name] for name in LOAD_OPTIONS}
+        started = time.monotonic()
+        try:
+            timings = self.load_tables(models, load_options, workers)
+        except BaseException:
+            self.restore_after_error(deferred)
+            raise
+        restore_started = time.monotonic()
+        failed = restore_deferred(deferred)
+        restore_elapsed = time.monotonic() - restore_started
+        for label, loaded, elapsed in timings:
+            self.stdout.write(
+                f'{label}: {loaded} rows in {elapsed:.1f}s '
+                f'({loaded / max(elapsed, 1e-6):.0f} rows/s)')
+        if deferred:
+            self.stdout.write(
+                f'{len(deferred) - len(failed)} indexes and constraints '
+                f'restored in {restore_elapsed:.1f}s')
+        self.stdout.write(
+            f'Total: {time.monotonic() - started:.1f}s, '
+            f'{workers} worker(s)')
+        reset_sequences(models)
+        call_command('recalculate_rating', stdout=self.stdout)
+        if failed:
+            self.report_failed(failed)
+            raise CommandError(
+                f'{len(failed)} indexes and constraints were not restored')
+
+    def restore_after_error(self, deferred):
+        """Возвращает индексы после ошибки загрузки, не подменяя её"""
+        try:
+            failed = restore_deferred(deferred)
+        except DatabaseError as error:
+            self.stderr.write(
+                f'Indexes and constraints were not restored: {error}')
+            return
+        self.report_failed(failed)
+
+    def report_failed(self, failed):
+        for create, error in failed:
+            self.stderr.write(f'Not restored: {create}: {error}')
 
-    def handle(self, *args, **kwargs):
-        path_csv = os.path.abspath('./static/data')
-        for model, file in TABLES_DICT.items():
-            with open(f'{path_csv}/{file}', 'r', encoding='utf-8') as csv_file:
-                dict = csv.DictReader(csv_file)
-                model.objects.bulk_create(model(**data) for data in dict)
+    def load_tables(self, models, options, workers):
+        """Грузит таблицы, как только загружены все их зависимости"""
+        if workers == 1:
+            return [load_table(model._meta.label, options)
+                    for model in models]
+        dependencies = table_dependencies(models)
+        pending = list(models)
+        done = set()
+        running = {}
+        timings = []
+        connections.close_all()
+        with self.executor_class(workers, initializer=init_worker) as pool:
+            while pending or running:
+                for model in list(pending):
+                    if dependencies[model] <= done:
+                        pending.remove(model)
+                        future = pool.submit(
+                            load_table, model._meta.label, options)
+                        running[future] = model
+                if not running:
+                    raise CommandError('Cyclic table dependencies')
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    timings.append(future.result())
+                    done.add(running.pop(future))
+        return timings
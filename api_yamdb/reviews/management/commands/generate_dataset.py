@@ -0,0 +1,327 @@
+import csv
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+from django.core.management import BaseCommand, CommandError, call_command
+from reviews.management.commands.csv_to_sql import TABLES_DICT
+from reviews.models import (SCORES, USER_ROLE_ADMIN, USER_ROLE_MODERATOR,
+                            USER_ROLE_USER, Categories, Comment, Genres,
+                            GenresTitles, Review, Title, User)
+
+CHUNK_SIZE = 100000
+
+# Колонки CSV в том же виде, что у sql_to_csv; остальные поля получат
+# значения по умолчанию при загрузке csv_to_sql
+COLUMNS = {
+    User: ('id', 'username', 'email', 'role'),
+    Categories: ('id', 'name', 'slug'),
+    Genres: ('id', 'name', 'slug'),
+    Title: ('id', 'name', 'year', 'category_id', 'description'),
+    GenresTitles: ('id', 'title_id', 'genre_id'),
+    Review: ('id', 'title_id', 'text', 'author_id', 'score', 'pub_date'),
+    Comment: ('id', 'review_id', 'text', 'author_id', 'pub_date'),
+}
+
+ROLES = (USER_ROLE_USER, USER_ROLE_MODERATOR, USER_ROLE_ADMIN)
+ROLE_SHARES = (0.989, 0.01, 0.001)
+
+WORDS = (
+    'тёмный', 'город', 'последний', 'рассвет', 'тайна', 'море', 'дорога',
+    'зимний', 'сад', 'песня', 'ветер', 'старый', 'дом', 'звезда', 'история',
+    'любовь', 'война', 'мир', 'герой', 'путь', 'ночь', 'огонь', 'остров',
+    'северный', 'король', 'тень', 'свет', 'время', 'память', 'сердце',
+    'книга', 'фильм', 'сюжет', 'финал', 'актёр', 'музыка', 'режиссёр',
+    'отличный', 'скучный', 'неожиданный', 'сильный', 'слабый', 'красивый',
+    'затянутый', 'честный', 'смешной', 'грустный', 'рекомендую', 'советую',
+    'понравился', 'разочаровал', 'пересмотрю', 'перечитаю', 'атмосфера',
+    'персонажи', 'диалоги', 'концовка', 'начало', 'середина', 'автор',
+)
+PHRASES = 1024
+# Отзывы за последние пять лет, комментарии в среднем через три дня
+DATE_SPAN = 5 * 365 * 24 * 3600
+COMMENT_DELAY = 3 * 24 * 3600
+
+
+def zipf_weights(size, skew):
+    """Вероятности по закону Ципфа: первое значение самое популярное"""
+    weights = 1 / np.arange(1, size + 1) ** skew
+    return weights / weights.sum()
+
+
+def coprime_strides(rng, modulo, size):
+    """Шаги, взаимно простые с modulo: (start + stride * j) % modulo не
+    повторяется при j < modulo"""
+    strides = rng.integers(1, modulo + 1, size)
+    while True:
+        bad = np.gcd(strides, modulo) != 1
+        if not bad.any():
+            return strides
+        strides[bad] = rng.integers(1, modulo + 1, bad.sum())
+
+
+def distinct_picks(rng, counts, modulo, starts=None):
+    """Для каждой строки counts различных значений 1..modulo.
+
+    Возвращает номер строки для каждого значения и сами значения;
+    внутри строки значения идут арифметической прогрессией по модулю.
+    """
+    rows = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(len(rows)) - np.repeat(
+        np.cumsum(counts) - counts, counts)
+    if starts is None:
+        starts = rng.integers(0, modulo, len(counts))
+    strides = coprime_strides(rng, modulo, len(counts))
+    values = (starts[rows] + strides[rows] * offsets) % modulo + 1
+    return rows, values
+
+
+def format_dates(seconds):
+    return np.datetime_as_string(
+        seconds.astype('datetime64[s]'), timezone='UTC').tolist()
+
+
+class DatasetGenerator:
+    """Синтетические таблицы YaMDb, которые генерируются пачками.
+
+    Популярность произведений, категорий и жанров распределена по Ципфу,
+    у каждого произведения своя средняя оценка, число комментариев к
+    отзыву - отрицательное биномиальное. Один автор пишет не больше
+    одного отзыва на произведение. Память ограничена размером пачки и
+    массивами по числу произведений.
+    """
+
+    def __init__(self, options):
+        self.options = options
+        self.rng = np.random.default_rng(options['seed'])
+        self.chunk_size = options['chunk_size']
+        self.now = int(time.time())
+        words = np.array(WORDS, dtype=object)
+        self.titles_text = self.phrases(words, 1, 4)
+        self.review_text = self.phrases(words, 5, 20)
+        self.comment_text = self.phrases(words, 2, 10)
+
+    def phrases(self, words, low, high):
+        lengths = self.rng.integers(low, high + 1, PHRASES)
+        return np.array([
+            ' '.join(self.rng.choice(words, length)).capitalize()
+            for length in lengths
+        ], dtype=object)
+
+    def chunks(self, total):
+        for start in range(0, total, self.chunk_size):
+            yield np.arange(start + 1, min(start + self.chunk_size, total) + 1)
+
+    def users(self):
+        for ids in self.chunks(self.options['users']):
+            names = [f'user{pk}' for pk in ids.tolist()]
+            roles = self.rng.choice(ROLES, len(ids), p=ROLE_SHARES)
+            yield User, zip(ids.tolist(), names,
+                            [f'{name}@yamdb.fake' for name in names],
+                            roles.tolist())
+
+    def categories(self):
+        ids = np.arange(1, self.options['categories'] + 1).tolist()
+        yield Categories, (
+            (pk, f'Категория {pk}', f'category-{pk}') for pk in ids)
+
+    def genres(self):
+        ids = np.arange(1, self.options['genres'] + 1).tolist()
+        yield Genres, ((pk, f'Жанр {pk}', f'genre-{pk}') for pk in ids)
+
+    def titles(self):
+        """Произведения и их жанры"""
+        options = self.options
+        current_year = datetime.now().year
+        category_weights = zipf_weights(options['categories'], options['skew'])
+        genre_weights = zipf_weights(options['genres'], options['skew'])
+        max_genres = min(options['max_genres'], options['genres'])
+        links = 0
+        for ids in self.chunks(options['titles']):
+            size = len(ids)
+            categories = self.rng.choice(
+                options['categories'], size, p=category_weights) + 1
+            categories = np.where(
+                self.rng.random(size) < 0.02, 0, categories).tolist()
+            years = np.maximum(1900, current_year - self.rng.exponential(
+                15, size).astype(np.int64))
+            names = self.titles_text[self.rng.integers(0, PHRASES, size)]
+            descriptions = self.review_text[
+                self.rng.integers(0, PHRASES, size)]
+            yield Title, zip(
+                ids.tolist(), names.tolist(), years.tolist(),
+                (category or '' for category in categories),
+                descriptions.tolist())
+
+            counts = self.rng.integers(1, max_genres + 1, size)
+            starts = self.rng.choice(
+                options['genres'], size, p=genre_weights)
+            rows, genres = distinct_picks(
+                self.rng, counts, options['genres'], starts)
+            yield GenresTitles, zip(
+                range(links + 1, links + len(rows) + 1),
+                ids[rows].tolist(), genres.tolist())
+            links += len(rows)
+
+    def review_counts(self):
+        """Число отзывов каждого произведения, не больше числа авторов"""
+        options = self.options
+        users = options['users']
+        weights = self.rng.permutation(
+            zipf_weights(options['titles'], options['skew']))
+        counts = self.rng.multinomial(options['reviews'], weights)
+        while True:
+            excess = np.maximum(counts - users, 0).sum()
+            if not excess:
+                return counts
+            counts = np.minimum(counts, users)
+            room = users - counts
+            counts += self.rng.multinomial(excess, room / room.sum())
+
+    def reviews(self):
+        """Отзывы и комментарии к ним пачками примерно по chunk_size"""
+        options = self.options
+        counts = self.review_counts()
+        quality = np.clip(self.rng.normal(7, 1.3, len(counts)), 1, 10)
+        comment_rate = options['comments'] / max(options['reviews'], 1)
+        # Границы пачек по произведениям, отзывы одного произведения
+        # всегда в одной пачке
+        totals = np.cumsum(counts)
+        bounds = np.unique(np.searchsorted(
+            totals, np.arange(self.chunk_size, totals[-1], self.chunk_size),
+            side='right'))
+        review_id = comment_id = 0
+        for titles, chunk in zip(
+                np.split(np.arange(len(counts)), bounds),
+                np.split(counts, bounds)):
+            rows, authors = distinct_picks(
+                self.rng, chunk, options['users'])
+            size = len(rows)
+            if not size:
+                continue
+            title_ids = titles[rows]
+            scores = np.clip(np.rint(
+                quality[title_ids] + self.rng.normal(0, 1.8, size)),
+                SCORES[0], SCORES[-1]).astype(np.int64)
+            dates = self.now - self.rng.integers(0, DATE_SPAN, size)
+            ids = np.arange(review_id + 1, review_id + size + 1)
+            review_id += size
+            yield Review, zip(
+                ids.tolist(), (title_ids + 1).tolist(),
+                self.review_text[self.rng.integers(0, PHRASES, size)],
+                authors.tolist(), scores.tolist(), format_dates(dates))
+
+            # Пуассон с гамма-распределённой интенсивностью: у большинства
+            # отзывов нет комментариев, у немногих их много
+            comments = self.rng.poisson(
+                comment_rate * self.rng.gamma(0.3, 1 / 0.3, size))
+            reviews = np.repeat(np.arange(size), comments)
+            total = len(reviews)
+            delays = self.rng.exponential(COMMENT_DELAY, total).astype(
+                np.int64)
+            yield Comment, zip(
+                range(comment_id + 1, comment_id + total + 1),
+                ids[reviews].tolist(),
+                self.comment_text[self.rng.integers(0, PHRASES, total)],
+                self.rng.integers(1, options['users'] + 1, total).tolist(),
+                format_dates(np.minimum(dates[reviews] + delays, self.now)))
+            comment_id += total
+
+    def tables(self):
+        yield from self.users()
+        yield from self.categories()
+        yield from self.genres()
+        yield from self.titles()
+        if self.options['reviews']:
+            yield from self.reviews()
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic dataset as csv files for csv_to_sql'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            help='Directory for csv files, a temporary one with --load')
+        parser.add_argument(
+            '--load', action='store_true',
+            help='Load the generated files with csv_to_sql')
+        parser.add_argument(
+            '--truncate', action='store_true',
+            help='Empty the tables before loading')
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--genres', type=int, default=50)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument('--reviews', type=int, default=100000)
+        parser.add_argument(
+            '--comments', type=int, default=200000,
+            help='Expected number of comments')
+        parser.add_argument(
+            '--max-genres', type=int, default=3,
+            help='Maximum genres per title')
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Zipf exponent of title, category and genre popularity')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Rows generated at once')
+
+    def handle(self, *args, **options):
+        self.validate(options)
+        path = options['path']
+        temporary = path is None and options['load']
+        if temporary:
+            path = tempfile.mkdtemp(prefix='yamdb-dataset-')
+        elif path is None:
+            path = os.path.abspath('./static/generated')
+        os.makedirs(path, exist_ok=True)
+        try:
+            self.generate(options, path)
+            if options['load']:
+                call_command('csv_to_sql', path=path,
+                             truncate=options['truncate'], stdout=self.stdout)
+        finally:
+            if temporary:
+                shutil.rmtree(path)
+
+    @staticmethod
+    def validate(options):
+        for name in ('users', 'categories', 'genres', 'titles', 'max_genres',
+                     'chunk_size'):
+            if options[name] < 1:
+                raise CommandError(f'--{name.replace("_", "-")} must be >= 1')
+        if options['reviews'] < 0 or options['comments'] < 0:
+            raise CommandError('--reviews and --comments must be >= 0')
+        if options['reviews'] > options['titles'] * options['users']:
+            raise CommandError(
+                'Each user reviews a title at most once: --reviews must not '
+                'exceed --titles * --users')
+
+    def generate(self, options, path):
+        files, writers, written = {}, {}, {}
+        started = time.monotonic()
+        try:
+            for model, file in TABLES_DICT.items():
+                files[model] = open(os.path.join(path, file), 'w',
+                                    encoding='utf-8', newline='')
+                writers[model] = csv.writer(files[model])
+                writers[model].writerow(COLUMNS[model])
+                written[model] = 0
+            for model, rows in DatasetGenerator(options).tables():
+                rows = list(rows)
+                writers[model].writerows(rows)
+                written[model] += len(rows)
+        finally:
+            for file in files.values():
+                file.close()
+        for model, file in TABLES_DICT.items():
+            self.stdout.write(
+                f'{model.__name__}: {written[model]} rows to '
+                f'{os.path.join(path, file)}')
+        self.stdout.write(
+            f'Generated in {time.monotonic() - started:.1f}s')
@@ -0,0 +1,88 @@
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from reviews.management.commands.csv_to_sql import batches
+from reviews.models import SCORE_FIELDS, SCORES, Review, Title
+
+RATING_FIELDS = ('rating_sum', 'rating_count') + SCORE_FIELDS
+STORED_FIELDS = RATING_FIELDS + ('rating',)
+BATCH_SIZE = 1000
+
+
+def actual_ratings():
+    """Сумма, количество и гистограмма оценок всех произведений.
+
+    Считается одним GROUP BY по отзывам с условными счётчиками,
+    строки идут по возрастанию id произведения.
+    """
+    return Review.objects.order_by('title_id').values('title_id').annotate(
+        rating_sum=Sum('score'),
+        rating_count=Count('pk'),
+        **{
+            field: Count('pk', filter=Q(score=score))
+            for field, score in zip(SCORE_FIELDS, SCORES)
+        }
+    ).values_list('title_id', *RATING_FIELDS)
+
+
+def drifted_titles():
+    """(id, сохранено, на самом деле) для разошедшихся произведений.
+
+    Сохранённые значения и агрегаты читаются курсорами и сливаются по id,
+    без загрузки всей таблицы в память.
+    """
+    empty = (0,) * len(RATING_FIELDS) + (None,)
+    stored_rows = Title.objects.order_by('pk').values_list(
+        'pk', *STORED_FIELDS).iterator()
+    actual_rows = actual_ratings().iterator()
+    actual = next(actual_rows, None)
+    for pk, *stored in stored_rows:
+        while actual is not None and actual[0] < pk:
+            actual = next(actual_rows, None)
+        real = empty
+        if actual is not None and actual[0] == pk:
+            rating_sum, rating_count = actual[1:3]
+            real = tuple(actual[1:]) + (rating_sum // rating_count,)
+        if tuple(stored) != real:
+            yield pk, tuple(stored), real
+
+
+def rebuild_rating(batch_size=BATCH_SIZE):
+    """Перезаписывает рейтинг разошедшихся произведений пачками"""
+    updated = 0
+    with transaction.atomic():
+        for batch in batches(drifted_titles(), batch_size):
+            Title.objects.bulk_update([
+                Title(pk=pk, **dict(zip(STORED_FIELDS, real)))
+                for pk, _, real in batch
+            ], STORED_FIELDS)
+            updated += len(batch)
+    return updated
+
+
+class Command(BaseCommand):
+    help = 'Rebuild stored title rating from reviews and check for drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only report titles with drifted rating, exit 1 if any')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Titles per bulk update')
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            updated = rebuild_rating(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Rating rebuilt for {updated} titles'))
+            return
+        drifted = 0
+        for pk, stored, real in drifted_titles():
+            drifted += 1
+            self.stdout.write(
+                f'title {pk}: stored {stored[0]}/{stored[1]} {stored[2:-1]}, '
+                f'actual {real[0]}/{real[1]} {real[2:-1]}')
+        if drifted:
+            raise CommandError(f'Rating drifted for {drifted} titles')
+        self.stdout.write(self.style.SUCCESS('Rating is consistent'))
@@ -0,0 +1,115 @@
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from reviews.models import (EMAIL_FAILED, EMAIL_PENDING, EMAIL_SENT,
+                            EmailOutbox)
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 30
+BACKOFF_MAX = 3600
+POLL_INTERVAL = 5
+UPDATE_FIELDS = ('status', 'attempts', 'send_after', 'sent_at', 'last_error')
+
+
+def backoff(attempts, base=BACKOFF_BASE):
+    """Задержка перед следующей попыткой: растёт вдвое с каждой неудачей"""
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), BACKOFF_MAX))
+
+
+def pending_batch(batch_size):
+    """Письма, которые пора отправить, заблокированные для других воркеров"""
+    queryset = EmailOutbox.objects.filter(
+        status=EMAIL_PENDING, send_after__lte=timezone.now(),
+    ).order_by('send_after', 'pk')
+    if connection.features.has_select_for_update_skip_locked:
+        queryset = queryset.select_for_update(skip_locked=True)
+    return list(queryset[:batch_size])
+
+
+def mark_failed(email, error, max_attempts, base):
+    email.attempts += 1
+    email.last_error = str(error) or type(error).__name__
+    if email.attempts >= max_attempts:
+        email.status = EMAIL_FAILED
+    else:
+        email.send_after = timezone.now() + backoff(email.attempts, base)
+
+
+def send_batch(batch_size, max_attempts, base):
+    """Отправляет пачку через одно соединение, возвращает (ушло, ошибок)"""
+    sent = failed = 0
+    with transaction.atomic():
+        emails = pending_batch(batch_size)
+        if not emails:
+            return sent, failed
+        mail_connection = get_connection()
+        try:
+            mail_connection.open()
+        except Exception as error:
+            for email in emails:
+                mark_failed(email, error, max_attempts, base)
+            EmailOutbox.objects.bulk_update(emails, UPDATE_FIELDS)
+            return sent, len(emails)
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    email.subject, email.body, email.from_email, [email.to],
+                    connection=mail_connection)
+                try:
+                    message.send()
+                except Exception as error:
+                    mark_failed(email, error, max_attempts, base)
+                    failed += 1
+                else:
+                    email.status = EMAIL_SENT
+                    email.sent_at = timezone.now()
+                    email.attempts += 1
+                    sent += 1
+        finally:
+            mail_connection.close()
+        EmailOutbox.objects.bulk_update(emails, UPDATE_FIELDS)
+    return sent, failed
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Emails sent over one connection')
+        parser.add_argument(
+            '--max-attempts', type=int, default=MAX_ATTEMPTS,
+            help='Attempts before an email is marked as failed')
+        parser.add_argument(
+            '--backoff', type=int, default=BACKOFF_BASE,
+            help='Delay in seconds after the first failure, doubled after '
+                 'each next one')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep polling the outbox instead of exiting when it is empty')
+        parser.add_argument(
+            '--interval', type=float, default=POLL_INTERVAL,
+            help='Seconds between polls of an empty outbox with --loop')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_batch(
+                options['batch_size'], options['max_attempts'],
+                options['backoff'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, failed {failed}')
+            if sent + failed < options['batch_size']:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        self.stdout.write(
+            f'Total: sent {total_sent}, failed {total_failed}')
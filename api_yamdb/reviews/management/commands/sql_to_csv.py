@@ -0,0 +1,151 @@
+import csv
+import datetime
+import gzip
+import json
+import os
+import time
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from reviews.management.commands.csv_to_sql import TABLES_DICT
+from reviews.models import User
+
+CHUNK_SIZE = 2000
+FORMAT_CSV = 'csv'
+FORMAT_NDJSON = 'ndjson'
+
+# Колонки, которые не должны уходить в выгрузку
+EXCLUDED_FIELDS = {
+    User: ('password', 'confirmation_code', 'confirmation_code_expires'),
+}
+
+
+def export_fields(model):
+    excluded = EXCLUDED_FIELDS.get(model, ())
+    return [
+        field for field in model._meta.concrete_fields
+        if field.name not in excluded
+    ]
+
+
+def export_queryset(model, since):
+    queryset = model.objects.order_by('pk')
+    if since is not None and has_pub_date(model):
+        queryset = queryset.filter(pub_date__gte=since)
+    return queryset
+
+
+def has_pub_date(model):
+    return any(
+        field.name == 'pub_date' for field in model._meta.concrete_fields)
+
+
+def json_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def write_rows(queryset, attnames, output, file_format, chunk_size):
+    """Пишет строки queryset, читая их курсором на стороне сервера"""
+    rows = queryset.values_list(*attnames).iterator(chunk_size=chunk_size)
+    written = 0
+    if file_format == FORMAT_CSV:
+        writer = csv.writer(output)
+        writer.writerow(attnames)
+        for row in rows:
+            writer.writerow([csv_value(value) for value in row])
+            written += 1
+    else:
+        for row in rows:
+            output.write(json.dumps(
+                dict(zip(attnames, row)),
+                default=json_default, ensure_ascii=False))
+            output.write('\n')
+            written += 1
+    return written
+
+
+def copy_rows(queryset, attnames, output):
+    """Выгружает CSV через COPY ... TO STDOUT (только PostgreSQL)"""
+    sql, params = queryset.values_list(*attnames).query.sql_with_params()
+    with connection.cursor() as cursor:
+        query = cursor.mogrify(sql, params).decode()
+        cursor.copy_expert(
+            f'COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)', output)
+        return cursor.rowcount
+
+
+def parse_since(value):
+    since = parse_datetime(value)
+    if since is None:
+        date = parse_date(value)
+        if date is None:
+            raise CommandError(f'Invalid --since value: {value}')
+        since = datetime.datetime.combine(date, datetime.time())
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+class Command(BaseCommand):
+    help = 'Export tables from sql to csv or ndjson'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=os.path.abspath('./static/export'),
+            help='Directory for exported files')
+        parser.add_argument(
+            '--format', choices=(FORMAT_CSV, FORMAT_NDJSON),
+            default=FORMAT_CSV)
+        parser.add_argument(
+            '--gzip', action='store_true', help='Compress files with gzip')
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Rows fetched from the server-side cursor at once')
+        parser.add_argument(
+            '--since',
+            help='Only rows with pub_date >= since for reviews and comments')
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Use the ORM iterator even if COPY is available')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_since(options['since'])
+        file_format = options['format']
+        use_copy = (file_format == FORMAT_CSV
+                    and connection.vendor == 'postgresql'
+                    and not options['no_copy'])
+        os.makedirs(options['path'], exist_ok=True)
+        for model, file in TABLES_DICT.items():
+            name = os.path.splitext(file)[0] + f'.{file_format}'
+            if options['gzip']:
+                name += '.gz'
+            path = os.path.join(options['path'], name)
+            attnames = [field.attname for field in export_fields(model)]
+            queryset = export_queryset(model, since)
+            started = time.monotonic()
+            opener = gzip.open if options['gzip'] else open
+            with opener(path, 'wt', encoding='utf-8', newline='') as output:
+                if use_copy:
+                    written = copy_rows(queryset, attnames, output)
+                else:
+                    written = write_rows(
+                        queryset, attnames, output, file_format,
+                        options['chunk_size'])
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'{model.__name__}: {written} rows to {path} '
+                f'in {elapsed:.1f}s')
@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+TRIGRAM_INDEX = 'reviews_title_name_trgm'
+
+
+def create_name_trigram_index(apps, schema_editor):
+    """GIN-индекс по триграммам для поиска по подстроке в названии.
+
+    Есть только в PostgreSQL, на других СУБД фильтр работает без него.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} '
+        'ON reviews_title USING gin (name gin_trgm_ops)'
+    )
+
+
+def drop_name_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {TRIGRAM_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_title_rating'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year'], name='title_year_idx'),
+        ),
+        migrations.RunPython(
+            create_name_trigram_index, drop_name_trigram_index),
+    ]
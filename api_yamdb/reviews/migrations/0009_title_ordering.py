@@ -0,0 +1,70 @@
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import NullIf
+
+# Индексы для ORDER BY rating DESC NULLS LAST: отдельно и вместе
+# с количеством отзывов
+RATING_INDEXES = {
+    'title_rating_idx': 'rating DESC NULLS LAST, id',
+    'title_rating_review_count_idx':
+        'rating DESC NULLS LAST, rating_count DESC, id',
+}
+
+
+def fill_rating(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Title.objects.update(
+        rating=F('rating_sum') / NullIf(F('rating_count'), 0))
+
+
+def create_rating_indexes(apps, schema_editor):
+    """Индексы по рейтингу с NULLS LAST, только в PostgreSQL.
+
+    Index в Django 2.2 не задаёт порядок NULL, а без NULLS LAST
+    произведения без оценок оказались бы в начале.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, columns in RATING_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON reviews_title ({columns})')
+
+
+def drop_rating_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in RATING_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_score_histogram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, help_text="Средняя оценка, округлённая вниз, как в Avg('reviews__score')", null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.RunPython(fill_rating, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='title',
+            name='title_year_idx',
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'id'], name='title_year_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['name', 'id'], name='title_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['-rating_count', 'id'], name='title_review_count_idx'),
+        ),
+        migrations.RunPython(create_rating_indexes, drop_rating_indexes),
+    ]
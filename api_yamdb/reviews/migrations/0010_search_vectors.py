@@ -0,0 +1,47 @@
+from django.db import migrations
+
+SEARCH_CONFIG = 'russian'
+
+# Генерируемые колонки tsvector: PostgreSQL пересчитывает их сам при
+# каждой вставке и изменении строки, Django о них не знает
+SEARCH_VECTORS = {
+    'reviews_title': (
+        "setweight(to_tsvector('{config}', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('{config}', coalesce(description, '')), 'B')"
+    ),
+    'reviews_review': "setweight(to_tsvector('{config}', text), 'B')",
+    'reviews_comment': "setweight(to_tsvector('{config}', text), 'C')",
+}
+
+
+def create_search_vectors(apps, schema_editor):
+    """Колонки search_vector с GIN-индексами, только в PostgreSQL 12+"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, expression in SEARCH_VECTORS.items():
+        expression = expression.format(config=SEARCH_CONFIG)
+        schema_editor.execute(
+            f'ALTER TABLE {table} ADD COLUMN search_vector tsvector '
+            f'GENERATED ALWAYS AS ({expression}) STORED')
+        schema_editor.execute(
+            f'CREATE INDEX {table}_search_idx ON {table} '
+            'USING gin (search_vector)')
+
+
+def drop_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in SEARCH_VECTORS:
+        schema_editor.execute(
+            f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_title_ordering'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_vectors, drop_search_vectors),
+    ]
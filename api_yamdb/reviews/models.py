@@ -1,13 +1,25 @@
+from collections import Counter
 from datetime import datetime as dt
 
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.functions import NullIf
+from django.utils import timezone
 
 USER_ROLE_USER = 'user'
 USER_ROLE_ADMIN = 'admin'
 USER_ROLE_MODERATOR = 'moderator'
 
+SCORES = range(1, 11)
+# Поля гистограммы оценок произведения: score_1 ... score_10
+SCORE_FIELDS = tuple(f'score_{score}' for score in SCORES)
+
+EMAIL_PENDING = 'pending'
+EMAIL_SENT = 'sent'
+EMAIL_FAILED = 'failed'
+
 
 class User(AbstractUser):
     """Кастомный класс пользователя Django"""
@@ -24,6 +36,8 @@ class User(AbstractUser):
                             choices=UserRoleChoices, default=USER_ROLE_USER)
     bio = models.TextField('Биография', blank=True)
     confirmation_code = models.CharField(max_length=20, null=True)
+    confirmation_code_expires = models.DateTimeField(
+        'Код подтверждения действует до', blank=True, null=True)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', ]
@@ -68,6 +82,11 @@ class Genres(models.Model):
         return self.name
 
 
+def score_field(score):
+    return models.PositiveIntegerField(
+        f'Оценок {score}', default=0, editable=False)
+
+
 class Title(models.Model):
     name = models.CharField(max_length=200, verbose_name='Произведение')
     year = models.IntegerField(
@@ -90,21 +109,100 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         related_name='category',
         blank=True,
-        null=True
+        null=True,
+        db_index=False
     )
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок', default=0, editable=False)
+    rating_count = models.PositiveIntegerField(
+        'Количество оценок', default=0, editable=False)
+    rating = models.PositiveSmallIntegerField(
+        'Рейтинг', blank=True, null=True, editable=False,
+        help_text='Средняя оценка, округлённая вниз, как в '
+                  "Avg('reviews__score')")
+    score_1 = score_field(1)
+    score_2 = score_field(2)
+    score_3 = score_field(3)
+    score_4 = score_field(4)
+    score_5 = score_field(5)
+    score_6 = score_field(6)
+    score_7 = score_field(7)
+    score_8 = score_field(8)
+    score_9 = score_field(9)
+    score_10 = score_field(10)
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ('pk',)
+        # Индексы под ?ordering: второй колонкой id, которым сортировка
+        # дополняется для однозначного порядка. Индексы по -rating с
+        # NULLS LAST создаются миграцией только в PostgreSQL.
+        indexes = [
+            models.Index(fields=('year', 'id'), name='title_year_id_idx'),
+            models.Index(fields=('name', 'id'), name='title_name_id_idx'),
+            models.Index(fields=('-rating_count', 'id'),
+                         name='title_review_count_idx'),
+            models.Index(fields=('category', 'id'),
+                         name='title_category_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def score_histogram(self):
+        """Количество оценок от 1 до 10"""
+        return [getattr(self, field) for field in SCORE_FIELDS]
+
+    @property
+    def score_median(self):
+        """Медиана оценок по гистограмме, без обращения к отзывам"""
+        if not self.rating_count:
+            return None
+        middle = (self.rating_count - 1) // 2, self.rating_count // 2
+        medians, seen = [], 0
+        for score, count in zip(SCORES, self.score_histogram):
+            seen += count
+            while len(medians) < 2 and middle[len(medians)] < seen:
+                medians.append(score)
+        return sum(medians) / 2
+
+    @staticmethod
+    def update_rating(title_id, added=None, removed=None):
+        """Атомарно добавляет и убирает оценку в рейтинге и гистограмме"""
+        deltas = Counter()
+        if added is not None:
+            deltas.update({'rating_sum': added, 'rating_count': 1,
+                           f'score_{added}': 1})
+        if removed is not None:
+            deltas.subtract({'rating_sum': removed, 'rating_count': 1,
+                             f'score_{removed}': 1})
+        changes = {
+            field: F(field) + delta for field, delta in deltas.items() if delta
+        }
+        if changes:
+            # В SET справа видны старые значения, поэтому рейтинг
+            # считается по уже сдвинутым сумме и количеству
+            changes['rating'] = (
+                F('rating_sum') + deltas['rating_sum']
+            ) / NullIf(F('rating_count') + deltas['rating_count'], 0)
+            Title.objects.filter(pk=title_id).update(**changes)
+
 
 class GenresTitles(models.Model):
-    genre = models.ForeignKey(Genres, on_delete=models.CASCADE)
-    title = models.ForeignKey(Title, on_delete=models.CASCADE)
+    genre = models.ForeignKey(
+        Genres, on_delete=models.CASCADE, db_index=False)
+    title = models.ForeignKey(
+        Title, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        # Уникальная пара служит индексом для фильтра по жанру, обратный
+        # индекс - для жанров произведения; обе выборки только по индексу
+        constraints = [models.UniqueConstraint(
+            fields=('genre', 'title'), name='unique_genre_title')]
+        indexes = [models.Index(fields=('title', 'genre'),
+                                name='genre_title_title_idx')]
 
     def __str__(self):
         return f'{self.title} {self.genre}'
@@ -141,7 +239,8 @@ class Review(models.Model):
         related_name='reviews',
         verbose_name='Произведение',
         help_text='Произведение',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
 
     class Meta:
@@ -151,10 +250,50 @@ class Review(models.Model):
             fields=['author', 'title'], name='unique_title_author')
         ]
         ordering = ('pk',)
+        # Отзывы произведения по id (offset) и по дате (курсор)
+        indexes = [
+            models.Index(fields=('title', 'id'), name='review_title_id_idx'),
+            models.Index(fields=('title', 'pub_date', 'id'),
+                         name='review_title_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._rating_state = (
+            instance.__dict__.get('title_id'),
+            instance.__dict__.get('score'),
+        )
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Сохраняет отзыв и пересчитывает рейтинг в одной транзакции"""
+        with transaction.atomic():
+            adding = self._state.adding
+            old_title_id, old_score = getattr(
+                self, '_rating_state', (None, None))
+            if self.pk is not None and None in (old_title_id, old_score):
+                # Отзыв собран с id вручную или загружен без этих полей:
+                # save() обновит строку, если она есть
+                old = Review.objects.filter(pk=self.pk).values_list(
+                    'title_id', 'score').first()
+                if old is not None:
+                    adding = False
+                    old_title_id, old_score = old
+            super().save(*args, **kwargs)
+            if adding:
+                Title.update_rating(self.title_id, added=self.score)
+            elif old_title_id != self.title_id:
+                Title.update_rating(old_title_id, removed=old_score)
+                Title.update_rating(self.title_id, added=self.score)
+            elif old_score != self.score:
+                Title.update_rating(
+                    self.title_id, added=self.score, removed=old_score)
+        self._rating_state = (self.title_id, self.score)
+
 
 class Comment(models.Model):
     text = models.TextField(
@@ -178,13 +317,54 @@ class Comment(models.Model):
         related_name='comments',
         verbose_name='Отзыв',
         help_text='Отзыв с комментарием',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
 
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('pk',)
+        indexes = [
+            models.Index(fields=('review', 'id'),
+                         name='comment_review_id_idx'),
+            models.Index(fields=('review', 'pub_date', 'id'),
+                         name='comment_review_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text
+
+
+class EmailOutbox(models.Model):
+    """Очередь писем: пишется в транзакции запроса, отправляется воркером"""
+
+    StatusChoices = (
+        (EMAIL_PENDING, 'Ожидает отправки'),
+        (EMAIL_SENT, 'Отправлено'),
+        (EMAIL_FAILED, 'Не отправлено'),
+    )
+
+    subject = models.CharField('Тема', max_length=200)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=254)
+    to = models.EmailField('Получатель', max_length=254)
+    status = models.CharField('Статус', max_length=16,
+                              choices=StatusChoices, default=EMAIL_PENDING)
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    send_after = models.DateTimeField(
+        'Отправить не раньше', default=timezone.now)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', blank=True, null=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'Письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('pk',)
+        indexes = [models.Index(
+            fields=('send_after', 'id'), name='email_outbox_pending_idx',
+            condition=Q(status=EMAIL_PENDING))]
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'
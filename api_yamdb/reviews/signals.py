@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Review, Title
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """Вычитает оценку удалённого отзыва, в т.ч. при каскадном удалении"""
+    title_id, score = getattr(instance, '_rating_state', (None, None))
+    if None in (title_id, score):
+        title_id, score = instance.title_id, instance.score
+    Title.update_rating(title_id, removed=score)
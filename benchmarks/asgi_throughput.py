@@ -0,0 +1,211 @@
+"""Пропускная способность горячих маршрутов чтения под WSGI и ASGI.
+
+    python -m benchmarks.asgi_throughput --concurrency 16 --slow-clients 4
+
+Один и тот же набор данных по очереди обслуживают gunicorn с sync- и
+gthread-воркерами (api_yamdb.wsgi) и gunicorn с uvicorn-воркерами
+(api_yamdb.asgi). Клиенты в --concurrency потоках ходят по спискам и
+карточкам произведений, отзывам, комментариям, категориям и жанрам.
+--slow-clients открывают соединения и медленно, по байту, отправляют
+тело POST-запроса, как клиенты на плохой сети: sync-воркер всё это
+время занят, ASGI читает тело в событийном цикле. Без nginx перед
+gunicorn, который буферизует запросы, это и есть поведение в бою.
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from argparse import Namespace
+
+from .endpoints import percentile, seed
+from .utils import PROJECT_DIR, print_table, scratch_database, setup_django
+
+HOST = '127.0.0.1'
+# Разрешённый по умолчанию хост из settings.ALLOWED_HOSTS
+HOST_HEADER = '127.0.0.0'
+
+SERVERS = {
+    'wsgi sync': ['api_yamdb.wsgi:application'],
+    'wsgi gthread': ['api_yamdb.wsgi:application', '-k', 'gthread',
+                     '--threads', '{threads}'],
+    'asgi uvicorn': ['api_yamdb.asgi:application',
+                     '-k', 'uvicorn.workers.UvicornWorker'],
+}
+
+PATHS = (
+    '/api/v1/titles/',
+    '/api/v1/titles/{title}/',
+    '/api/v1/titles/{title}/reviews/',
+    '/api/v1/titles/{title}/reviews/{review}/comments/',
+    '/api/v1/categories/',
+    '/api/v1/genres/',
+)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def get(port, path, timeout=30):
+    connection = http.client.HTTPConnection(HOST, port, timeout=timeout)
+    try:
+        connection.request('GET', path, headers={'Host': HOST_HEADER})
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def start_server(name, args, port, database):
+    command = [
+        sys.executable, '-c', 'from gunicorn.app.wsgiapp import run; run()',
+        *(part.format(threads=args.threads) for part in SERVERS[name]),
+        '--chdir', PROJECT_DIR, '--bind', f'{HOST}:{port}',
+        '--workers', str(args.workers), '--timeout', '120',
+    ]
+    server = subprocess.Popen(
+        command, env={**os.environ, 'DB_NAME': database,
+                      'ASGI_THREADS': str(args.threads),
+                      'ASGI_READ_THREADS': str(args.threads)},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if get(port, '/api/v1/categories/', timeout=5) == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    sys.exit(f'{name} server did not start: {" ".join(command)}')
+
+
+def slow_client(port, seconds, stop):
+    """POST signup, тело которого идёт по байту в течение seconds"""
+    body = b'{"username": "slow", "email": "slow@yamdb.fake"}'
+    while not stop.is_set():
+        try:
+            with socket.create_connection((HOST, port), timeout=60) as sock:
+                sock.sendall(
+                    b'POST /api/v1/auth/signup/ HTTP/1.1\r\n'
+                    + f'Host: {HOST_HEADER}\r\n'.encode()
+                    + b'Content-Type: application/json\r\n'
+                    + f'Content-Length: {len(body)}\r\n\r\n'.encode())
+                for byte in body:
+                    if stop.wait(seconds / len(body)):
+                        break
+                    sock.sendall(bytes((byte,)))
+                sock.recv(65536)
+        except OSError:
+            pass
+
+
+def load(port, paths, args):
+    """Запросы из concurrency потоков в течение args.seconds"""
+    timings, errors = [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.seconds
+
+    def worker(offset):
+        index = offset
+        while time.monotonic() < deadline:
+            path = paths[index % len(paths)]
+            index += 1
+            started = time.perf_counter()
+            try:
+                status = get(port, path)
+            except OSError as error:
+                status = error
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                if status == 200:
+                    timings.append(elapsed)
+                else:
+                    errors.append(status)
+
+    threads = [threading.Thread(target=worker, args=(offset,))
+               for offset in range(args.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return timings, len(errors), time.perf_counter() - started
+
+
+def measure(name, args, context, database):
+    port = free_port()
+    server = start_server(name, args, port, database)
+    stop = threading.Event()
+    slow = [threading.Thread(target=slow_client,
+                             args=(port, args.slow_seconds, stop))
+            for _ in range(args.slow_clients)]
+    try:
+        paths = [path.format(**context) for path in PATHS]
+        for path in paths:
+            get(port, path)
+        for thread in slow:
+            thread.start()
+        timings, errors, elapsed = load(port, paths, args)
+    finally:
+        stop.set()
+        for thread in slow:
+            thread.join()
+        server.terminate()
+        server.wait()
+    timings.sort()
+    if not timings:
+        return name, '0', '-', '-', '-', errors
+    return (name, f'{len(timings) / elapsed:.0f}',
+            *(f'{percentile(timings, p):.1f}' for p in (50, 95, 99)),
+            errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8,
+                        help='gthread threads and ASGI_THREADS')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--slow-clients', type=int, default=0)
+    parser.add_argument('--slow-seconds', type=float, default=5,
+                        help='How long a slow client sends its body')
+    parser.add_argument('--servers', default=','.join(SERVERS),
+                        type=lambda value: value.split(','))
+    parser.add_argument('--titles', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+
+    if connection.vendor == 'sqlite':
+        # Серверам в других процессах нужна база в файле
+        connection.settings_dict['TEST']['NAME'] = os.path.join(
+            tempfile.mkdtemp(), 'benchmark.sqlite3')
+    rows = []
+    with scratch_database() as connection:
+        context = seed(Namespace(
+            titles=args.titles, reviews=100, comments=100, warmup=0,
+            requests=0, drivers=()))
+        database = connection.settings_dict['NAME']
+        connection.close()
+        for name in args.servers:
+            rows.append(measure(name, args, context, database))
+    print(f'{args.workers} workers, {args.threads} threads, '
+          f'{args.concurrency} clients, {args.slow_clients} slow clients, '
+          f'{args.seconds:g}s, {connection.vendor}')
+    print_table(rows, ('server', 'requests/s', 'p50 ms', 'p95 ms', 'p99 ms',
+                       'errors'))
+
+
+if __name__ == '__main__':
+    main()
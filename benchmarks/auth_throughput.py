@@ -0,0 +1,78 @@
+"""Пропускная способность регистрации и выдачи токена.
+
+    python -m benchmarks.auth_throughput --requests 2000
+
+Замеряются запросы в секунду и SQL-запросы на один запрос для signup,
+выдачи токена по коду из кэша и из базы, а также для отклонённых
+троттлингом запросов.
+"""
+import argparse
+import time
+
+from .utils import print_table, scratch_database, setup_django
+
+
+def run(client, url, payloads, expected_status):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        for data in payloads:
+            response = client.post(url, data)
+            assert response.status_code == expected_status, response.content
+        elapsed = time.perf_counter() - started
+    return (f'{len(payloads) / elapsed:.0f}',
+            f'{len(queries) / len(payloads):.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.test.utils import override_settings
+    from rest_framework.test import APIClient
+    from reviews.models import User
+
+    unthrottled = override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}})
+    names = [f'user{index}' for index in range(args.requests)]
+    client = APIClient()
+    rows = []
+    with scratch_database() as connection:
+        cache.clear()
+        with unthrottled:
+            rows.append(('signup', *run(client, '/api/v1/auth/signup/', [
+                {'username': name, 'email': f'{name}@yamdb.fake'}
+                for name in names
+            ], 200)))
+            codes = dict(User.objects.values_list(
+                'username', 'confirmation_code'))
+            tokens = [
+                {'username': name, 'confirmation_code': codes[name]}
+                for name in names
+            ]
+            rows.append(('token (cache)', *run(
+                client, '/api/v1/auth/token/', tokens, 200)))
+            cache.clear()
+            rows.append(('token (database)', *run(
+                client, '/api/v1/auth/token/', tokens, 200)))
+        cache.clear()
+        guesses = [{'username': 'user0', 'confirmation_code': 'guess'}]
+        client.post('/api/v1/auth/token/', guesses[0])
+        while client.post(
+                '/api/v1/auth/token/', guesses[0]).status_code != 429:
+            pass
+        rows.append(('token (throttled)', *run(
+            client, '/api/v1/auth/token/', guesses * args.requests, 429)))
+
+    print(f'{args.requests} requests, {connection.vendor}')
+    print_table(rows, ('endpoint', 'requests/s', 'queries/request'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Создание произведений по одному POST против пакетного /titles/bulk/.
+
+    python -m benchmarks.bulk_titles --titles 2000 --batch 500
+"""
+import argparse
+import time
+
+from .utils import print_table, scratch_database, setup_django
+
+
+def payload(index, genres, categories):
+    return {
+        'name': f'Title {index}',
+        'year': 1900 + index % 120,
+        'category': categories[index % len(categories)],
+        'genre': [genres[index % len(genres)],
+                  genres[(index + 1) % len(genres)]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+    from reviews.models import Categories, Genres, Title, User
+
+    with scratch_database() as connection:
+        admin = User.objects.create(
+            username='bench', email='bench@yamdb.fake', role='admin')
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}')
+        genres = [
+            Genres.objects.create(name=f'Genre {i}', slug=f'genre-{i}').slug
+            for i in range(20)
+        ]
+        categories = [
+            Categories.objects.create(name=f'Category {i}',
+                                      slug=f'category-{i}').slug
+            for i in range(5)
+        ]
+        items = [payload(i, genres, categories) for i in range(args.titles)]
+
+        started = time.perf_counter()
+        for item in items:
+            response = client.post('/api/v1/titles/', item, format='json')
+            assert response.status_code == 201, response.content
+        single = time.perf_counter() - started
+
+        Title.objects.all().delete()
+        started = time.perf_counter()
+        for start in range(0, len(items), args.batch):
+            response = client.post(
+                '/api/v1/titles/bulk/', items[start:start + args.batch],
+                format='json')
+            assert response.status_code == 201, response.content
+        bulk = time.perf_counter() - started
+        assert Title.objects.count() == args.titles
+
+    print(f'{args.titles} titles, {connection.vendor}')
+    print_table([
+        ('POST /titles/', f'{single:.2f}', f'{args.titles / single:.0f}'),
+        (f'POST /titles/bulk/ x{args.batch}', f'{bulk:.2f}',
+         f'{args.titles / bulk:.0f}'),
+    ], ('endpoint', 'seconds', 'titles/s'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Пропускная способность с новым, постоянным и пуловым соединением.
+
+    python -m benchmarks.connection_pooling --requests 2000 --threads 4
+
+Каждый режим запускается в отдельном процессе с переменными DB_* как у
+воркера gunicorn, запросы идут через WSGI-обработчик Django, так что
+соединения закрываются и проверяются так же, как в бою. Замер имеет
+смысл только на PostgreSQL.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from .utils import print_table, scratch_database, setup_django
+
+MODES = {
+    'new connection': {'DB_CONN_MAX_AGE': '0', 'DB_POOL_SIZE': '0'},
+    'persistent': {'DB_CONN_MAX_AGE': '60', 'DB_POOL_SIZE': '0'},
+    'persistent, no checks': {
+        'DB_CONN_MAX_AGE': '60', 'DB_POOL_SIZE': '0',
+        'DB_CONN_HEALTH_CHECKS': 'false'},
+    'pool': {'DB_CONN_MAX_AGE': '0', 'DB_POOL_SIZE': '{threads}'},
+}
+
+
+def seed():
+    from reviews.models import Review, Title, User
+
+    title = Title.objects.create(name='Benchmark', year=2000)
+    users = User.objects.bulk_create(
+        User(username=f'reader{i}', email=f'reader{i}@yamdb.fake')
+        for i in range(10))
+    for user in User.objects.filter(pk__in=[user.pk for user in users]):
+        Review.objects.create(title=title, author=user, text='Text', score=7)
+    return title.pk
+
+
+def get(application, path):
+    status = []
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '',
+        'SERVER_NAME': '127.0.0.0', 'SERVER_PORT': '80',
+        'HTTP_HOST': '127.0.0.0', 'wsgi.url_scheme': 'http',
+        'wsgi.input': None, 'wsgi.errors': sys.stderr,
+    }
+    response = application(
+        environ, lambda code, headers: status.append(code))
+    try:
+        b''.join(response)
+    finally:
+        # Как WSGI-сервер: close() шлёт request_finished
+        response.close()
+    assert status[0].startswith('200'), status[0]
+
+
+def child(args):
+    """Замер в процессе с настройками из окружения"""
+    setup_django()
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    application = get_wsgi_application()
+    path = f'/api/v1/titles/{args.title}/reviews/'
+    opened = []
+    connection_created.connect(
+        lambda **kwargs: opened.append(1), weak=False)
+
+    def worker(count):
+        for _ in range(count):
+            get(application, path)
+        connections.close_all()
+
+    per_thread = args.requests // args.threads
+    threads = [threading.Thread(target=worker, args=(per_thread,))
+               for _ in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if 'POOL_SIZE' in connections['default'].settings_dict:
+        from api_yamdb.db_pool.base import close_pools
+        close_pools()
+    print(json.dumps({
+        'rps': per_thread * args.threads / elapsed,
+        'connections': len(opened),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--child', action='store_true',
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--title', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args)
+
+    setup_django()
+    rows = []
+    with scratch_database() as connection:
+        if connection.vendor != 'postgresql':
+            sys.exit('Benchmark needs PostgreSQL')
+        title = seed()
+        database = connection.settings_dict['NAME']
+        connection.close()
+        for mode, env in MODES.items():
+            env = {key: value.format(threads=args.threads)
+                   for key, value in env.items()}
+            result = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.connection_pooling',
+                 '--child', f'--title={title}',
+                 f'--requests={args.requests}', f'--threads={args.threads}'],
+                env={**os.environ, **env, 'DB_NAME': database},
+                stdout=subprocess.PIPE, check=True, text=True)
+            measured = json.loads(result.stdout.splitlines()[-1])
+            rows.append((mode, f'{measured["rps"]:.0f}',
+                         measured['connections']))
+    print(f'{args.requests} requests, {args.threads} threads, '
+          f'{connection.vendor}')
+    print_table(rows, ('mode', 'requests/s', 'connections opened'))
+
+
+if __name__ == '__main__':
+    main()
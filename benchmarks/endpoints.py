@@ -0,0 +1,465 @@
+"""Задержка и пропускная способность всех маршрутов API с базовой линией.
+
+    python -m benchmarks.endpoints --requests 200 --save baseline.json
+    python -m benchmarks.endpoints --requests 200 --compare baseline.json
+
+Каждый маршрут из api/urls.py прогоняется через тестовый клиент Django
+(последовательно, без сети) и через настоящий WSGI-сервер с пулом из
+--concurrency потоков, как у gunicorn с потоками. Для каждого маршрута
+сохраняются p50/p95/p99 задержки, запросы в секунду и SQL-запросы на
+запрос (из заголовка Server-Timing; у потоковой выгрузки видны только
+запросы до начала ответа). С --compare бенчмарк завершается
+с ошибкой, если p50 или p95 выросли, а запросы в секунду упали больше
+чем на --tolerance, или SQL-запросов стало больше. p99 сохраняется, но
+не сравнивается: на коротких прогонах он слишком шумный.
+
+Данные создаются детерминированно, параметры прогона и СУБД пишутся в
+базовую линию; сравнивать можно только прогоны с одинаковыми
+параметрами.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import math
+import os
+import platform
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from .utils import print_table, scratch_database, setup_django
+
+API = '/api/v1'
+
+Scenario = namedtuple(
+    'Scenario', ('route', 'method', 'path', 'user', 'data', 'status'))
+Scenario.__new__.__defaults__ = ('anonymous', None, 200)
+
+# path форматируется данными прогона, data вызывается с номером запроса,
+# user 'author' - отдельный автор на каждый запрос (один отзыв на автора)
+SCENARIOS = (
+    Scenario('api-root', 'GET', '/', 'user'),
+    Scenario('register', 'POST', '/auth/signup/', data=lambda n: {
+        'username': f'bench{n}', 'email': f'bench{n}@yamdb.fake'}),
+    Scenario('token', 'POST', '/auth/token/', data=lambda n: {
+        'username': 'reader0', 'confirmation_code': 'benchmark'}),
+    Scenario('account-details-list', 'GET', '/users/', 'admin'),
+    Scenario('account-details-detail', 'GET', '/users/reader0/', 'admin'),
+    Scenario('account-details-me', 'GET', '/users/me/', 'user'),
+    Scenario('categories-list', 'GET', '/categories/'),
+    Scenario('genres-list', 'GET', '/genres/'),
+    Scenario('title-list', 'GET', '/titles/'),
+    Scenario('title-list', 'GET', '/titles/?genre=genre-1&ordering=-rating'),
+    Scenario('title-detail', 'GET', '/titles/{title}/'),
+    Scenario('title-stats', 'GET', '/titles/{title}/stats/'),
+    Scenario('title-export', 'GET', '/titles/export/?category=category-1',
+             'admin'),
+    Scenario('reviews-list', 'GET', '/titles/{title}/reviews/'),
+    Scenario('reviews-list', 'POST', '/titles/{title}/reviews/', 'author',
+             lambda n: {'text': 'Отзыв', 'score': n % 10 + 1}, 201),
+    Scenario('reviews-detail', 'GET', '/titles/{title}/reviews/{review}/'),
+    Scenario('comments-list', 'GET',
+             '/titles/{title}/reviews/{review}/comments/'),
+    Scenario('comments-list', 'POST',
+             '/titles/{title}/reviews/{review}/comments/', 'user',
+             lambda n: {'text': f'Комментарий {n}'}, 201),
+    Scenario('comments-detail', 'GET',
+             '/titles/{title}/reviews/{review}/comments/{comment}/'),
+    Scenario('search', 'GET', '/search/?q=произведение'),
+)
+
+# Маршруты только для записи и удаления, их не повторить на тех же данных;
+# GET genres-detail перекрыт маршрутом genres-category_slug
+SKIPPED = frozenset((
+    'categories-bulk', 'genres-bulk', 'title-bulk', 'genres-category_slug',
+    'categories-detail', 'genres-detail',
+))
+
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'rps', 'queries')
+# Среднее число SQL-запросов может дрогнуть от промахов кэша
+QUERY_SLACK = 0.5
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def scenario_name(scenario):
+    return f'{scenario.method} {scenario.path}'
+
+
+def percentile(timings, percent):
+    """Перцентиль по ближайшему рангу, timings отсортированы"""
+    index = max(0, math.ceil(percent / 100 * len(timings)) - 1)
+    return timings[index]
+
+
+def summarize(timings, queries, elapsed):
+    timings = sorted(timings)
+    return {
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'rps': round(len(timings) / elapsed, 1),
+        'queries': round(sum(queries) / len(queries), 2),
+    }
+
+
+def seed(args):
+    """Детерминированные данные: каталог, горячее произведение и авторы"""
+    from api.authentication import access_token_for
+    from django.core.cache import cache
+    from django.utils import timezone
+    from reviews.models import (Categories, Comment, Genres, GenresTitles,
+                                Review, Title, User)
+
+    from .utils import chunked
+
+    Categories.objects.bulk_create(
+        Categories(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(10))
+    Genres.objects.bulk_create(
+        Genres(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(20))
+    categories = list(Categories.objects.order_by('pk'))
+    genres = list(Genres.objects.order_by('pk'))
+    for chunk in chunked(range(args.titles), 1000):
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {i}', year=1900 + i % 120,
+                  description=f'Описание произведения {i}',
+                  category=categories[i % len(categories)])
+            for i in chunk)
+    titles = list(Title.objects.order_by('pk').values_list('pk', flat=True))
+    for chunk in chunked(titles, 1000):
+        GenresTitles.objects.bulk_create(
+            GenresTitles(title_id=pk, genre=genres[(pk + shift) % len(genres)])
+            for pk in chunk for shift in (0, 7))
+
+    # Читатели оставили отзывы на первое произведение, у каждого POST
+    # отзыва свой автор
+    User.objects.bulk_create(
+        User(username=f'reader{i}', email=f'reader{i}@yamdb.fake',
+             confirmation_code='benchmark',
+             confirmation_code_expires=timezone.now() + timezone.timedelta(
+                 days=1))
+        for i in range(args.reviews))
+    authors_count = (args.warmup + args.requests) * len(args.drivers)
+    User.objects.bulk_create(
+        User(username=f'author{i}', email=f'author{i}@yamdb.fake')
+        for i in range(authors_count))
+    admin = User.objects.create(
+        username='bench-admin', email='bench-admin@yamdb.fake', role='admin')
+    readers = list(User.objects.filter(
+        username__startswith='reader').order_by('pk'))
+    title = titles[0]
+    Review.objects.bulk_create(
+        Review(title_id=title, author=user, text=f'Отзыв {i}',
+               score=i % 10 + 1)
+        for i, user in enumerate(readers))
+    review = Review.objects.filter(title_id=title).order_by('pk').first()
+    Comment.objects.bulk_create(
+        Comment(review=review, author=readers[i % len(readers)],
+                text=f'Комментарий {i}')
+        for i in range(args.comments))
+    cache.clear()
+    authors = User.objects.filter(
+        username__startswith='author').order_by('pk')
+    return {
+        'title': title,
+        'review': review.pk,
+        'comment': Comment.objects.filter(review=review).first().pk,
+        'tokens': {
+            'admin': str(access_token_for(admin)),
+            'user': str(access_token_for(readers[0])),
+        },
+        'authors': [str(access_token_for(user)) for user in authors],
+    }
+
+
+class Runner:
+    """Раздаёт сценарию номера запросов и заголовки авторизации"""
+
+    def __init__(self, scenario, context, authors):
+        self.scenario = scenario
+        self.context = context
+        self.authors = authors
+        self.path = API + quote(
+            scenario.path.format(**context), safe='/?=&')
+
+    def request(self, number):
+        scenario = self.scenario
+        headers = {}
+        if scenario.user == 'author':
+            token = next(self.authors)
+        else:
+            token = self.context['tokens'].get(scenario.user)
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        body = None
+        if scenario.data:
+            body = json.dumps(scenario.data(number))
+            headers['Content-Type'] = 'application/json'
+        return headers, body
+
+    def check(self, status, content):
+        if status != self.scenario.status:
+            raise AssertionError(
+                f'{self.scenario.method} {self.path}: {status} {content!r}')
+
+
+def parse_queries(server_timing):
+    match = SERVER_TIMING_QUERIES.search(server_timing or '')
+    return int(match.group(1)) if match else 0
+
+
+def run_client(runner, numbers):
+    """Тестовый клиент Django в одном потоке, без сети"""
+    from django.test import Client
+
+    client = Client()
+    timings, queries = [], []
+    started = time.perf_counter()
+    for number in numbers:
+        headers, body = runner.request(number)
+        extra = {
+            f'HTTP_{name.upper()}': value
+            for name, value in headers.items() if name != 'Content-Type'
+        }
+        request_started = time.perf_counter()
+        response = client.generic(
+            runner.scenario.method, runner.path, body or '',
+            content_type=headers.get('Content-Type', ''), **extra)
+        content = b''.join(response) if response.streaming else (
+            response.content)
+        timings.append((time.perf_counter() - request_started) * 1000)
+        runner.check(response.status_code, content[:200])
+        queries.append(parse_queries(response.get('Server-Timing')))
+    return timings, queries, time.perf_counter() - started
+
+
+class PooledWSGIServer:
+    """WSGI-сервер Django с постоянным пулом потоков и соединений с базой"""
+
+    def __init__(self, workers):
+        from django.core.handlers.wsgi import WSGIHandler
+        from django.core.servers.basehttp import (WSGIRequestHandler,
+                                                  WSGIServer)
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        class Server(WSGIServer):
+            def process_request(server, request, client_address):
+                self.executor.submit(
+                    self.handle, server, request, client_address)
+
+        self.executor = ThreadPoolExecutor(workers)
+        self.server = Server(('127.0.0.1', 0), QuietHandler,
+                             allow_reuse_address=False)
+        self.server.set_app(WSGIHandler())
+        self.thread = threading.Thread(target=self.server.serve_forever)
+
+    @staticmethod
+    def handle(server, request, client_address):
+        try:
+            server.finish_request(request, client_address)
+        except Exception:
+            server.handle_error(request, client_address)
+        finally:
+            server.shutdown_request(request)
+
+    @property
+    def address(self):
+        return self.server.server_address
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        # Соединения потоков закрываются вместе с их thread-local
+        self.executor.shutdown()
+
+
+def run_server(runner, numbers, concurrency, server):
+    """HTTP-запросы к WSGI-серверу из concurrency потоков"""
+    host, port = server.address
+    numbers = iter(numbers)
+    lock = threading.Lock()
+    timings, queries = [], []
+
+    def worker():
+        for number in numbers:
+            headers, body = runner.request(number)
+            connection = http.client.HTTPConnection(host, port)
+            request_started = time.perf_counter()
+            connection.request(
+                runner.scenario.method, runner.path, body, headers)
+            response = connection.getresponse()
+            content = response.read()
+            elapsed = (time.perf_counter() - request_started) * 1000
+            connection.close()
+            runner.check(response.status, content[:200])
+            with lock:
+                timings.append(elapsed)
+                queries.append(
+                    parse_queries(response.getheader('Server-Timing')))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        for future in [executor.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return timings, queries, time.perf_counter() - started
+
+
+def run(args, context):
+    drivers = {
+        'client': run_client,
+    }
+    results = {}
+    counter = itertools.count()
+    authors = iter(context['authors'])
+    server = None
+    if 'server' in args.drivers:
+        server = PooledWSGIServer(args.concurrency).__enter__()
+        drivers['server'] = lambda runner, numbers: run_server(
+            runner, numbers, args.concurrency, server)
+    try:
+        for driver in args.drivers:
+            results[driver] = {}
+            for scenario in select(args.only):
+                runner = Runner(scenario, context, authors)
+                measure = drivers[driver]
+                measure(runner, itertools.islice(counter, args.warmup))
+                timings, queries, elapsed = measure(
+                    runner, itertools.islice(counter, args.requests))
+                results[driver][scenario_name(scenario)] = summarize(
+                    timings, queries, elapsed)
+    finally:
+        if server is not None:
+            server.__exit__(None, None, None)
+    return results
+
+
+def select(only):
+    if not only:
+        return SCENARIOS
+    return [scenario for scenario in SCENARIOS if scenario.route in only]
+
+
+def compare(baseline, results, tolerance):
+    """Список регрессий относительно базовой линии"""
+    regressions = []
+    for driver, scenarios in results.items():
+        for name, current in scenarios.items():
+            previous = baseline.get(driver, {}).get(name)
+            if previous is None:
+                continue
+            label = f'{driver} {name}'
+            for metric in ('p50_ms', 'p95_ms'):
+                if current[metric] > previous[metric] * (1 + tolerance):
+                    regressions.append(
+                        f'{label}: {metric} {previous[metric]} -> '
+                        f'{current[metric]}')
+            if current['rps'] < previous['rps'] * (1 - tolerance):
+                regressions.append(
+                    f'{label}: rps {previous["rps"]} -> {current["rps"]}')
+            if current['queries'] > previous['queries'] + QUERY_SLACK:
+                regressions.append(
+                    f'{label}: queries {previous["queries"]} -> '
+                    f'{current["queries"]}')
+    return regressions
+
+
+def parameters(args, vendor):
+    return {
+        'vendor': vendor,
+        'titles': args.titles,
+        'reviews': args.reviews,
+        'comments': args.comments,
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--reviews', type=int, default=200)
+    parser.add_argument('--comments', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--drivers', default='client,server',
+                        type=lambda value: value.split(','))
+    parser.add_argument('--only', action='append',
+                        help='имя маршрута, например title-list')
+    parser.add_argument('--save', metavar='PATH')
+    parser.add_argument('--compare', metavar='PATH')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import override_settings
+
+    if connection.vendor == 'sqlite':
+        # Потокам сервера нужна общая база в файле, а не в памяти
+        connection.settings_dict['TEST']['NAME'] = os.path.join(
+            tempfile.mkdtemp(), 'benchmark.sqlite3')
+    unthrottled = override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}},
+        ALLOWED_HOSTS=['testserver', '127.0.0.1'],
+        DATABASE_REPLICAS=[])
+    with scratch_database() as connection, unthrottled:
+        context = seed(args)
+        results = run(args, context)
+        vendor = connection.vendor
+
+    for driver, scenarios in results.items():
+        print(f'\n{driver}: {args.requests} requests, '
+              f'concurrency {args.concurrency if driver == "server" else 1}, '
+              f'{vendor}')
+        print_table(
+            [[name, *(result[metric] for metric in METRICS)]
+             for name, result in scenarios.items()],
+            ('endpoint', *METRICS))
+
+    report = {
+        'parameters': parameters(args, vendor),
+        'environment': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+        },
+        'results': results,
+    }
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline['parameters'] != report['parameters']:
+            sys.exit(f'Baseline {args.compare} was recorded with '
+                     f'{baseline["parameters"]}')
+        regressions = compare(
+            baseline['results'], results, args.tolerance)
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    if args.compare:
+        if regressions:
+            print('\nRegressions:', *regressions, sep='\n  ')
+            sys.exit(1)
+        print(f'\nNo regressions against {args.compare}')
+
+
+if __name__ == '__main__':
+    main()
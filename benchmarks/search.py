@@ -0,0 +1,126 @@
+"""Задержка полнотекстового поиска на сгенерированном корпусе.
+
+    python -m benchmarks.search --titles 100000 --reviews 500000
+
+Для каждого запроса замеряется первая страница api.search.search и, для
+сравнения, поиск подстроки через icontains по тем же таблицам. На
+PostgreSQL работают GIN-индексы колонок search_vector, на остальных СУБД
+обратный индекс в памяти процесса (отдельно показано время его
+построения).
+"""
+import argparse
+import random
+import time
+
+from .utils import (chunked, measure, print_table, scratch_database,
+                    setup_django)
+
+BATCH_SIZE = 10000
+PAGE_SIZE = 10
+WORDS = (
+    'дракон замок рыцарь принцесса король лес море корабль остров буря '
+    'война мир любовь память город дорога звезда ночь солнце огонь '
+    'сюжет финал герой злодей актёр режиссёр музыка роман глава автор'
+).split()
+QUERIES = ('дракон', 'рыцарь замок', 'финал злодей музыка', 'единорог')
+
+
+def sentence(rnd, length):
+    # Неравномерная частота слов, как в настоящих текстах
+    return ' '.join(
+        WORDS[min(len(WORDS) - 1, int(rnd.expovariate(0.15)))]
+        for _ in range(length))
+
+
+def seed(titles_count, reviews_count, comments_count):
+    from reviews.models import Comment, Review, Title, User
+
+    rnd = random.Random(0)
+    users_count = max(1, -(-reviews_count // titles_count))
+    User.objects.bulk_create(
+        User(username=f'reader{i}', email=f'reader{i}@yamdb.fake')
+        for i in range(users_count))
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    for chunk in chunked((
+        Title(name=sentence(rnd, 3), year=2000,
+              description=sentence(rnd, 20))
+        for _ in range(titles_count)
+    ), BATCH_SIZE):
+        Title.objects.bulk_create(chunk)
+    title_ids = list(Title.objects.values_list('pk', flat=True))
+    # Пара (автор, произведение) уникальна
+    for chunk in chunked((
+        Review(title_id=title_ids[i % len(title_ids)],
+               author_id=user_ids[i // len(title_ids)],
+               text=sentence(rnd, 40), score=rnd.randint(1, 10))
+        for i in range(reviews_count)
+    ), BATCH_SIZE):
+        Review.objects.bulk_create(chunk)
+    review_ids = list(Review.objects.values_list('pk', flat=True))
+    for chunk in chunked((
+        Comment(review_id=rnd.choice(review_ids),
+                author_id=rnd.choice(user_ids), text=sentence(rnd, 15))
+        for _ in range(comments_count)
+    ), BATCH_SIZE):
+        Comment.objects.bulk_create(chunk)
+
+
+def full_text(query):
+    from api.search import search
+
+    def run():
+        search(query, limit=PAGE_SIZE)
+    return run
+
+
+def substring(query):
+    from reviews.models import Comment, Review, Title
+
+    def run():
+        for model, field in ((Title, 'name'), (Title, 'description'),
+                             (Review, 'text'), (Comment, 'text')):
+            list(model.objects.filter(
+                **{f'{field}__icontains': query}
+            ).values_list('pk', flat=True)[:PAGE_SIZE])
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=100000)
+    parser.add_argument('--reviews', type=int, default=500000)
+    parser.add_argument('--comments', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--keepdb', action='store_true')
+    args = parser.parse_args()
+
+    setup_django()
+    from api.search import inverted_index, uses_inverted_index
+    from reviews.models import Title
+
+    rows = []
+    with scratch_database(keepdb=args.keepdb) as connection:
+        if not Title.objects.exists():
+            seed(args.titles, args.reviews, args.comments)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for table in ('title', 'review', 'comment'):
+                    cursor.execute(f'ANALYZE reviews_{table}')
+        if uses_inverted_index():
+            start = time.perf_counter()
+            inverted_index.build()
+            build_ms = (time.perf_counter() - start) * 1000
+            print(f'inverted index built in {build_ms:.0f} ms')
+        for query in QUERIES:
+            rows.append((
+                query,
+                f'{measure(full_text(query), args.repeat):.2f}',
+                f'{measure(substring(query), args.repeat):.2f}',
+            ))
+    print(f'{args.titles} titles, {args.reviews} reviews, '
+          f'{args.comments} comments, {connection.vendor}')
+    print_table(rows, ('query', 'search, ms', 'icontains, ms'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Сериализация страницы списка: ModelSerializer и json против values().
+
+    python -m benchmarks.serialization --limit 100 --repeat 50
+
+Одна и та же страница списков произведений, отзывов и комментариев
+запрашивается с API_FAST_READS выключенным (объекты модели,
+сериализатор DRF, JSONRenderer) и включённым (api.values и orjson).
+Кэш ответов выключен. Время процессора процесса (process_time) - это
+цена страницы для воркера: в PostgreSQL работа базы идёт в другом
+процессе и сюда не попадает, в SQLite попадает в оба столбца поровну.
+Тела ответов сравниваются побайтно, при расхождении бенчмарк
+завершается с ошибкой.
+"""
+import argparse
+import sys
+import time
+from argparse import Namespace
+
+from .endpoints import seed
+from .utils import measure, print_table, scratch_database, setup_django
+
+PATHS = (
+    ('titles', '/api/v1/titles/'),
+    ('reviews', '/api/v1/titles/{title}/reviews/'),
+    ('comments', '/api/v1/titles/{title}/reviews/{review}/comments/'),
+)
+MODES = (('serializer', False), ('values', True))
+
+
+def page(path, params, fast):
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+
+    def run():
+        with override_settings(API_FAST_READS=fast, API_CACHE_TIMEOUTS={}):
+            response = client.get(path, params)
+        assert response.status_code == 200, response.status_code
+        return response.content
+    return run
+
+
+def compare(path, params, args):
+    runs = [page(path, params, fast) for _, fast in MODES]
+    bodies = [run() for run in runs]
+    if bodies[0] != bodies[1]:
+        sys.exit(f'{path}: values() response differs from serializer')
+    wall = [measure(run, args.repeat) for run in runs]
+    cpu = [measure(run, args.repeat, clock=time.process_time)
+           for run in runs]
+    return (*(f'{value:.2f}' for value in wall + cpu),
+            f'{(1 - cpu[1] / cpu[0]) * 100:.0f}%', len(bodies[0]))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--reviews', type=int, default=1000)
+    parser.add_argument('--comments', type=int, default=1000)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    rows = []
+    with scratch_database() as connection:
+        context = seed(Namespace(
+            titles=args.titles, reviews=args.reviews,
+            comments=args.comments, warmup=0, requests=0, drivers=()))
+        for name, path in PATHS:
+            path = path.format(**context)
+            for params in ({'limit': args.limit},
+                           {'limit': args.limit, 'pagination': 'cursor'}):
+                pagination = params.get('pagination', 'offset')
+                rows.append((name, pagination,
+                             *compare(path, params, args)))
+    print(f'{args.limit} objects per page, {args.repeat} runs, '
+          f'{connection.vendor}')
+    print_table(rows, ('list', 'pagination', 'serializer ms', 'values ms',
+                       'serializer cpu ms', 'values cpu ms', 'cpu saved',
+                       'bytes'))
+
+
+if __name__ == '__main__':
+    main()
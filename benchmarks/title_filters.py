@@ -0,0 +1,104 @@
+"""Сравнение старых и новых фильтров произведений на большом каталоге.
+
+    python -m benchmarks.title_filters --titles 1000000
+"""
+import argparse
+import random
+
+from .utils import (chunked, measure, print_table, scratch_database,
+                    setup_django)
+
+BATCH_SIZE = 10000
+WORDS = ('star', 'night', 'river', 'war', 'love', 'city', 'dream', 'storm',
+         'blue', 'king', 'road', 'ghost', 'summer', 'iron', 'last', 'song')
+
+
+def seed(titles_count):
+    from reviews.models import Categories, Genres, GenresTitles, Title
+
+    Categories.objects.bulk_create(
+        Categories(name=f'Category {i}', slug=f'category-{i}')
+        for i in range(10))
+    Genres.objects.bulk_create(
+        Genres(name=f'Genre {i}', slug=f'genre-{i}') for i in range(30))
+    category_ids = list(Categories.objects.values_list('pk', flat=True))
+    genre_ids = list(Genres.objects.values_list('pk', flat=True))
+    rnd = random.Random(0)
+    titles = (
+        Title(name=' '.join(rnd.sample(WORDS, 3)),
+              year=rnd.randint(1900, 2022),
+              category_id=rnd.choice(category_ids))
+        for _ in range(titles_count)
+    )
+    for chunk in chunked(titles, BATCH_SIZE):
+        Title.objects.bulk_create(chunk)
+    title_ids = Title.objects.values_list('pk', flat=True).iterator()
+    links = (
+        GenresTitles(title_id=title_id, genre_id=genre_id)
+        for title_id in title_ids
+        for genre_id in rnd.sample(genre_ids, 2)
+    )
+    for chunk in chunked(links, BATCH_SIZE):
+        GenresTitles.objects.bulk_create(chunk)
+
+
+def legacy_filters():
+    """Фильтры в том виде, в каком они были до переписывания"""
+    from reviews.models import Title
+    return {
+        'genre': lambda value: Title.objects.filter(
+            genre__slug__contains=value),
+        'category': lambda value: Title.objects.filter(
+            category__slug__contains=value),
+        'year': lambda value: Title.objects.filter(year__contains=value),
+        'name': lambda value: Title.objects.filter(name__contains=value),
+    }
+
+
+def page(queryset):
+    """То же, что делает LimitOffsetPagination: COUNT и первая страница"""
+    def run():
+        queryset.count()
+        list(queryset[:10])
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--keepdb', action='store_true')
+    args = parser.parse_args()
+
+    setup_django()
+    from api.filters import GenreFilter
+    from reviews.models import Title
+
+    cases = {
+        'genre': 'genre-7',
+        'category': 'category-3',
+        'year': '1999',
+        'name': 'storm',
+    }
+    with scratch_database(keepdb=args.keepdb) as connection:
+        if not Title.objects.exists():
+            seed(args.titles)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        legacy = legacy_filters()
+        rows = []
+        for name, value in cases.items():
+            new_qs = GenreFilter(
+                {name: value}, queryset=Title.objects.all()).qs
+            before = measure(page(legacy[name](value)), args.repeat)
+            after = measure(page(new_qs), args.repeat)
+            rows.append((name, value, f'{before:.2f}', f'{after:.2f}',
+                         f'{before / after:.1f}x'))
+    print(f'{args.titles} titles, {connection.vendor}')
+    print_table(rows, ('filter', 'value', 'before, ms', 'after, ms',
+                       'speedup'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Top-N произведений по ?ordering на большом каталоге.
+
+    python -m benchmarks.title_ordering --titles 1000000 --budget-ms 10
+
+Для каждой сортировки замеряется первая страница (без COUNT) через
+TitleOrderingFilter. Завершается с ошибкой, если медиана превышает
+бюджет. Бюджет рассчитан на PostgreSQL с индексами из миграций.
+"""
+import argparse
+import random
+import sys
+
+from .utils import (chunked, measure, print_table, scratch_database,
+                    setup_django)
+
+BATCH_SIZE = 10000
+PAGE_SIZE = 10
+ORDERINGS = ('-rating', '-review_count', 'year', 'name',
+             '-rating,-review_count', '-rating,-review_count,year,name')
+
+
+def seed(titles_count):
+    from reviews.models import SCORE_FIELDS, Title
+
+    rnd = random.Random(0)
+
+    def title(index):
+        histogram = [0] * len(SCORE_FIELDS)
+        # Около трети произведений без отзывов
+        for _ in range(max(0, rnd.randint(-20, 40))):
+            histogram[min(9, int(rnd.triangular(0, 10, 7)))] += 1
+        count = sum(histogram)
+        total = sum(score * hits for score, hits in enumerate(histogram, 1))
+        return Title(
+            name=f'Title {rnd.randrange(titles_count):08d}',
+            year=rnd.randint(1900, 2022),
+            rating_sum=total,
+            rating_count=count,
+            rating=total // count if count else None,
+            **dict(zip(SCORE_FIELDS, histogram)),
+        )
+
+    for chunk in chunked(map(title, range(titles_count)), BATCH_SIZE):
+        Title.objects.bulk_create(chunk)
+
+
+def top(ordering):
+    from django.test import RequestFactory
+    from rest_framework.request import Request
+
+    from api.filters import TitleOrderingFilter
+    from api.views import TitlesViewSet
+
+    request = Request(RequestFactory().get('/', {'ordering': ordering}))
+    view = TitlesViewSet(request=request, format_kwarg=None)
+    queryset = TitleOrderingFilter().filter_queryset(
+        request, TitlesViewSet.queryset.all(), view)
+
+    def run():
+        list(queryset[:PAGE_SIZE])
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--budget-ms', type=float, default=10)
+    parser.add_argument('--keepdb', action='store_true')
+    args = parser.parse_args()
+
+    setup_django()
+    from reviews.models import Title
+
+    rows = []
+    with scratch_database(keepdb=args.keepdb) as connection:
+        if not Title.objects.exists():
+            seed(args.titles)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE reviews_title')
+        for ordering in ORDERINGS:
+            elapsed = measure(top(ordering), args.repeat)
+            rows.append((ordering, f'{elapsed:.2f}',
+                         'ok' if elapsed <= args.budget_ms else 'SLOW'))
+    print(f'{args.titles} titles, {connection.vendor}, '
+          f'budget {args.budget_ms} ms')
+    print_table(rows, ('ordering', 'top-10, ms', 'budget'))
+    if any(row[2] != 'ok' for row in rows):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
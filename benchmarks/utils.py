@@ -0,0 +1,77 @@
+"""Общие помощники для бенчмарков.
+
+Бенчмарки запускаются из корня репозитория, например:
+    python -m benchmarks.title_filters --titles 1000000
+
+Данные создаются во временной тестовой базе (как у manage.py test),
+рабочая база не затрагивается.
+"""
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(ROOT_DIR, 'api_yamdb')
+
+
+def setup_django():
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def scratch_database(keepdb=False):
+    """Создаёт временную тестовую базу и удаляет её после замеров"""
+    from django.db import connection
+    from django.test.utils import (setup_test_environment,
+                                   teardown_test_environment)
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(
+            old_name, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+def measure(func, repeat=5, clock=time.perf_counter):
+    """Медиана времени выполнения func в миллисекундах.
+
+    clock=time.process_time считает только процессорное время процесса.
+    """
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = clock()
+        func()
+        timings.append((clock() - start) * 1000)
+    return statistics.median(timings)
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def print_table(rows, headers):
+    widths = [
+        max(len(str(row[i])) for row in rows + [headers])
+        for i in range(len(headers))
+    ]
+    for row in [headers] + rows:
+        print('  '.join(str(cell).ljust(width)
+                        for cell, width in zip(row, widths)))
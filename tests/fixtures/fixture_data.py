@@ -0,0 +1,77 @@
+import pytest
+from api.authentication import access_token_for
+from rest_framework.test import APIClient
+
+ITEMS_COUNT = 15
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def no_replicas(settings):
+    # Реплики из окружения выключены, тесты включают их явно
+    settings.DATABASE_REPLICAS = []
+
+
+@pytest.fixture(autouse=True)
+def clear_search_index():
+    from api.search import inverted_index
+    inverted_index.clear()
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create(
+        username='TestAdmin', email='admin@yamdb.fake', role='admin')
+
+
+@pytest.fixture
+def admin_client(admin):
+    client = APIClient()
+    token = access_token_for(admin)
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.fixture
+def catalog(django_user_model):
+    from reviews.models import (Categories, Comment, Genres, GenresTitles,
+                                Review, Title)
+
+    categories = [
+        Categories.objects.create(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(3)
+    ]
+    genres = [
+        Genres.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(3)
+    ]
+    titles = [
+        Title.objects.create(
+            name=f'Произведение {i}', year=2000 + i,
+            category=categories[i % len(categories)])
+        for i in range(ITEMS_COUNT)
+    ]
+    GenresTitles.objects.bulk_create(
+        GenresTitles(title=title, genre=genre)
+        for title in titles for genre in genres[:2]
+    )
+    users = [
+        django_user_model.objects.create(
+            username=f'user{i}', email=f'user{i}@yamdb.fake')
+        for i in range(ITEMS_COUNT)
+    ]
+    reviews = [
+        Review.objects.create(
+            title=titles[0], author=user, text='Отзыв', score=i % 10 + 1)
+        for i, user in enumerate(users)
+    ]
+    Comment.objects.bulk_create(
+        Comment(review=reviews[0], author=user, text='Комментарий')
+        for user in users
+    )
+    return {'title': titles[0], 'review': reviews[0]}
@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import pytest
+from api.authentication import access_token_for
+from rest_framework.test import APIClient
+
+from .fixtures.fixture_data import ITEMS_COUNT
+
+
+def call(handler, method, path, query=b'', body=b'', headers=()):
+    """Один запрос к ASGI-приложению: (статус, заголовки, тело)"""
+    messages = [{'type': 'http.request', 'body': body[:3],
+                 'more_body': True},
+                {'type': 'http.request', 'body': body[3:]}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        'type': 'http', 'method': method, 'path': path,
+        'query_string': query, 'http_version': '1.1',
+        'headers': [(b'host', b'testserver'),
+                    (b'content-length', str(len(body)).encode()), *headers],
+        'server': ('testserver', 80),
+    }
+    asyncio.run(handler(scope, receive, send))
+    start, *chunks = sent
+    return (start['status'], dict(start['headers']),
+            b''.join(chunk.get('body', b'') for chunk in chunks))
+
+
+@pytest.fixture
+def handler(settings):
+    from api_yamdb.asgi_bridge import ASGIHandler
+    from django.core.handlers.wsgi import WSGIHandler
+
+    settings.ALLOWED_HOSTS = ['testserver']
+    handler = ASGIHandler(WSGIHandler(), 2, 2)
+    yield handler
+    handler.shutdown()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestASGI:
+
+    def test_same_response_as_wsgi(self, catalog, handler):
+        expected = APIClient().get('/api/v1/titles/', {'year': 2001})
+        status, headers, body = call(
+            handler, 'GET', '/api/v1/titles/', b'year=2001')
+        assert status == 200
+        assert json.loads(body) == expected.json(), (
+            'Проверьте, что под ASGI ответ совпадает с WSGI'
+        )
+        assert headers[b'content-type'] == b'application/json'
+
+    def test_pagination_and_nested_routes(self, catalog, handler):
+        title, review = catalog['title'], catalog['review']
+        status, _, body = call(
+            handler, 'GET', f'/api/v1/titles/{title.pk}/reviews/',
+            b'limit=5')
+        assert status == 200
+        page = json.loads(body)
+        assert len(page['results']) == 5 and page['next']
+        status, _, body = call(
+            handler, 'GET',
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/')
+        assert status == 200 and json.loads(body)['results']
+
+    def test_permissions_and_body(self, catalog, admin, handler):
+        payload = json.dumps({'name': 'Новая', 'slug': 'new'}).encode()
+        status, _, _ = call(
+            handler, 'POST', '/api/v1/categories/', body=payload,
+            headers=[(b'content-type', b'application/json')])
+        assert status == 401
+        token = access_token_for(admin)
+        status, _, body = call(
+            handler, 'POST', '/api/v1/categories/', body=payload,
+            headers=[(b'content-type', b'application/json'),
+                     (b'authorization', f'Bearer {token}'.encode())])
+        assert status == 201, body
+        assert json.loads(body)['slug'] == 'new'
+
+    def test_streaming_export(self, catalog, admin, handler):
+        token = access_token_for(admin)
+        status, _, body = call(
+            handler, 'GET', '/api/v1/titles/export/',
+            headers=[(b'authorization', f'Bearer {token}'.encode())])
+        assert status == 200
+        assert len(body.splitlines()) == ITEMS_COUNT, (
+            'Проверьте, что потоковый ответ отдаётся под ASGI целиком'
+        )
+
+    def test_read_routes_use_read_pool(self, handler):
+        read = {'method': 'GET', 'path': '/api/v1/titles/'}
+        assert handler.executor_for(read) is handler.read_executor
+        assert handler.executor_for(
+            {**read, 'method': 'POST'}) is handler.executor
+        assert handler.executor_for(
+            {**read, 'path': '/api/v1/users/'}) is handler.executor
@@ -0,0 +1,54 @@
+import pytest
+from api.authentication import access_token_for
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+def get_client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token_for(user)}')
+    return client
+
+
+@pytest.mark.django_db
+class TestStatelessAuthentication:
+
+    def test_user_not_loaded_per_request(self, catalog, admin,
+                                         django_assert_num_queries):
+        client = get_client(admin)
+        path = f'/api/v1/titles/{catalog["title"].pk}/reviews/'
+        client.get(path)
+        with django_assert_num_queries(2):
+            response = client.get(path)
+        assert response.status_code == 200, (
+            'Проверьте, что запрос с токеном не загружает пользователя '
+            'из базы'
+        )
+
+    def test_token_without_claims(self, admin):
+        client = APIClient()
+        token = AccessToken.for_user(admin)
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == 200
+        assert response.json()['username'] == admin.username
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTokenRevocation:
+
+    def test_role_change_revokes_token(self, admin):
+        client = get_client(admin)
+        assert client.get('/api/v1/users/').status_code == 200
+        admin.role = 'user'
+        admin.save()
+        response = client.get('/api/v1/users/')
+        assert response.status_code == 401, (
+            'Проверьте, что после смены роли старый токен не принимается'
+        )
+
+    def test_deleted_user_token_rejected(self, admin):
+        client = get_client(admin)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        admin.delete()
+        assert client.get('/api/v1/users/me/').status_code == 401
@@ -0,0 +1,32 @@
+from benchmarks.endpoints import SCENARIOS, SKIPPED, compare
+
+
+def route_names(patterns):
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            yield from route_names(pattern.url_patterns)
+        else:
+            yield pattern.name
+
+
+def test_every_route_benchmarked():
+    from api.urls import urlpatterns
+
+    covered = {scenario.route for scenario in SCENARIOS} | SKIPPED
+    missing = set(route_names(urlpatterns)) - covered
+    assert not missing, (
+        'Добавьте маршруты в benchmarks/endpoints.py: '
+        f'{", ".join(sorted(missing))}'
+    )
+
+
+def test_regressions_beyond_tolerance():
+    result = {'p50_ms': 10, 'p95_ms': 20, 'p99_ms': 40, 'rps': 100,
+              'queries': 2}
+    baseline = {'client': {'GET /titles/': result}}
+    within = {**result, 'p50_ms': 11, 'p95_ms': 23, 'p99_ms': 80, 'rps': 85}
+    assert compare(baseline, {'client': {'GET /titles/': within}}, 0.2) == []
+    slower = {**result, 'p95_ms': 25, 'rps': 70, 'queries': 3}
+    regressions = compare(baseline, {'client': {'GET /titles/': slower}}, 0.2)
+    assert [line.split(': ')[1].split()[0] for line in regressions] == [
+        'p95_ms', 'rps', 'queries']
@@ -0,0 +1,254 @@
+import pytest
+from api.authentication import access_token_for
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .fixtures.fixture_data import ITEMS_COUNT
+
+CATEGORIES_BULK = '/api/v1/categories/bulk/'
+GENRES_BULK = '/api/v1/genres/bulk/'
+TITLES_BULK = '/api/v1/titles/bulk/'
+
+
+def statuses(response):
+    return [item['status'] for item in response.json()]
+
+
+@pytest.mark.django_db
+class TestSlugBulk:
+
+    @pytest.mark.parametrize('url', (CATEGORIES_BULK, GENRES_BULK))
+    def test_post(self, catalog, admin_client, url):
+        response = admin_client.post(url, [
+            {'name': 'Новая', 'slug': 'new'},
+            {'name': 'Ещё', 'slug': 'more'},
+        ], format='json')
+        assert response.status_code == 201
+        assert response.json() == [
+            {'status': 201, 'data': {'name': 'Новая', 'slug': 'new'}},
+            {'status': 201, 'data': {'name': 'Ещё', 'slug': 'more'}},
+        ]
+
+    def test_post_mixed_results(self, catalog, admin_client):
+        from reviews.models import Categories
+        response = admin_client.post(CATEGORIES_BULK, [
+            {'name': 'Новая', 'slug': 'new'},
+            {'name': 'Занятая', 'slug': 'category-0'},
+            {'name': 'Повтор', 'slug': 'new'},
+            {'slug': 'nameless'},
+            'не объект',
+        ], format='json')
+        assert response.status_code == 207, (
+            'Проверьте, что частичные ошибки дают 207 Multi-Status'
+        )
+        results = response.json()
+        assert statuses(response) == [201, 400, 400, 400, 400]
+        assert 'slug' in results[1]['errors']
+        assert 'slug' in results[2]['errors']
+        assert 'name' in results[3]['errors']
+        assert 'non_field_errors' in results[4]['errors']
+        assert set(Categories.objects.values_list('slug', flat=True)) == {
+            'category-0', 'category-1', 'category-2', 'new'}
+
+    def test_delete(self, catalog, admin_client):
+        from reviews.models import Genres
+        response = admin_client.delete(
+            GENRES_BULK, ['genre-0', 'missing', 'genre-2'], format='json')
+        assert response.status_code == 207
+        assert response.json() == [
+            {'status': 204, 'data': 'genre-0'},
+            {'status': 404, 'errors': {'slug': ['Объект не найден']}},
+            {'status': 204, 'data': 'genre-2'},
+        ]
+        assert list(Genres.objects.values_list('slug', flat=True)) == [
+            'genre-1']
+
+    @pytest.mark.parametrize('url', (CATEGORIES_BULK, GENRES_BULK))
+    def test_bulk_slug_reserved(self, admin_client, url):
+        list_url = url.replace('bulk/', '')
+        response = admin_client.post(list_url, {'name': 'Bulk',
+                                                'slug': 'bulk'})
+        assert response.status_code == 400, (
+            'Проверьте, что слаг bulk занят маршрутом пакетной записи'
+        )
+        assert 'slug' in response.json()
+        response = admin_client.post(
+            url, [{'name': 'Bulk', 'slug': 'bulk'}], format='json')
+        assert statuses(response) == [400]
+
+    def test_not_a_list(self, admin_client):
+        response = admin_client.post(
+            CATEGORIES_BULK, {'name': 'Новая', 'slug': 'new'}, format='json')
+        assert response.status_code == 400
+        assert 'non_field_errors' in response.json()
+
+    def test_too_many_items(self, admin_client, monkeypatch):
+        from api import bulk
+        monkeypatch.setattr(bulk, 'BULK_MAX_ITEMS', 2)
+        response = admin_client.post(CATEGORIES_BULK, [
+            {'name': str(i), 'slug': f's{i}'} for i in range(3)
+        ], format='json')
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize('url', (CATEGORIES_BULK, GENRES_BULK,
+                                     TITLES_BULK))
+    def test_admin_only(self, django_user_model, url):
+        assert APIClient().post(url, [], format='json').status_code == 401
+        user = django_user_model.objects.create(
+            username='reader', email='reader@yamdb.fake')
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {access_token_for(user)}')
+        assert client.delete(url, [], format='json').status_code == 403
+
+
+@pytest.mark.django_db
+class TestTitlesBulk:
+
+    def test_post(self, catalog, admin_client):
+        from reviews.models import Title
+        response = admin_client.post(TITLES_BULK, [
+            {'name': 'Первое', 'year': 2001, 'category': 'category-1',
+             'genre': ['genre-0', 'genre-2', 'genre-0']},
+            {'name': 'Второе', 'year': 2002},
+        ], format='json')
+        assert response.status_code == 201
+        first, second = (item['data'] for item in response.json())
+        assert first['category'] == 'category-1'
+        assert first['genre'] == ['genre-0', 'genre-2'], (
+            'Проверьте, что повторный жанр связывается один раз'
+        )
+        assert second['category'] is None and second['genre'] == []
+        assert Title.objects.count() == ITEMS_COUNT + 2
+
+    def test_post_item_errors(self, catalog, admin_client):
+        response = admin_client.post(TITLES_BULK, [
+            {'name': 'Хорошее', 'year': 2001},
+            {'name': 'Без жанра', 'year': 2001, 'genre': ['missing']},
+            {'name': 'Без категории', 'year': 2001, 'category': 'missing'},
+            {'name': 'Из будущего', 'year': 3000},
+            {'year': 2001},
+        ], format='json')
+        assert response.status_code == 207
+        results = response.json()
+        assert statuses(response) == [201, 400, 400, 400, 400]
+        assert 'genre' in results[1]['errors']
+        assert 'category' in results[2]['errors']
+        assert 'year' in results[3]['errors']
+        assert 'name' in results[4]['errors']
+
+    def test_slugs_resolved_in_one_query(self, catalog, admin_client):
+        from reviews.models import Categories, Genres
+        items = [
+            {'name': f'Произведение {i}', 'year': 2000,
+             'category': f'category-{i % 3}',
+             'genre': [f'genre-{i % 3}', f'genre-{(i + 1) % 3}']}
+            for i in range(20)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.post(TITLES_BULK, items, format='json')
+        assert response.status_code == 201
+
+        def lookups(model):
+            table = connection.ops.quote_name(model._meta.db_table)
+            slug = connection.ops.quote_name('slug')
+            return [
+                query for query in queries.captured_queries
+                if f'FROM {table} WHERE {table}.{slug} IN' in query['sql']
+            ]
+        assert len(lookups(Genres)) == 1, (
+            'Проверьте, что жанры пачки загружаются одним запросом'
+        )
+        assert len(lookups(Categories)) == 1
+
+    def test_patch(self, catalog, admin_client):
+        from reviews.models import Title
+        first, second, third = Title.objects.order_by('pk')[:3]
+        response = admin_client.patch(TITLES_BULK, [
+            {'id': first.pk, 'name': 'Новое имя'},
+            {'id': second.pk, 'genre': ['genre-2'], 'category': None},
+            {'id': 10 ** 6, 'name': 'Нет такого'},
+            {'id': third.pk, 'year': 3000},
+            {'name': 'Без id'},
+        ], format='json')
+        assert response.status_code == 207
+        results = response.json()
+        assert statuses(response) == [200, 200, 404, 400, 404]
+        assert results[0]['data']['name'] == 'Новое имя'
+        assert results[0]['data']['genre'] == ['genre-0', 'genre-1']
+        assert results[1]['data']['genre'] == ['genre-2']
+        assert results[1]['data']['category'] is None
+        assert results[2]['errors'] == {'id': ['Объект не найден']}
+        assert 'year' in results[3]['errors']
+        first.refresh_from_db()
+        assert (first.name, first.year) == ('Новое имя', 2000)
+        assert list(second.genre.values_list('slug', flat=True)) == [
+            'genre-2']
+
+    def test_patch_repeated_id(self, catalog, admin_client):
+        from reviews.models import Title
+        title = Title.objects.order_by('pk').first()
+        response = admin_client.patch(TITLES_BULK, [
+            {'id': title.pk, 'genre': ['genre-2']},
+            {'id': title.pk, 'genre': ['genre-2'], 'name': 'Повтор'},
+        ], format='json')
+        assert response.status_code == 207, (
+            'Проверьте, что повторный id не приводит к ошибке сервера'
+        )
+        results = response.json()
+        assert statuses(response) == [200, 400]
+        assert 'id' in results[1]['errors']
+        title.refresh_from_db()
+        assert title.name != 'Повтор'
+        assert list(title.genre.values_list('slug', flat=True)) == [
+            'genre-2']
+
+    def test_delete(self, catalog, admin_client):
+        from reviews.models import Title
+        pk = Title.objects.order_by('pk').last().pk
+        response = admin_client.delete(
+            TITLES_BULK, [pk, 10 ** 6, 'x'], format='json')
+        assert response.status_code == 207
+        assert statuses(response) == [204, 404, 404]
+        assert not Title.objects.filter(pk=pk).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBulkInvalidation:
+
+    @pytest.fixture(autouse=True)
+    def cache_timeouts(self, settings):
+        settings.API_CACHE_TIMEOUTS = {
+            'categories': 60, 'genres': 60, 'titles': 60}
+
+    def test_categories(self, catalog, admin_client):
+        client = APIClient()
+        assert client.get('/api/v1/categories/').json()['count'] == 3
+        admin_client.post(CATEGORIES_BULK, [{'name': 'Новая', 'slug': 'new'}],
+                          format='json')
+        assert client.get('/api/v1/categories/').json()['count'] == 4, (
+            'Проверьте, что пакетная запись сбрасывает кэш списка'
+        )
+        admin_client.delete(CATEGORIES_BULK, ['new'], format='json')
+        assert client.get('/api/v1/categories/').json()['count'] == 3
+
+    def test_titles(self, catalog, admin_client):
+        from reviews.models import Title
+        client = APIClient()
+        title = Title.objects.order_by('pk').first()
+        detail = f'/api/v1/titles/{title.pk}/'
+        assert client.get('/api/v1/titles/').json()['count'] == ITEMS_COUNT
+        client.get(detail)
+
+        admin_client.post(TITLES_BULK, [{'name': 'Новое', 'year': 2001}],
+                          format='json')
+        assert client.get(
+            '/api/v1/titles/').json()['count'] == ITEMS_COUNT + 1
+        admin_client.patch(TITLES_BULK, [{'id': title.pk, 'name': 'Другое'}],
+                           format='json')
+        assert client.get(detail).json()['name'] == 'Другое', (
+            'Проверьте, что пакетное изменение сбрасывает кэш карточки'
+        )
+        admin_client.delete(TITLES_BULK, [title.pk], format='json')
+        assert client.get(detail).status_code == 404
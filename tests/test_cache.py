@@ -0,0 +1,161 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from django.db import transaction
+from rest_framework.test import APIClient
+
+CATEGORIES = '/api/v1/categories/'
+TIMEOUT = 60
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Часы локального кэша, которые тест двигает вручную"""
+    now = [time.time()]
+    fake = SimpleNamespace(time=lambda: now[0])
+    monkeypatch.setattr('django.core.cache.backends.base.time', fake)
+    monkeypatch.setattr('django.core.cache.backends.locmem.time', fake)
+    return now
+
+
+@pytest.fixture
+def cache_timeouts(settings):
+    settings.API_CACHE_TIMEOUTS = {
+        'categories': TIMEOUT, 'genres': TIMEOUT, 'titles': TIMEOUT}
+
+
+def versions(*groups):
+    from api.cache import get_versions
+    return get_versions(groups)
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('cache_timeouts')
+class TestCachedResponses:
+
+    def test_etag_and_not_modified(self, catalog):
+        client = APIClient()
+        response = client.get(CATEGORIES)
+        assert response.status_code == 200
+        etag = response['ETag']
+        assert etag.startswith('"') and etag.endswith('"'), (
+            'Проверьте, что ответ содержит ETag'
+        )
+        assert 'no-cache' in response['Cache-Control']
+
+        response = client.get(CATEGORIES, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что совпавший If-None-Match возвращает 304'
+        )
+        assert response['ETag'] == etag
+        assert not response.content
+        response = client.get(
+            CATEGORIES, HTTP_IF_NONE_MATCH=f'"other", W/{etag}')
+        assert response.status_code == 304
+        response = client.get(CATEGORIES, HTTP_IF_NONE_MATCH='"other"')
+        assert response.status_code == 200
+
+    def test_cached_response_skips_database(
+            self, catalog, django_assert_num_queries):
+        client = APIClient()
+        first = client.get(CATEGORIES)
+        with django_assert_num_queries(0):
+            second = client.get(CATEGORIES)
+        assert second.json() == first.json()
+        assert second['ETag'] == first['ETag']
+
+    def test_query_string_is_part_of_key(self, catalog):
+        client = APIClient()
+        everything = client.get(CATEGORIES).json()
+        found = client.get(CATEGORIES, {'search': 'Категория 1'}).json()
+        assert found['count'] == 1
+        assert everything['count'] == 3
+
+    def test_timeout_honoured(self, catalog, clock,
+                              django_assert_num_queries,
+                              django_assert_max_num_queries):
+        client = APIClient()
+        client.get(CATEGORIES)
+        clock[0] += TIMEOUT - 1
+        with django_assert_num_queries(0):
+            client.get(CATEGORIES)
+        clock[0] += 2
+        with django_assert_max_num_queries(2) as captured:
+            client.get(CATEGORIES)
+        assert captured.captured_queries, (
+            'Проверьте, что ответ перечитывается после API_CACHE_TIMEOUTS'
+        )
+
+    def test_zero_timeout_disables_cache(self, catalog, settings):
+        settings.API_CACHE_TIMEOUTS = {'categories': 0}
+        client = APIClient()
+        assert 'ETag' not in client.get(CATEGORIES)
+        from reviews.models import Categories
+        Categories.objects.filter(slug='category-0').update(name='Новое')
+        names = [item['name'] for item in client.get(CATEGORIES).json()[
+            'results']]
+        assert 'Новое' in names
+
+    def test_write_invalidates_after_commit(self, catalog):
+        from reviews.models import Categories
+        client = APIClient()
+        before = client.get(CATEGORIES)
+        generation = versions('categories', 'titles-list')
+
+        Categories.objects.create(name='Новая', slug='new')
+
+        assert versions('categories', 'titles-list') != generation, (
+            'Проверьте, что запись сдвигает поколение кэша'
+        )
+        after = client.get(CATEGORIES)
+        assert after.json()['count'] == before.json()['count'] + 1
+        assert after['ETag'] != before['ETag']
+
+    def test_rolled_back_write_keeps_generation(self, catalog):
+        from reviews.models import Categories
+        generation = versions('categories')
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                Categories.objects.create(name='Новая', slug='new')
+                raise RuntimeError
+        assert versions('categories') == generation
+
+    def test_api_write_invalidates(self, catalog, admin_client):
+        client = APIClient()
+        client.get(CATEGORIES)
+        response = admin_client.post(
+            CATEGORIES, {'name': 'Новая', 'slug': 'new'})
+        assert response.status_code == 201
+        slugs = [item['slug'] for item in client.get(
+            CATEGORIES, {'limit': 10}).json()['results']]
+        assert 'new' in slugs
+
+    def test_review_invalidates_title_only(self, catalog,
+                                           django_user_model):
+        from reviews.models import Review, Title
+        popular = catalog['title']
+        title = Title.objects.exclude(pk=popular.pk).first()
+        detail = f'/api/v1/titles/{title.pk}/'
+        client = APIClient()
+        assert client.get(detail).json()['rating'] is None
+        popular_generation = versions(f'title:{popular.pk}')
+
+        author = django_user_model.objects.create(
+            username='critic', email='critic@yamdb.fake')
+        Review.objects.create(title=title, author=author, text='Отзыв',
+                              score=10)
+
+        assert client.get(detail).json()['rating'] == 10, (
+            'Проверьте, что новый отзыв сбрасывает кэш карточки'
+        )
+        assert versions(f'title:{popular.pk}') == popular_generation
+
+    def test_genre_link_invalidates_titles(self, catalog):
+        from reviews.models import Genres
+        title = catalog['title']
+        client = APIClient()
+        genres = client.get(f'/api/v1/titles/{title.pk}/').json()['genre']
+        title.genre.add(Genres.objects.get(slug='genre-2'))
+        after = client.get(f'/api/v1/titles/{title.pk}/').json()['genre']
+        assert len(after) == len(genres) + 1
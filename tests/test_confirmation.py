@@ -0,0 +1,114 @@
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APIClient
+from reviews.models import User
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+TOKEN_URL = '/api/v1/auth/token/'
+
+
+def signup(client, username):
+    return client.post(
+        SIGNUP_URL, {'username': username, 'email': f'{username}@yamdb.fake'})
+
+
+def get_code(username):
+    return User.objects.get(username=username).confirmation_code
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConfirmationCode:
+
+    def test_token_issued_without_queries(self, django_assert_num_queries):
+        client = APIClient()
+        assert signup(client, 'fast').status_code == 200
+        code = get_code('fast')
+        with django_assert_num_queries(0):
+            response = client.post(
+                TOKEN_URL, {'username': 'fast', 'confirmation_code': code})
+        assert response.status_code == 200, (
+            'Проверьте, что токен выдаётся по коду из кэша без запросов '
+            'к базе'
+        )
+        assert 'access_token' in response.json()
+
+    def test_database_fallback(self):
+        client = APIClient()
+        signup(client, 'fallback')
+        cache.clear()
+        response = client.post(TOKEN_URL, {
+            'username': 'fallback',
+            'confirmation_code': get_code('fallback')})
+        assert response.status_code == 200
+
+    def test_wrong_and_expired_code(self):
+        client = APIClient()
+        signup(client, 'expired')
+        code = get_code('expired')
+        response = client.post(
+            TOKEN_URL, {'username': 'expired', 'confirmation_code': 'x'})
+        assert response.status_code == 400
+        User.objects.filter(username='expired').update(
+            confirmation_code_expires=timezone.now())
+        cache.clear()
+        response = client.post(
+            TOKEN_URL, {'username': 'expired', 'confirmation_code': code})
+        assert response.status_code == 400, (
+            'Проверьте, что просроченный код не принимается'
+        )
+
+    def test_signup_again_issues_new_code(self):
+        client = APIClient()
+        signup(client, 'again')
+        old_code = get_code('again')
+        assert signup(client, 'again').status_code == 200
+        new_code = get_code('again')
+        assert new_code != old_code
+        response = client.post(
+            TOKEN_URL, {'username': 'again', 'confirmation_code': new_code})
+        assert response.status_code == 200
+
+    def test_taken_username_and_email(self):
+        client = APIClient()
+        signup(client, 'taken')
+        response = client.post(
+            SIGNUP_URL, {'username': 'taken', 'email': 'other@yamdb.fake'})
+        assert response.status_code == 400
+        assert 'username' in response.json()
+        response = client.post(
+            SIGNUP_URL, {'username': 'other', 'email': 'taken@yamdb.fake'})
+        assert response.status_code == 400
+        assert 'email' in response.json()
+
+
+@pytest.mark.django_db
+class TestAuthThrottling:
+
+    def test_token_throttled_before_database(self, settings,
+                                             django_assert_num_queries):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {'token_username': '2/m'},
+        }
+        client = APIClient()
+        data = {'username': 'victim', 'confirmation_code': 'guess'}
+        for _ in range(2):
+            assert client.post(TOKEN_URL, data).status_code == 404
+        with django_assert_num_queries(0):
+            response = client.post(TOKEN_URL, data)
+        assert response.status_code == 429, (
+            'Проверьте, что перебор кодов ограничивается по username'
+        )
+        other = {'username': 'other', 'confirmation_code': 'guess'}
+        assert client.post(TOKEN_URL, other).status_code == 404
+
+    def test_signup_throttled_by_ip(self, settings):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {'signup_ip': '2/m'},
+        }
+        client = APIClient()
+        for number in range(2):
+            assert signup(client, f'user{number}').status_code == 200
+        assert signup(client, 'user2').status_code == 429
@@ -0,0 +1,164 @@
+import runpy
+import time
+
+import pytest
+from django.db import OperationalError, connection
+
+POOL_ALIAS = 'pool_test'
+
+
+def load_settings(monkeypatch, **env):
+    from api_yamdb import settings
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    return runpy.run_path(settings.__file__)
+
+
+@pytest.fixture
+def closed(monkeypatch):
+    calls = []
+    monkeypatch.setattr(connection, 'close', lambda: calls.append(1))
+    return calls
+
+
+@pytest.mark.django_db
+class TestConnectionHealthChecks:
+
+    def check(self, monkeypatch, usable, health_checks=True):
+        from api.signals import check_connections
+        monkeypatch.setitem(
+            connection.settings_dict, 'CONN_HEALTH_CHECKS', health_checks)
+        monkeypatch.setattr(connection, 'is_usable', lambda: usable)
+        connection.ensure_connection()
+        check_connections()
+
+    def test_settings(self, settings):
+        database = settings.DATABASES['default']
+        assert database['CONN_MAX_AGE'] == 60, (
+            'Проверьте, что соединения с базой по умолчанию постоянные'
+        )
+        assert database['CONN_HEALTH_CHECKS'] is True
+        assert database['DISABLE_SERVER_SIDE_CURSORS'] is False
+
+    def test_broken_connection_closed(self, monkeypatch, closed):
+        self.check(monkeypatch, usable=False)
+        assert closed, (
+            'Проверьте, что оборванное соединение закрывается в начале '
+            'запроса'
+        )
+
+    def test_usable_connection_kept(self, monkeypatch, closed):
+        self.check(monkeypatch, usable=True)
+        assert not closed
+
+    def test_health_checks_disabled(self, monkeypatch, closed):
+        self.check(monkeypatch, usable=False, health_checks=False)
+        assert not closed
+
+
+class TestPoolSettings:
+
+    def test_pool_disables_persistent_connections(self, monkeypatch):
+        databases = load_settings(
+            monkeypatch, DB_ENGINE='django.db.backends.postgresql',
+            DB_POOL_SIZE='4', DB_CONN_MAX_AGE='60',
+            DB_REPLICA_HOSTS='replica')['DATABASES']
+        assert databases['default']['ENGINE'] == 'api_yamdb.db_pool'
+        assert databases['default']['POOL_SIZE'] == 4
+        assert databases['default']['CONN_MAX_AGE'] == 0, (
+            'Проверьте, что с пулом соединения закрываются после запроса '
+            'и возвращаются в пул'
+        )
+        assert databases['replica1']['CONN_MAX_AGE'] == 0
+
+    def test_without_pool(self, monkeypatch):
+        database = load_settings(
+            monkeypatch, DB_ENGINE='django.db.backends.postgresql',
+            DB_POOL_SIZE='0', DB_CONN_MAX_AGE='60')['DATABASES']['default']
+        assert database['ENGINE'] == 'django.db.backends.postgresql'
+        assert database['CONN_MAX_AGE'] == 60
+
+
+@pytest.fixture
+def pooled():
+    """Соединения Django поверх одного пула на POOL_SIZE соединений"""
+    from api_yamdb.db_pool.base import DatabaseWrapper, close_pools
+    wrappers = []
+
+    def make(size=2, timeout=0.2):
+        wrapper = DatabaseWrapper({
+            **connection.settings_dict, 'POOL_SIZE': size,
+            'POOL_TIMEOUT': timeout}, alias=POOL_ALIAS)
+        wrappers.append(wrapper)
+        return wrapper
+
+    yield make
+    for wrapper in wrappers:
+        wrapper.close()
+    close_pools()
+
+
+@pytest.mark.skipif(connection.vendor != 'postgresql',
+                    reason='connection pool is PostgreSQL only')
+@pytest.mark.django_db
+class TestConnectionPool:
+
+    def test_checkout_and_return(self, pooled):
+        first, second = pooled(), pooled()
+        first.ensure_connection()
+        second.ensure_connection()
+        assert first.pool is second.pool
+        assert first.connection is not second.connection
+        raw = first.connection
+        first.close()
+        third = pooled()
+        third.ensure_connection()
+        assert third.connection is raw, (
+            'Проверьте, что закрытое соединение возвращается в пул'
+        )
+        with third.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            assert cursor.fetchone() == (1,)
+
+    def test_timeout_when_pool_is_full(self, pooled):
+        first = pooled(size=1, timeout=0.2)
+        first.ensure_connection()
+        started = time.monotonic()
+        with pytest.raises(OperationalError, match='No free connection'):
+            pooled(size=1, timeout=0.2).ensure_connection()
+        assert time.monotonic() - started >= 0.2
+        first.close()
+        waiting = pooled(size=1, timeout=0.2)
+        waiting.ensure_connection()
+        assert waiting.connection is not None
+
+    def test_broken_connection_discarded(self, pooled):
+        first = pooled()
+        first.ensure_connection()
+        raw = first.connection
+        pid = raw.get_backend_pid()
+        first.close()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [pid])
+        second = pooled()
+        second.ensure_connection()
+        assert second.connection is not raw, (
+            'Проверьте, что оборванное соединение из пула не выдаётся'
+        )
+        assert raw.closed
+        with second.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def test_connection_with_errors_not_returned(self, pooled):
+        first = pooled(size=1)
+        first.ensure_connection()
+        raw = first.connection
+        first.errors_occurred = True
+        first.close()
+        assert raw.closed, (
+            'Проверьте, что соединение после ошибки закрывается, а не '
+            'возвращается в пул'
+        )
+        second = pooled(size=1)
+        second.ensure_connection()
+        assert second.connection is not raw
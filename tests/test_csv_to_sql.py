@@ -0,0 +1,284 @@
+import csv
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+
+from .fixtures.fixture_data import ITEMS_COUNT
+
+
+def counts():
+    from reviews.management.commands.csv_to_sql import TABLES_DICT
+    return {model: model.objects.count() for model in TABLES_DICT}
+
+
+def load(path, *args):
+    stdout = StringIO()
+    call_command('csv_to_sql', '--path', str(path), *args, stdout=stdout)
+    return stdout.getvalue()
+
+
+@pytest.fixture
+def dataset(catalog, tmp_path):
+    """CSV текущего каталога в формате sql_to_csv и число строк таблиц"""
+    call_command('sql_to_csv', '--path', str(tmp_path), stdout=StringIO())
+    return tmp_path, counts()
+
+
+def rewrite(path, name, change):
+    with open(path / name, encoding='utf-8', newline='') as file:
+        rows = list(csv.DictReader(file))
+    rows = change(rows)
+    with open(path / name, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCsvToSql:
+
+    def test_truncate_and_load(self, dataset):
+        path, expected = dataset
+        load(path, '--truncate')
+        assert counts() == expected
+        load(path, '--truncate')
+        assert counts() == expected, (
+            'Проверьте, что --truncate очищает таблицы перед загрузкой'
+        )
+        connection.check_constraints()
+        call_command('recalculate_rating', '--check', stdout=StringIO())
+
+    def test_load_without_truncate_fails_on_duplicates(self, dataset):
+        path, _ = dataset
+        with pytest.raises(IntegrityError):
+            load(path, '--workers', '1')
+
+    def test_batches(self, dataset):
+        from reviews.models import User
+        path, expected = dataset
+        batch_size = 4
+        table = connection.ops.quote_name(User._meta.db_table)
+        with CaptureQueriesContext(connection) as queries:
+            load(path, '--truncate', '--no-copy', '--workers', '1',
+                 '--batch-size', str(batch_size))
+        inserts = [query for query in queries.captured_queries
+                   if query['sql'].startswith(f'INSERT INTO {table}')]
+        assert len(inserts) == -(-expected[User] // batch_size), (
+            'Проверьте, что строки вставляются пачками по --batch-size'
+        )
+        assert counts() == expected
+
+    def test_resume(self, dataset):
+        from reviews.models import Comment, Review
+        path, expected = dataset
+        load(path, '--truncate')
+        # Прерванная загрузка: последние комментарии не дошли до базы
+        last = Comment.objects.order_by('-pk')[:5]
+        Comment.objects.filter(pk__in=list(
+            last.values_list('pk', flat=True))).delete()
+        review_pks = set(Review.objects.values_list('pk', flat=True))
+
+        output = load(path, '--resume')
+
+        assert counts() == expected
+        assert set(Review.objects.values_list('pk', flat=True)) == review_pks
+        assert 'reviews.Comment: 5 rows' in output, (
+            'Проверьте, что --resume загружает только недостающие строки'
+        )
+
+    def test_load_error_is_not_replaced(self, dataset, monkeypatch):
+        from reviews.management.commands import csv_to_sql
+        path, _ = dataset
+
+        def restore_fails(deferred):
+            raise DatabaseError('restore failed')
+
+        monkeypatch.setattr(csv_to_sql, 'restore_deferred', restore_fails)
+        rewrite(path, 'titles.csv',
+                lambda rows: [{**rows[0], 'year': 'не год'}, *rows[1:]])
+        stderr = StringIO()
+        with pytest.raises(ValueError):
+            call_command('csv_to_sql', '--path', str(path), '--truncate',
+                         '--workers', '1', stdout=StringIO(), stderr=stderr)
+        assert 'restore failed' in stderr.getvalue()
+
+    def test_restore_error_after_successful_load(self, dataset, monkeypatch):
+        from reviews.management.commands import csv_to_sql
+        from reviews.models import Title
+        path, expected = dataset
+
+        def restore_fails(deferred):
+            return [('CREATE INDEX broken', DatabaseError('restore failed'))]
+
+        monkeypatch.setattr(csv_to_sql, 'restore_deferred', restore_fails)
+        Title.objects.update(rating=None, rating_count=0, rating_sum=0)
+        stderr = StringIO()
+        with pytest.raises(CommandError, match='1 indexes and constraints'):
+            call_command('csv_to_sql', '--path', str(path), '--truncate',
+                         stdout=StringIO(), stderr=stderr)
+        assert 'CREATE INDEX broken: restore failed' in stderr.getvalue()
+        assert counts() == expected
+        # Последовательности и рейтинги обновлены и при ошибке индексов
+        call_command('recalculate_rating', '--check', stdout=StringIO())
+        Title.objects.create(name='Новое', year=2000)
+
+    def test_restore_keeps_successful_definitions(self, catalog):
+        from reviews.management.commands.csv_to_sql import restore_deferred
+        from reviews.models import GenresTitles, Title
+        titles = Title._meta.db_table
+        links = GenresTitles._meta.db_table
+        # Второе определение нарушают данные: у произведения два жанра
+        deferred = [
+            ('', f'CREATE UNIQUE INDEX one_genre ON {links} (title_id)'),
+            ('', f'CREATE INDEX title_year_test ON {titles} (year)'),
+        ]
+        failed = restore_deferred(deferred)
+        assert [create for create, _ in failed] == [deferred[0][1]]
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(
+                cursor, titles)
+        assert 'title_year_test' in indexes, (
+            'Проверьте, что ошибка одного определения не откатывает '
+            'остальные'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX title_year_test')
+
+    def test_restore_order(self):
+        from reviews.management.commands.csv_to_sql import restore_order
+        index = ('DROP INDEX i', 'CREATE INDEX i ON t (a)')
+        unique = ('', 'ALTER TABLE t ADD CONSTRAINT u UNIQUE (a)')
+        foreign = ('', 'ALTER TABLE t ADD CONSTRAINT f FOREIGN KEY (a) '
+                       'REFERENCES p (id)')
+        assert sorted([foreign, unique, index], key=restore_order) == [
+            index, unique, foreign]
+
+    @pytest.mark.skipif(
+        connection.vendor != 'postgresql', reason='COPY and deferred '
+        'indexes are PostgreSQL only')
+    def test_indexes_recreated(self, dataset):
+        from reviews.management.commands.csv_to_sql import (TABLES_DICT,
+                                                            deferred_indexes)
+        path, expected = dataset
+        models = list(TABLES_DICT)
+        before = sorted(create for _, create in deferred_indexes(models))
+        output = load(path, '--truncate')
+        assert f'{len(before)} indexes and constraints restored' in output
+        assert sorted(
+            create for _, create in deferred_indexes(models)) == before, (
+            'Проверьте, что индексы и ограничения пересоздаются после загрузки'
+        )
+        assert counts() == expected
+
+    @pytest.mark.skipif(
+        connection.vendor != 'postgresql', reason='deferred constraints are '
+        'PostgreSQL only')
+    def test_restored_constraint_rejects_loaded_data(self, dataset):
+        from reviews.management.commands.csv_to_sql import (
+            TABLES_DICT, deferred_indexes, restore_deferred)
+        from reviews.models import GenresTitles
+        path, _ = dataset
+        before = deferred_indexes(list(TABLES_DICT))
+        duplicate = 10 * ITEMS_COUNT
+        rewrite(path, 'genre_title.csv', lambda rows: [
+            *rows, {**rows[0], 'id': str(duplicate)}])
+        stderr = StringIO()
+        with pytest.raises(CommandError):
+            call_command('csv_to_sql', '--path', str(path), '--truncate',
+                         stdout=StringIO(), stderr=stderr)
+        assert GenresTitles.objects.filter(pk=duplicate).exists()
+        missing = set(before) - set(deferred_indexes(list(TABLES_DICT)))
+        assert [create for _, create in missing] == [
+            create for _, create in before
+            if 'unique_genre_title' in create], (
+            'Проверьте, что остальные индексы и ограничения восстановлены'
+        )
+        assert 'unique_genre_title' in stderr.getvalue()
+        GenresTitles.objects.filter(pk=duplicate).delete()
+        assert restore_deferred(missing) == []
+
+
+def assert_parents_first(order):
+    """Каждая таблица загружена после таблиц, на которые она ссылается"""
+    from django.apps import apps
+    from reviews.management.commands.csv_to_sql import (TABLES_DICT,
+                                                        table_dependencies)
+    dependencies = table_dependencies(list(TABLES_DICT))
+    position = {label: index for index, label in enumerate(order)}
+    for label in order:
+        for parent in dependencies[apps.get_model(label)]:
+            assert position[parent._meta.label] < position[label], (
+                f'Проверьте, что {label} загружается после '
+                f'{parent._meta.label}'
+            )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestParallelLoad:
+
+    def test_dependencies(self):
+        from reviews.management.commands.csv_to_sql import (TABLES_DICT,
+                                                            table_dependencies)
+        from reviews.models import (Categories, Comment, Genres, GenresTitles,
+                                    Review, Title, User)
+        dependencies = table_dependencies(list(TABLES_DICT))
+        assert dependencies[User] == set()
+        assert dependencies[Title] == {Categories}
+        assert dependencies[Review] == {Title, User}
+        assert dependencies[Comment] == {Review, User}
+        assert dependencies[GenresTitles] == {Title, Genres}
+
+    def test_scheduler_waits_for_parents(self, dataset, monkeypatch):
+        """Планировщик с пулом потоков вместо процессов.
+
+        Таблицы передаются в обратном порядке, загрузка идёт под общей
+        блокировкой (SQLite), а порядок начала загрузок записывается.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from threading import Lock
+
+        from django.db import connections
+        from reviews.management.commands import csv_to_sql
+        path, expected = dataset
+        models = list(csv_to_sql.TABLES_DICT)
+        csv_to_sql.truncate(models)
+        lock, started = Lock(), []
+        load_table = csv_to_sql.load_table
+
+        def recording(label, options):
+            with lock:
+                started.append(label)
+                try:
+                    return load_table(label, options)
+                finally:
+                    connections.close_all()
+
+        monkeypatch.setattr(csv_to_sql, 'load_table', recording)
+        command = csv_to_sql.Command()
+        command.executor_class = ThreadPoolExecutor
+        options = {'path': str(path), 'batch_size': 1000, 'resume': False,
+                   'no_copy': False}
+        timings = command.load_tables(list(reversed(models)), options, 3)
+
+        assert len(started) == len(models)
+        assert_parents_first(started)
+        assert {label: loaded for label, loaded, _ in timings} == {
+            model._meta.label: count for model, count in expected.items()}
+        assert counts() == expected
+        connection.check_constraints()
+
+    @pytest.mark.skipif(
+        connection.vendor != 'postgresql',
+        reason='parallel workers are PostgreSQL only')
+    def test_parallel_workers(self, dataset):
+        path, expected = dataset
+        output = load(path, '--truncate', '--workers', '3')
+        assert '3 worker(s)' in output
+        finished = [line.split(':')[0] for line in output.splitlines()
+                    if ' rows in ' in line]
+        assert_parents_first(finished)
+        assert counts() == expected
+        connection.check_constraints()
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+from api.authentication import access_token_for
+from rest_framework.test import APIClient
+
+from .fixtures.fixture_data import ITEMS_COUNT
+
+EXPORT = '/api/v1/titles/export/'
+
+
+def lines(response):
+    assert response.streaming, 'Проверьте, что выгрузка отдаётся потоком'
+    body = b''.join(response.streaming_content).decode()
+    return [json.loads(line) for line in body.splitlines()]
+
+
+@pytest.mark.django_db
+class TestTitlesExport:
+
+    def test_ndjson_body(self, catalog, admin_client):
+        response = admin_client.get(EXPORT)
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/x-ndjson'
+        assert 'titles.ndjson' in response['Content-Disposition']
+        titles = lines(response)
+        assert [title['id'] for title in titles] == sorted(
+            title['id'] for title in titles)
+        assert len(titles) == ITEMS_COUNT
+        first = titles[0]
+        assert set(first) == {'id', 'name', 'year', 'rating',
+                              'description', 'category', 'genre'}
+        assert first['category'] == {'name': 'Категория 0',
+                                     'slug': 'category-0'}
+        assert [genre['slug'] for genre in first['genre']] == [
+            'genre-0', 'genre-1']
+
+    def test_filters(self, catalog, admin_client):
+        titles = lines(admin_client.get(EXPORT, {'year': 2003}))
+        assert [title['year'] for title in titles] == [2003], (
+            'Проверьте, что выгрузка учитывает фильтры списка'
+        )
+        titles = lines(admin_client.get(EXPORT, {'category': 'category-1'}))
+        assert len(titles) == ITEMS_COUNT // 3
+        assert lines(admin_client.get(EXPORT, {'genre': 'genre-2'})) == []
+
+    def test_chunks(self, catalog, admin_client, monkeypatch):
+        from api import views
+        monkeypatch.setattr(views, 'EXPORT_CHUNK_SIZE', 4)
+        titles = lines(admin_client.get(EXPORT))
+        assert len(titles) == ITEMS_COUNT
+        assert all(len(title['genre']) == 2 for title in titles)
+
+    def test_admin_only(self, catalog, django_user_model):
+        assert APIClient().get(EXPORT).status_code == 401
+        user = django_user_model.objects.create(
+            username='reader', email='reader@yamdb.fake')
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {access_token_for(user)}')
+        assert client.get(EXPORT).status_code == 403, (
+            'Проверьте, что выгрузка доступна только администратору'
+        )
+
+    def test_reads_from_request_replica(self, admin_client, settings,
+                                        monkeypatch):
+        from api.views import TitlesViewSet
+        settings.DATABASE_REPLICAS = ['replica1']
+        used = []
+
+        def export_rows(queryset):
+            # Как настоящий генератор: база выбирается при чтении тела
+            used.append(queryset.db)
+            yield from ()
+
+        monkeypatch.setattr(TitlesViewSet, 'export_rows',
+                            staticmethod(export_rows))
+        response = admin_client.get(EXPORT)
+        assert lines(response) == []
+        assert used == ['replica1'], (
+            'Проверьте, что выгрузка читает с реплики, выбранной для '
+            'запроса, а не с основной базы после ответа'
+        )
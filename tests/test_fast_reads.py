@@ -0,0 +1,115 @@
+import runpy
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .fixtures.fixture_data import ITEMS_COUNT
+
+LIST_URLS = (
+    '/api/v1/titles/',
+    '/api/v1/titles/{title}/reviews/',
+    '/api/v1/titles/{title}/reviews/{review}/comments/',
+)
+
+PARAMS = (
+    {},
+    {'limit': 4, 'offset': 3},
+    {'pagination': 'cursor', 'limit': 4},
+    {'pagination': 'cursor', 'limit': 4, 'count': 'exact'},
+)
+
+
+def get_pages(path, params):
+    """Ответы всех страниц: по offset или по ссылкам next курсора"""
+    client = APIClient()
+    response = client.get(path, params)
+    pages = [response]
+    while response.status_code == 200 and response.json().get('next'):
+        response = client.get(response.json()['next'])
+        pages.append(response)
+    return pages
+
+
+@pytest.mark.django_db
+class TestFastReads:
+
+    def test_disabled_by_default(self, monkeypatch):
+        from api_yamdb import settings
+        monkeypatch.delenv('API_FAST_READS', raising=False)
+        assert runpy.run_path(settings.__file__)['API_FAST_READS'] is False, (
+            'Проверьте, что быстрый путь чтения включается только настройкой'
+        )
+
+    @pytest.fixture
+    def catalog_with_nulls(self, catalog):
+        from reviews.models import Title
+        Title.objects.create(name='Без категории ', year=1999)
+        Title.objects.filter(pk=catalog['title'].pk).update(
+            description='Описание', rating=7)
+        return catalog
+
+    @pytest.mark.parametrize('params', PARAMS)
+    @pytest.mark.parametrize('url', LIST_URLS)
+    def test_same_bytes_as_serializer(self, settings, catalog_with_nulls,
+                                      url, params):
+        path = url.format(title=catalog_with_nulls['title'].pk,
+                          review=catalog_with_nulls['review'].pk)
+        settings.API_CACHE_TIMEOUTS = {}
+        settings.API_FAST_READS = False
+        expected = get_pages(path, params)
+        settings.API_FAST_READS = True
+        pages = get_pages(path, params)
+        assert [page.content for page in pages] == [
+            page.content for page in expected], (
+            f'Проверьте, что быстрый путь `{path}` отдаёт те же байты, '
+            'что и сериализатор'
+        )
+        assert all(page.status_code == 200 for page in pages)
+
+    def test_titles_include_genres_and_null_category(self, catalog_with_nulls):
+        results = APIClient().get(
+            '/api/v1/titles/', {'limit': ITEMS_COUNT + 1}).json()['results']
+        assert len(results) == ITEMS_COUNT + 1
+        assert results[0]['genre'] == [
+            {'name': 'Жанр 0', 'slug': 'genre-0'},
+            {'name': 'Жанр 1', 'slug': 'genre-1'},
+        ]
+        assert results[0]['category'] == {
+            'name': 'Категория 0', 'slug': 'category-0'}
+        assert results[-1]['category'] is None
+        assert results[-1]['genre'] == []
+
+    @pytest.mark.parametrize('serializer_class', (
+        'TitlesSerializer', 'ReviewSerializer', 'CommentSerializer'))
+    def test_reader_is_built(self, serializer_class):
+        from api import serializers
+        from api.values import get_reader
+        serializer = getattr(serializers, serializer_class)()
+        assert get_reader(serializer) is not None
+
+    def test_stats_falls_back_to_serializer(self, catalog):
+        from api.serializers import TitlesSerializer
+        from api.values import get_reader
+        response = APIClient().get('/api/v1/titles/', {'stats': 'true'})
+        assert 'stats' in response.json()['results'][0]
+        request = Request(APIRequestFactory().get('/', {'stats': 'true'}))
+        serializer = TitlesSerializer(context={'request': request})
+        assert get_reader(serializer) is None
+
+    def test_list_queries(self, catalog, django_assert_num_queries):
+        # Страница, количество и жанры страницы
+        with django_assert_num_queries(3):
+            APIClient().get('/api/v1/titles/', {'limit': ITEMS_COUNT})
+
+
+def test_fast_renderer_matches_json_renderer():
+    from api.renderers import FastJSONRenderer
+    data = {'results': [{'text': 'Отзыв\u2028\u2029 "\\', 'score': 10,
+                         'rating': None, 'genre': []}], 'next': None}
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+    assert FastJSONRenderer().render(
+        data, 'application/json; indent=4') == JSONRenderer().render(
+        data, 'application/json; indent=4')
+    assert FastJSONRenderer().render(None) == b''
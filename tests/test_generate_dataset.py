@@ -0,0 +1,70 @@
+import csv
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+pytest.importorskip('numpy')
+
+SCALE = ('--users', '50', '--titles', '300', '--reviews', '3000',
+         '--comments', '2000', '--chunk-size', '700')
+
+
+def read(path, name):
+    with open(path / name, encoding='utf-8', newline='') as file:
+        return list(csv.DictReader(file))
+
+
+def generate(path, *args):
+    call_command('generate_dataset', '--path', str(path), *SCALE, *args,
+                 stdout=StringIO())
+
+
+class TestGenerateDataset:
+
+    def test_csv_files(self, tmp_path):
+        generate(tmp_path)
+        reviews = read(tmp_path, 'review.csv')
+        assert len(reviews) == 3000
+        assert len({(row['title_id'], row['author_id'])
+                    for row in reviews}) == 3000, (
+            'Проверьте, что автор оставляет один отзыв на произведение'
+        )
+        assert {int(row['score']) for row in reviews} <= set(range(1, 11))
+        per_title = sorted(
+            (sum(row['title_id'] == str(pk) for row in reviews)
+             for pk in range(1, 301)), reverse=True)
+        assert per_title[0] > 5 * per_title[150], (
+            'Проверьте, что популярность произведений неравномерная'
+        )
+        links = read(tmp_path, 'genre_title.csv')
+        assert len({(row['title_id'], row['genre_id'])
+                    for row in links}) == len(links)
+        review_ids = {row['id'] for row in reviews}
+        assert all(row['review_id'] in review_ids
+                   for row in read(tmp_path, 'comments.csv'))
+
+    def test_seed_reproducible(self, tmp_path):
+        generate(tmp_path / 'first')
+        generate(tmp_path / 'second')
+        generate(tmp_path / 'other', '--seed', '1')
+        for name in ('users.csv', 'titles.csv', 'genre_title.csv'):
+            assert read(tmp_path / 'first', name) == read(
+                tmp_path / 'second', name)
+        assert read(tmp_path / 'first', 'titles.csv') != read(
+            tmp_path / 'other', 'titles.csv')
+
+    def test_too_many_reviews(self, tmp_path):
+        with pytest.raises(CommandError):
+            call_command('generate_dataset', '--path', str(tmp_path),
+                         '--users', '2', '--titles', '2', '--reviews', '5')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_load(self):
+        from reviews.models import Comment, Review, Title
+
+        call_command('generate_dataset', '--load', *SCALE, stdout=StringIO())
+        assert Title.objects.count() == 300
+        assert Review.objects.count() == 3000
+        assert Comment.objects.exists()
+        call_command('recalculate_rating', '--check', stdout=StringIO())
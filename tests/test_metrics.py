@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+
+import pytest
+from api.authentication import access_token_for
+from rest_framework.test import APIClient
+
+REQUESTS_LINE = (
+    'yamdb_http_requests_total{route="title-list",method="GET",'
+    'status="200"} '
+)
+
+
+def metric_value(text, prefix):
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return 0
+
+
+@pytest.fixture
+def registry():
+    from api.metrics import registry
+    registry.clear()
+    return registry
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_server_timing_header(self, catalog, registry):
+        response = APIClient().get('/api/v1/titles/')
+        timing = response['Server-Timing']
+        assert timing.startswith('db;dur='), (
+            'Проверьте, что ответ содержит заголовок Server-Timing'
+        )
+        assert 'queries"' in timing and 'serializer;dur=' in timing
+
+    def test_metrics_endpoint(self, catalog, registry, admin_client):
+        for _ in range(2):
+            APIClient().get('/api/v1/titles/')
+        response = admin_client.get('/metrics')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        assert metric_value(text, REQUESTS_LINE) == 2, (
+            'Проверьте, что /metrics считает запросы по маршрутам'
+        )
+        assert '# TYPE yamdb_http_request_duration_seconds histogram' in text
+        assert metric_value(
+            text, 'yamdb_db_queries_per_request_count'
+                  '{route="title-list",method="GET"} ') == 2
+
+    def test_metrics_admin_only(self, django_user_model):
+        user = django_user_model.objects.create(
+            username='TestUser', email='user@yamdb.fake')
+        client = APIClient()
+        assert client.get('/metrics').status_code == 401
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {access_token_for(user)}')
+        assert client.get('/metrics').status_code == 403
+
+    def test_workers_aggregated(self, catalog, registry, admin_client,
+                                settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        other_worker = {
+            'counters': [['yamdb_http_requests_total',
+                          [['route', 'title-list'], ['method', 'GET'],
+                           ['status', 200]], 5]],
+            'histograms': [],
+        }
+        # Живой процесс, но не этот воркер
+        (tmp_path / f'{os.getppid()}.json').write_text(
+            json.dumps(other_worker))
+        APIClient().get('/api/v1/titles/')
+        text = admin_client.get('/metrics').content.decode()
+        assert metric_value(text, REQUESTS_LINE) == 6, (
+            'Проверьте, что /metrics суммирует счётчики всех воркеров'
+        )
+
+    def test_slow_query_logged(self, catalog, registry, settings, caplog):
+        settings.SLOW_QUERY_MS = 0
+        with caplog.at_level(logging.WARNING, logger='api.metrics'):
+            APIClient().get('/api/v1/titles/')
+        assert any(
+            record.getMessage().startswith('Slow query')
+            for record in caplog.records
+        ), 'Проверьте, что медленные запросы пишутся в журнал'
+
+    def test_dead_workers_pruned(self, catalog, registry, admin_client,
+                                 settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        worker = subprocess.Popen([sys.executable, '-c', ''])
+        worker.wait()
+        dead = tmp_path / f'{worker.pid}.json'
+        dead.write_text(json.dumps({
+            'counters': [['yamdb_http_requests_total',
+                          [['route', 'title-list'], ['method', 'GET'],
+                           ['status', 200]], 5]],
+            'histograms': [],
+        }))
+        APIClient().get('/api/v1/titles/')
+        text = admin_client.get('/metrics').content.decode()
+        assert metric_value(text, REQUESTS_LINE) == 1
+        assert not dead.exists(), (
+            'Проверьте, что /metrics удаляет файлы завершившихся воркеров'
+        )
+        assert (tmp_path / f'{os.getpid()}.json').exists()
+
+    @pytest.mark.parametrize('fast_reads', (True, False))
+    @pytest.mark.parametrize('route,path', (
+        ('title-list', '/api/v1/titles/'),
+        ('title-detail', '/api/v1/titles/{pk}/'),
+        ('reviews-list', '/api/v1/titles/{pk}/reviews/'),
+    ))
+    def test_serializer_time(self, catalog, registry, admin_client, settings,
+                             route, path, fast_reads):
+        settings.API_FAST_READS = fast_reads
+        APIClient().get(path.format(pk=catalog['title'].pk))
+        text = admin_client.get('/metrics').content.decode()
+        labels = f'{{route="{route}",method="GET"}} '
+        assert metric_value(
+            text, f'yamdb_serializer_duration_seconds_total{labels}') > 0, (
+            'Проверьте, что время сериализации ответа попадает в метрики'
+        )
+        assert metric_value(
+            text, f'yamdb_serializer_db_queries_total{labels}') == 0, (
+            'Проверьте, что чтение страницы не считается запросами '
+            'сериализатора'
+        )
+
+    def test_serializers_are_not_instrumented(self):
+        from api import serializers
+        from rest_framework.serializers import ModelSerializer
+        assert serializers.ModelSerializer is ModelSerializer
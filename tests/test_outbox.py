@@ -0,0 +1,87 @@
+import os
+from io import StringIO
+from smtplib import SMTPException
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+from reviews.models import EMAIL_FAILED, EMAIL_PENDING, EMAIL_SENT, EmailOutbox
+
+
+class FailingBackend(EmailBackend):
+    """Почтовый бэкенд, отклоняющий письма на адреса fail@..."""
+
+    def send_messages(self, messages):
+        if any(message.to[0].startswith('fail@') for message in messages):
+            raise SMTPException('Сервер недоступен')
+        return super().send_messages(messages)
+
+
+def signup(username):
+    return APIClient().post(
+        '/api/v1/auth/signup/',
+        {'username': username, 'email': f'{username}@yamdb.fake'})
+
+
+@pytest.mark.django_db
+class TestEmailOutbox:
+
+    def test_signup_queues_email(self):
+        response = signup('queued')
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что регистрация не отправляет письмо в запросе'
+        )
+        email = EmailOutbox.objects.get()
+        assert email.to == 'queued@yamdb.fake'
+        assert email.status == EMAIL_PENDING
+
+    def test_worker_sends_queued_emails(self):
+        for number in range(3):
+            signup(f'user{number}')
+        call_command('send_emails', stdout=StringIO())
+        assert len(mail.outbox) == 3
+        assert set(EmailOutbox.objects.values_list(
+            'status', flat=True)) == {EMAIL_SENT}
+
+    def test_worker_reuses_connection(self, settings, tmp_path):
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.filebased.EmailBackend')
+        settings.EMAIL_FILE_PATH = str(tmp_path)
+        for number in range(3):
+            signup(f'user{number}')
+        call_command('send_emails', stdout=StringIO())
+        files = os.listdir(tmp_path)
+        assert len(files) == 1, (
+            'Проверьте, что пачка писем отправляется через одно соединение'
+        )
+        with open(tmp_path / files[0]) as sent:
+            assert sent.read().count('Ваш код подтверждения:') == 3
+
+    def test_failed_email_retried_with_backoff(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_outbox.FailingBackend'
+        signup('fail')
+        signup('ok')
+        call_command('send_emails', '--backoff', '60',
+                     stdout=StringIO())
+        failed = EmailOutbox.objects.get(to='fail@yamdb.fake')
+        assert failed.status == EMAIL_PENDING
+        assert failed.attempts == 1
+        assert failed.send_after > timezone.now()
+        assert failed.last_error
+        assert EmailOutbox.objects.get(to='ok@yamdb.fake').status == (
+            EMAIL_SENT)
+
+    def test_email_failed_after_max_attempts(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_outbox.FailingBackend'
+        signup('fail')
+        for _ in range(2):
+            EmailOutbox.objects.update(send_after=timezone.now())
+            call_command('send_emails', '--max-attempts', '2',
+                         stdout=StringIO())
+        email = EmailOutbox.objects.get()
+        assert email.status == EMAIL_FAILED
+        assert email.attempts == 2
@@ -0,0 +1,166 @@
+import json
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+
+import pytest
+from rest_framework.test import APIClient
+
+from .fixtures.fixture_data import ITEMS_COUNT
+
+LIMIT = 4
+
+
+def get(path, params=None):
+    response = APIClient().get(path, params)
+    assert response.status_code == 200, response.content
+    return response.json()
+
+
+def ids(page):
+    return [item['id'] for item in page['results']]
+
+
+def cursor(position, reverse=False):
+    data = json.dumps({'p': position, 'r': int(reverse)})
+    return urlsafe_b64encode(data.encode('ascii')).decode('ascii')
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    @pytest.fixture
+    def reviews_path(self, catalog):
+        return f'/api/v1/titles/{catalog["title"].pk}/reviews/'
+
+    def test_next_and_previous_links(self, catalog):
+        expected = ids(get('/api/v1/titles/', {'limit': ITEMS_COUNT}))
+        page = get('/api/v1/titles/', {'pagination': 'cursor',
+                                       'limit': LIMIT})
+        assert page['previous'] is None
+        assert 'count' not in page, (
+            'Проверьте, что в режиме курсора количество не считается '
+            'без ?count='
+        )
+        pages = [page]
+        while page['next']:
+            page = get(page['next'])
+            pages.append(page)
+        assert sum((ids(page) for page in pages), []) == expected
+        assert len(pages) == -(-ITEMS_COUNT // LIMIT)
+
+        page = pages[-1]
+        backwards = [ids(page)]
+        while page['previous']:
+            page = get(page['previous'])
+            backwards.append(ids(page))
+        assert backwards[::-1] == [ids(page) for page in pages], (
+            'Проверьте, что ссылки previous возвращают те же страницы'
+        )
+
+    def test_cursor_stable_under_inserts(self, catalog, reviews_path,
+                                         django_user_model):
+        from reviews.models import Review
+        first = get(reviews_path, {'pagination': 'cursor', 'limit': LIMIT})
+        second = get(first['next'])
+
+        # Новый отзыв встаёт перед первой страницей в порядке (pub_date, id)
+        author = django_user_model.objects.create(
+            username='latecomer', email='latecomer@yamdb.fake')
+        review = Review.objects.create(
+            title=catalog['title'], author=author, text='Отзыв', score=5)
+        earliest = Review.objects.order_by('pub_date').first().pub_date
+        Review.objects.filter(pk=review.pk).update(
+            pub_date=earliest - timedelta(days=1))
+
+        assert ids(get(first['next'])) == ids(second), (
+            'Проверьте, что страница по курсору не сдвигается после вставки'
+        )
+        assert ids(get(second['previous'])) == ids(first)
+        assert ids(get(reviews_path, {'pagination': 'cursor',
+                                      'limit': LIMIT}))[0] == review.pk
+
+    @pytest.mark.parametrize('fast_reads', (True, False))
+    @pytest.mark.parametrize('ordering', (
+        '-rating', 'rating', '-review_count,year', '-name'))
+    def test_cursor_follows_ordering(self, catalog, settings, ordering,
+                                     fast_reads):
+        from reviews.models import Title
+        settings.API_FAST_READS = fast_reads
+        # Повторы и NULL попадают на границы страниц по 3
+        pks = list(Title.objects.order_by('pk').values_list('pk', flat=True))
+        for pk, rating in zip(pks, (7, 3, 7, 10, 7, 3, 1)):
+            Title.objects.filter(pk=pk).update(rating=rating)
+        expected = ids(get('/api/v1/titles/', {'limit': ITEMS_COUNT,
+                                               'ordering': ordering}))
+
+        page = get('/api/v1/titles/', {'pagination': 'cursor', 'limit': 3,
+                                       'ordering': ordering})
+        pages = [page]
+        while page['next']:
+            page = get(page['next'])
+            pages.append(page)
+        assert sum((ids(page) for page in pages), []) == expected, (
+            'Проверьте, что курсор идёт в порядке ?ordering'
+        )
+        backwards = []
+        while page['previous']:
+            page = get(page['previous'])
+            backwards.append(ids(page))
+        assert backwards[::-1] == [ids(page) for page in pages[:-1]]
+
+    def test_rating_cursor_with_null(self, catalog):
+        response = APIClient().get('/api/v1/titles/', {
+            'ordering': '-rating', 'cursor': cursor([None, '1'])})
+        assert response.status_code == 200
+        response = APIClient().get('/api/v1/titles/', {
+            'ordering': '-rating', 'cursor': cursor(['5', None])})
+        assert response.status_code == 404, (
+            'Проверьте, что NULL в курсоре допустим только для nullable-поля'
+        )
+
+    @pytest.mark.parametrize('mode', ('exact', 'estimate'))
+    def test_count(self, catalog, reviews_path, mode):
+        page = get(reviews_path, {'pagination': 'cursor', 'limit': LIMIT,
+                                  'count': mode})
+        if mode == 'exact':
+            assert page['count'] == ITEMS_COUNT
+        else:
+            # Вне PostgreSQL оценка совпадает с count()
+            assert isinstance(page['count'], int)
+            assert page['count'] >= 0
+        assert get(page['next'])['count'] == page['count']
+
+    def test_estimate_count_falls_back_to_count(self, catalog):
+        from api.pagination import estimate_count
+        from django.db import connection
+        from reviews.models import Review
+        queryset = Review.objects.filter(title=catalog['title'])
+        if connection.vendor != 'postgresql':
+            assert estimate_count(queryset) == ITEMS_COUNT
+        else:
+            assert estimate_count(queryset) >= 0
+
+    def test_offset_pagination_unchanged(self, catalog):
+        page = get('/api/v1/titles/', {'limit': LIMIT, 'offset': LIMIT})
+        assert page['count'] == ITEMS_COUNT
+        assert len(page['results']) == LIMIT
+        assert 'offset=8' in page['next']
+        assert page['previous'] is not None
+
+    @pytest.mark.parametrize('value', (
+        'garbage',
+        cursor(['1', '2']),
+        cursor(['not-a-number']),
+        urlsafe_b64encode(b'{"r": 0}').decode('ascii'),
+        urlsafe_b64encode(b'[1]').decode('ascii'),
+    ))
+    def test_tampered_cursor(self, catalog, value):
+        response = APIClient().get('/api/v1/titles/', {'cursor': value})
+        assert response.status_code == 404, (
+            'Проверьте, что испорченный курсор возвращает 404'
+        )
+
+    def test_tampered_review_cursor(self, catalog, reviews_path):
+        response = APIClient().get(
+            reviews_path, {'cursor': cursor(['yesterday', '1'])})
+        assert response.status_code == 404
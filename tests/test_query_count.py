@@ -0,0 +1,117 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .fixtures.fixture_data import ITEMS_COUNT
+
+# Запросы, которые может сделать POST отзыва или комментария: одна
+# проверка родителя и одна вставка (плюс пересчёт рейтинга для отзыва).
+WRITE_QUERIES = {'SELECT': 1, 'INSERT': 1}
+
+# Максимальное число SQL-запросов на страницу списка: оно не должно
+# зависеть от количества объектов на странице.
+ENDPOINT_MAX_QUERIES = {
+    '/api/v1/titles/': 3,
+    '/api/v1/titles/{title}/reviews/': 2,
+    '/api/v1/titles/{title}/reviews/{review}/comments/': 2,
+    '/api/v1/categories/': 2,
+    '/api/v1/genres/': 2,
+}
+
+
+@pytest.mark.django_db
+class TestQueryCount:
+
+    @pytest.mark.parametrize('url', ENDPOINT_MAX_QUERIES)
+    def test_list_query_count(self, catalog, django_assert_max_num_queries,
+                              url):
+        client = APIClient()
+        path = url.format(
+            title=catalog['title'].pk, review=catalog['review'].pk)
+        for limit in (1, ITEMS_COUNT):
+            with django_assert_max_num_queries(ENDPOINT_MAX_QUERIES[url]):
+                response = client.get(path, {'limit': limit})
+            assert response.status_code == 200, (
+                f'Проверьте, что GET-запрос к `{path}` возвращает статус 200'
+            )
+
+    def test_title_detail_query_count(self, catalog,
+                                      django_assert_max_num_queries):
+        client = APIClient()
+        path = f'/api/v1/titles/{catalog["title"].pk}/'
+        with django_assert_max_num_queries(2):
+            response = client.get(path)
+        assert response.status_code == 200
+        assert len(response.json()['genre']) == 2, (
+            f'Проверьте, что `{path}` возвращает жанры произведения'
+        )
+
+    def test_users_query_count(self, catalog, admin_client,
+                               django_assert_max_num_queries):
+        for limit in (1, ITEMS_COUNT):
+            with django_assert_max_num_queries(3):
+                response = admin_client.get(
+                    '/api/v1/users/', {'limit': limit})
+            assert response.status_code == 200
+
+
+def count_statements(queries):
+    counts = {}
+    for query in queries:
+        statement = query['sql'].split(None, 1)[0].upper()
+        counts[statement] = counts.get(statement, 0) + 1
+    return counts
+
+
+@pytest.mark.django_db
+class TestWriteQueryCount:
+
+    def post(self, client, path, data):
+        client.get(path)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(path, data)
+        return response, count_statements(queries)
+
+    def test_review_create_query_count(self, catalog, admin_client):
+        title = catalog['title']
+        path = f'/api/v1/titles/{title.pk}/reviews/'
+        response, counts = self.post(
+            admin_client, path, {'text': 'Отзыв', 'score': 7})
+        assert response.status_code == 201
+        for statement, limit in WRITE_QUERIES.items():
+            assert counts.get(statement, 0) <= limit, (
+                f'Проверьте, что создание отзыва делает не больше {limit} '
+                f'запросов {statement}: {counts}'
+            )
+        assert counts.get('UPDATE', 0) <= 1
+
+    def test_duplicate_review(self, catalog, admin_client):
+        path = f'/api/v1/titles/{catalog["title"].pk}/reviews/'
+        admin_client.post(path, {'text': 'Отзыв', 'score': 7})
+        response, counts = self.post(
+            admin_client, path, {'text': 'Ещё отзыв', 'score': 3})
+        assert response.status_code == 400
+        assert response.json() == {
+            'non_field_errors': ['Вы уже оставили Ваш отзыв!']}
+        catalog['title'].refresh_from_db()
+        assert catalog['title'].rating_count == ITEMS_COUNT + 1
+
+    def test_comment_create_query_count(self, catalog, admin_client):
+        path = (f'/api/v1/titles/{catalog["title"].pk}/reviews/'
+                f'{catalog["review"].pk}/comments/')
+        response, counts = self.post(
+            admin_client, path, {'text': 'Комментарий'})
+        assert response.status_code == 201
+        assert response.json()['author'] == 'TestAdmin'
+        for statement, limit in WRITE_QUERIES.items():
+            assert counts.get(statement, 0) <= limit, (
+                f'Проверьте, что создание комментария делает не больше '
+                f'{limit} запросов {statement}: {counts}'
+            )
+
+    def test_comment_on_missing_review(self, catalog, admin_client):
+        path = (f'/api/v1/titles/{catalog["title"].pk + 1}/reviews/'
+                f'{catalog["review"].pk}/comments/')
+        response = admin_client.post(path, {'text': 'Комментарий'})
+        assert response.status_code == 404
@@ -0,0 +1,115 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+TITLES_COUNT = 2000
+GENRES_COUNT = 50
+CATEGORIES_COUNT = 20
+USERS_COUNT = 50
+COMMENTS_PER_REVIEW = 2
+
+# Большие таблицы: их полный просмотр означает, что для запроса
+# эндпоинта не нашлось индекса
+LARGE_TABLES = ('reviews_title', 'reviews_genrestitles', 'reviews_review',
+                'reviews_comment')
+
+ENDPOINTS = (
+    '/api/v1/titles/{title}/',
+    '/api/v1/titles/?year=2001',
+    '/api/v1/titles/?category=category-1',
+    '/api/v1/titles/?genre=genre-1',
+    '/api/v1/titles/?genre=genre-1&category=category-1&year=2001',
+    '/api/v1/titles/?pagination=cursor&category=category-1',
+    '/api/v1/titles/{title}/reviews/',
+    '/api/v1/titles/{title}/reviews/?pagination=cursor',
+    '/api/v1/titles/{title}/reviews/{review}/',
+    '/api/v1/titles/{title}/reviews/{review}/comments/',
+    '/api/v1/titles/{title}/reviews/{review}/comments/?pagination=cursor',
+)
+
+
+@pytest.fixture
+def large_catalog(django_user_model):
+    from reviews.models import (Categories, Comment, Genres, GenresTitles,
+                                Review, Title)
+
+    Categories.objects.bulk_create(
+        Categories(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(CATEGORIES_COUNT))
+    Genres.objects.bulk_create(
+        Genres(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(GENRES_COUNT))
+    categories = list(Categories.objects.values_list('pk', flat=True))
+    genres = list(Genres.objects.values_list('pk', flat=True))
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {i}', year=1950 + i % 70,
+              category_id=categories[i % CATEGORIES_COUNT])
+        for i in range(TITLES_COUNT))
+    titles = list(Title.objects.values_list('pk', flat=True))
+    GenresTitles.objects.bulk_create(
+        GenresTitles(title_id=title,
+                     genre_id=genres[(i + shift) % GENRES_COUNT])
+        for i, title in enumerate(titles) for shift in (0, 7))
+    django_user_model.objects.bulk_create(
+        django_user_model(username=f'user{i}', email=f'user{i}@yamdb.fake')
+        for i in range(USERS_COUNT))
+    users = list(django_user_model.objects.values_list('pk', flat=True))
+    Review.objects.bulk_create(
+        Review(title_id=title, author_id=user, text='Отзыв', score=5)
+        for title in titles[::10] for user in users)
+    reviews = list(Review.objects.values_list('pk', flat=True))
+    Comment.objects.bulk_create(
+        Comment(review_id=review, author_id=users[0], text='Комментарий')
+        for review in reviews for _ in range(COMMENTS_PER_REVIEW))
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    review = Review.objects.filter(title_id=titles[0]).first()
+    return {'title': titles[0], 'review': review.pk}
+
+
+def full_scans(sql):
+    """Большие таблицы, которые план запроса читает целиком"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # Проверяется, что у запроса есть индексный план; на
+            # небольшой тестовой базе планировщик и так мог бы выбрать
+            # последовательное чтение
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+            cursor.execute('SET LOCAL enable_seqscan = on')
+            return set(re.findall(r'Seq Scan on (\w+)', plan)) & set(
+                LARGE_TABLES)
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        plan = [row[-1] for row in cursor.fetchall()]
+    return {
+        match.group(2) for match in (
+            re.match(r'SCAN (TABLE )?(\w+)', detail) for detail in plan)
+        if match and match.group(2) in LARGE_TABLES
+    }
+
+
+@pytest.mark.django_db
+def test_endpoint_queries_use_indexes(large_catalog):
+    client = APIClient()
+    scans = {}
+    for url in ENDPOINTS:
+        path = url.format(**large_catalog)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(path)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{path}` возвращает статус 200'
+        )
+        for query in context.captured_queries:
+            if query['sql'].startswith('SELECT'):
+                tables = full_scans(query['sql'])
+                if tables:
+                    scans[path] = (tables, query['sql'])
+    assert not scans, (
+        'Запросы эндпоинтов читают большие таблицы целиком: '
+        + '; '.join(f'{path} - {", ".join(sorted(tables))}: {sql}'
+                    for path, (tables, sql) in scans.items())
+    )
@@ -0,0 +1,141 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+def stored(title):
+    title.refresh_from_db()
+    return title.rating_sum, title.rating_count, title.rating
+
+
+def check_rating():
+    call_command('recalculate_rating', '--check', stdout=StringIO())
+
+
+@pytest.mark.django_db
+class TestStoredRating:
+
+    @pytest.fixture
+    def title(self):
+        from reviews.models import Title
+        return Title.objects.create(name='Произведение', year=2000)
+
+    @pytest.fixture
+    def authors(self, django_user_model):
+        return [
+            django_user_model.objects.create(
+                username=f'critic{i}', email=f'critic{i}@yamdb.fake')
+            for i in range(3)
+        ]
+
+    def review(self, title, author, score):
+        from reviews.models import Review
+        return Review.objects.create(
+            title=title, author=author, text='Отзыв', score=score)
+
+    def test_create(self, title, authors):
+        assert stored(title) == (0, 0, None)
+        self.review(title, authors[0], 7)
+        assert stored(title) == (7, 1, 7)
+        self.review(title, authors[1], 4)
+        assert stored(title) == (11, 2, 5), (
+            'Проверьте, что рейтинг округляется вниз, как Avg по отзывам'
+        )
+        check_rating()
+
+    def test_change_score(self, title, authors):
+        from reviews.models import Review
+        review = self.review(title, authors[0], 7)
+        self.review(title, authors[1], 3)
+        review.score = 9
+        review.save()
+        assert stored(title) == (12, 2, 6)
+        # Отзыв из базы и отзыв, собранный без чтения, дают тот же итог
+        review = Review.objects.get(pk=review.pk)
+        review.score = 1
+        review.save()
+        assert stored(title) == (4, 2, 2)
+        Review(pk=review.pk, title=title, author=authors[0], text='Отзыв',
+               score=5, pub_date=review.pub_date).save()
+        assert stored(title) == (8, 2, 4)
+        review.save(update_fields=['text'])
+        check_rating()
+
+    def test_move_to_other_title(self, title, authors):
+        from reviews.models import Title
+        other = Title.objects.create(name='Другое', year=2001)
+        review = self.review(title, authors[0], 8)
+        review.title = other
+        review.save()
+        assert stored(title) == (0, 0, None)
+        assert stored(other) == (8, 1, 8)
+        check_rating()
+
+    def test_delete(self, title, authors):
+        from reviews.models import Review
+        first = self.review(title, authors[0], 8)
+        self.review(title, authors[1], 2)
+        first.delete()
+        assert stored(title) == (2, 1, 2)
+        Review.objects.filter(title=title).delete()
+        assert stored(title) == (0, 0, None), (
+            'Проверьте, что последний удалённый отзыв обнуляет рейтинг'
+        )
+        check_rating()
+
+    def test_author_cascade(self, title, authors):
+        from reviews.models import Title
+        other = Title.objects.create(name='Другое', year=2001)
+        self.review(title, authors[0], 10)
+        self.review(other, authors[0], 6)
+        self.review(title, authors[1], 4)
+        authors[0].delete()
+        assert stored(title) == (4, 1, 4), (
+            'Проверьте, что каскадное удаление автора пересчитывает рейтинг'
+        )
+        assert stored(other) == (0, 0, None)
+        check_rating()
+
+    def test_title_cascade(self, title, authors):
+        from reviews.models import Review, Title
+        other = Title.objects.create(name='Другое', year=2001)
+        self.review(title, authors[0], 10)
+        self.review(other, authors[0], 6)
+        title.delete()
+        assert not Review.objects.filter(title_id=title.pk).exists()
+        assert stored(other) == (6, 1, 6)
+        assert not Title.objects.filter(pk=title.pk).exists()
+        check_rating()
+
+    def test_api_review(self, title, authors):
+        from api.authentication import access_token_for
+        from rest_framework.test import APIClient
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {access_token_for(authors[0])}')
+        path = f'/api/v1/titles/{title.pk}/reviews/'
+        response = client.post(path, {'text': 'Отзыв', 'score': 6})
+        assert response.status_code == 201
+        assert stored(title) == (6, 1, 6)
+        review = f'{path}{response.json()["id"]}/'
+        assert client.patch(review, {'score': 2}).status_code == 200
+        assert stored(title) == (2, 1, 2)
+        assert client.delete(review).status_code == 204
+        assert stored(title) == (0, 0, None)
+
+    def test_check_reports_drift(self, title, authors):
+        from reviews.models import Title
+        self.review(title, authors[0], 8)
+        Title.objects.filter(pk=title.pk).update(
+            rating_sum=3, rating_count=1, rating=3)
+        stdout = StringIO()
+        with pytest.raises(CommandError, match='1 titles'):
+            call_command('recalculate_rating', '--check', stdout=stdout)
+        assert f'title {title.pk}: stored 3/1' in stdout.getvalue(), (
+            'Проверьте, что --check выводит разошедшиеся произведения'
+        )
+        assert 'actual 8/1' in stdout.getvalue()
+        call_command('recalculate_rating', stdout=StringIO())
+        assert stored(title) == (8, 1, 8)
+        check_rating()
@@ -0,0 +1,60 @@
+import pytest
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica1']
+    settings.DB_PRIMARY_STICKY_SECONDS = 10
+
+
+def call(method, status=200, **headers):
+    from api.replicas import ReplicaMiddleware
+    from reviews.models import Title
+
+    used = []
+
+    def view(request):
+        used.append(router.db_for_read(Title))
+        return HttpResponse(status=status)
+
+    request = getattr(RequestFactory(), method)('/api/v1/titles/', **headers)
+    ReplicaMiddleware(view)(request)
+    return used[0]
+
+
+class TestReplicaRouting:
+
+    def test_safe_methods_read_from_replica(self, replicas):
+        assert call('get') == 'replica1', (
+            'Проверьте, что GET-запросы читают с реплики'
+        )
+        assert call('head') == 'replica1'
+        assert call('post', status=201) == 'default', (
+            'Проверьте, что небезопасные запросы работают с основной базой'
+        )
+
+    def test_outside_request_uses_primary(self, replicas):
+        from reviews.models import Title
+        call('get')
+        assert router.db_for_read(Title) == 'default'
+        assert router.db_for_write(Title) == 'default'
+
+    def test_no_replicas(self, settings):
+        settings.DATABASE_REPLICAS = []
+        assert call('get') == 'default'
+
+    def test_reads_stick_to_primary_after_write(self, replicas):
+        writer = {'HTTP_AUTHORIZATION': 'Bearer writer'}
+        call('post', status=201, **writer)
+        assert call('get', **writer) == 'default', (
+            'Проверьте, что после записи клиент читает с основной базы'
+        )
+        assert call('get', HTTP_AUTHORIZATION='Bearer other') == 'replica1'
+
+    def test_failed_write_does_not_stick(self, replicas):
+        writer = {'HTTP_AUTHORIZATION': 'Bearer writer'}
+        call('post', status=400, **writer)
+        assert call('get', **writer) == 'replica1'
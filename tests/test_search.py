@@ -0,0 +1,77 @@
+import pytest
+from rest_framework.test import APIClient
+
+
+def search(params, status=200):
+    response = APIClient().get('/api/v1/search/', params)
+    assert response.status_code == status, (
+        f'Проверьте, что поиск с {params} возвращает код {status}'
+    )
+    return response.json()
+
+
+@pytest.fixture
+def corpus(django_user_model):
+    from reviews.models import Comment, Review, Title
+    author = django_user_model.objects.create(
+        username='reader', email='reader@yamdb.fake')
+    title = Title.objects.create(
+        name='Дракон', year=2000, description='Сказка про золотой замок')
+    other = Title.objects.create(name='Замок', year=2001)
+    review = Review.objects.create(
+        title=other, author=author, text='Дракон здесь лишний', score=5)
+    comment = Comment.objects.create(
+        review=review, author=author, text='Согласен, дракон лишний')
+    return {'title': title, 'other': other, 'review': review,
+            'comment': comment}
+
+
+@pytest.mark.django_db
+class TestSearch:
+
+    def test_ranked_results(self, corpus):
+        results = search({'q': 'дракон'})['results']
+        assert [(result['type'], result['id']) for result in results] == [
+            ('title', corpus['title'].pk),
+            ('review', corpus['review'].pk),
+            ('comment', corpus['comment'].pk),
+        ], 'Проверьте, что совпадение в названии ранжируется выше'
+        assert results[2]['title_id'] == corpus['other'].pk
+        assert results[2]['review_id'] == corpus['review'].pk
+        assert results[0]['rank'] > results[1]['rank'] > results[2]['rank']
+
+    def test_all_words_required(self, corpus):
+        results = search({'q': 'золотой замок'})['results']
+        assert [result['id'] for result in results] == [corpus['title'].pk]
+
+    def test_type_filter_and_pages(self, corpus):
+        data = search({'q': 'дракон', 'type': 'review,comment', 'limit': 1})
+        assert [result['type'] for result in data['results']] == ['review']
+        assert data['previous'] is None and 'offset=1' in data['next']
+        data = search(
+            {'q': 'дракон', 'type': 'review,comment', 'limit': 1,
+             'offset': 1})
+        assert [result['type'] for result in data['results']] == ['comment']
+        assert data['next'] is None and data['previous']
+
+    def test_bad_params(self, corpus):
+        search({}, status=400)
+        search({'q': 'дракон', 'type': 'genre'}, status=400)
+        search({'q': 'дракон', 'limit': 1000}, status=400)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_index_follows_changes(corpus):
+    from reviews.models import Review
+    assert not search({'q': 'единорог'})['results']
+    review = Review.objects.create(
+        title=corpus['title'], author=corpus['review'].author,
+        text='Лучше бы единорог', score=7)
+    results = search({'q': 'единорог'})['results']
+    assert [(result['type'], result['id']) for result in results] == [
+        ('review', review.pk)]
+    corpus['other'].delete()
+    results = search({'q': 'дракон'})['results']
+    assert [result['id'] for result in results] == [corpus['title'].pk], (
+        'Проверьте, что удалённые отзывы и комментарии пропадают из поиска'
+    )
@@ -0,0 +1,132 @@
+import csv
+import gzip
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from .fixtures.fixture_data import ITEMS_COUNT
+
+FILES = ('users', 'category', 'genre', 'titles', 'review', 'comments',
+         'genre_title')
+
+
+def export(path, *args):
+    call_command('sql_to_csv', '--path', str(path), *args,
+                 stdout=StringIO())
+
+
+def read_csv(file):
+    return list(csv.DictReader(file))
+
+
+def read_ndjson(file):
+    return [json.loads(line) for line in file]
+
+
+def table_rows(model):
+    from reviews.management.commands.sql_to_csv import export_fields
+    attnames = [field.attname for field in export_fields(model)]
+    return list(model.objects.order_by('pk').values_list(*attnames))
+
+
+@pytest.mark.django_db
+class TestSqlToCsv:
+
+    def test_csv(self, catalog, tmp_path):
+        from reviews.models import Review
+        export(tmp_path)
+        assert {path.name for path in tmp_path.iterdir()} == {
+            f'{name}.csv' for name in FILES}
+        with open(tmp_path / 'review.csv', encoding='utf-8',
+                  newline='') as file:
+            reviews = read_csv(file)
+        assert len(reviews) == ITEMS_COUNT
+        review = Review.objects.order_by('pk').first()
+        assert reviews[0]['id'] == str(review.pk)
+        assert reviews[0]['title_id'] == str(review.title_id)
+        assert reviews[0]['pub_date'] == review.pub_date.isoformat()
+        with open(tmp_path / 'titles.csv', encoding='utf-8',
+                  newline='') as file:
+            titles = read_csv(file)
+        assert titles[0]['description'] == '', (
+            'Проверьте, что NULL выгружается пустой строкой'
+        )
+
+    def test_user_secrets_not_exported(self, catalog, tmp_path):
+        export(tmp_path)
+        with open(tmp_path / 'users.csv', encoding='utf-8',
+                  newline='') as file:
+            header = next(csv.reader(file))
+        assert 'username' in header
+        assert not {'password', 'confirmation_code',
+                    'confirmation_code_expires'} & set(header)
+
+    def test_ndjson(self, catalog, tmp_path):
+        export(tmp_path, '--format', 'ndjson')
+        with open(tmp_path / 'comments.ndjson', encoding='utf-8') as file:
+            comments = read_ndjson(file)
+        assert len(comments) == ITEMS_COUNT
+        assert comments[0]['review_id'] == catalog['review'].pk
+        assert comments[0]['text'] == 'Комментарий'
+        with open(tmp_path / 'titles.ndjson', encoding='utf-8') as file:
+            assert read_ndjson(file)[0]['description'] is None
+
+    @pytest.mark.parametrize('file_format,reader', (
+        ('csv', read_csv), ('ndjson', read_ndjson)))
+    def test_gzip(self, catalog, tmp_path, file_format, reader):
+        export(tmp_path, '--format', file_format, '--gzip')
+        path = tmp_path / f'genre_title.{file_format}.gz'
+        with gzip.open(path, 'rt', encoding='utf-8', newline='') as file:
+            links = reader(file)
+        assert len(links) == 2 * ITEMS_COUNT
+
+    def test_since(self, catalog, tmp_path):
+        from reviews.models import Comment, Review
+        old = timezone.now() - timedelta(days=30)
+        old_reviews = list(Review.objects.order_by('pk').values_list(
+            'pk', flat=True)[:5])
+        Review.objects.filter(pk__in=old_reviews).update(pub_date=old)
+        Comment.objects.update(pub_date=old)
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+
+        export(tmp_path, '--since', since)
+
+        with open(tmp_path / 'review.csv', encoding='utf-8',
+                  newline='') as file:
+            reviews = {int(row['id']) for row in read_csv(file)}
+        assert len(reviews) == ITEMS_COUNT - 5
+        assert not reviews & set(old_reviews)
+        with open(tmp_path / 'comments.csv', encoding='utf-8',
+                  newline='') as file:
+            assert read_csv(file) == []
+        with open(tmp_path / 'titles.csv', encoding='utf-8',
+                  newline='') as file:
+            assert len(read_csv(file)) == ITEMS_COUNT, (
+                'Проверьте, что --since не фильтрует таблицы без pub_date'
+            )
+
+    def test_parse_since(self, settings):
+        from reviews.management.commands.sql_to_csv import parse_since
+        since = parse_since('2022-05-01')
+        assert timezone.is_aware(since)
+        assert since.date().isoformat() == '2022-05-01'
+        assert parse_since('2022-05-01T10:30:00+03:00').hour == 10
+        with pytest.raises(CommandError):
+            parse_since('вчера')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_round_trip(self, catalog, tmp_path):
+        from reviews.management.commands.csv_to_sql import TABLES_DICT
+        before = {model: table_rows(model) for model in TABLES_DICT}
+        export(tmp_path)
+        call_command('csv_to_sql', '--path', str(tmp_path), '--truncate',
+                     stdout=StringIO())
+        for model, rows in before.items():
+            assert table_rows(model) == rows, (
+                f'Проверьте, что {model.__name__} переживает выгрузку '
+                'и загрузку без изменений'
+            )
@@ -0,0 +1,70 @@
+import pytest
+from rest_framework.test import APIClient
+
+from .fixtures.fixture_data import ITEMS_COUNT
+
+
+def found(params):
+    response = APIClient().get(
+        '/api/v1/titles/', {'limit': ITEMS_COUNT, **params})
+    assert response.status_code == 200
+    return {title['id'] for title in response.json()['results']}
+
+
+@pytest.mark.django_db
+class TestTitleFilters:
+
+    @pytest.fixture
+    def titles(self, catalog):
+        """Произведения по номеру i: год 2000 + i, категория i % 3.
+
+        Жанр genre-2 получают только нечётные произведения.
+        """
+        from reviews.models import Genres, Title
+        titles = list(Title.objects.order_by('pk'))
+        genre = Genres.objects.get(slug='genre-2')
+        for title in titles[1::2]:
+            title.genre.add(genre)
+        return [title.pk for title in titles]
+
+    def test_single_filters(self, titles):
+        assert found({'year': 2004}) == {titles[4]}
+        assert found({'category': 'category-1'}) == set(titles[1::3])
+        assert found({'genre': 'genre-2'}) == set(titles[1::2])
+        assert found({'genre': 'genre-0'}) == set(titles)
+        # Регистр кириллицы SQLite не сравнивает, поэтому имя как есть
+        assert found({'name': 'Произведение 1'}) == {
+            titles[1], *titles[10:]}, (
+            'Проверьте, что фильтр name ищет подстроку названия'
+        )
+
+    def test_year_range(self, titles):
+        assert found({'year_min': 2012}) == set(titles[12:])
+        assert found({'year_max': 2002}) == set(titles[:3])
+        assert found({'year_min': 2005, 'year_max': 2007}) == set(
+            titles[5:8])
+        assert found({'year_min': 2008, 'year_max': 2007}) == set()
+
+    def test_combined_filters(self, titles):
+        assert found({'genre': 'genre-2', 'category': 'category-1'}) == {
+            titles[1], titles[7], titles[13]}, (
+            'Проверьте, что фильтры сужают друг друга'
+        )
+        assert found({'genre': 'genre-2', 'category': 'category-1',
+                      'year': 2007}) == {titles[7]}
+        assert found({'genre': 'genre-2', 'category': 'category-0',
+                      'year': 2007}) == set()
+        assert found({'category': 'category-0', 'year_min': 2004,
+                      'year_max': 2010}) == {titles[6], titles[9]}
+        assert found({'name': 'Произведение 1', 'genre': 'genre-2',
+                      'year_max': 2012}) == {titles[1], titles[11]}
+        assert found({'name': 'Произведение 1', 'category': 'category-2',
+                      'genre': 'genre-0', 'year_min': 2011}) == {
+            titles[11], titles[14]}
+
+    def test_genre_filter_no_duplicates(self, titles):
+        response = APIClient().get('/api/v1/titles/', {
+            'genre': 'genre-0', 'limit': ITEMS_COUNT})
+        ids = [title['id'] for title in response.json()['results']]
+        assert len(ids) == len(set(ids)) == ITEMS_COUNT
+        assert response.json()['count'] == ITEMS_COUNT
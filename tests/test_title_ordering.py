@@ -0,0 +1,53 @@
+import pytest
+from rest_framework.test import APIClient
+
+from .fixtures.fixture_data import ITEMS_COUNT
+
+
+def titles(params):
+    response = APIClient().get(
+        '/api/v1/titles/', {'limit': ITEMS_COUNT, **params})
+    assert response.status_code == 200
+    return response.json()['results']
+
+
+@pytest.mark.django_db
+class TestTitleOrdering:
+
+    @pytest.fixture
+    def rated(self, catalog, django_user_model):
+        from reviews.models import Review, Title
+        title = Title.objects.exclude(pk=catalog['title'].pk).first()
+        author = django_user_model.objects.create(
+            username='critic', email='critic@yamdb.fake')
+        Review.objects.create(title=title, author=author, text='Отзыв',
+                              score=10)
+        return catalog['title'], title
+
+    def test_order_by_rating(self, rated):
+        popular, best = rated
+        results = titles({'ordering': '-rating'})
+        assert [title['id'] for title in results[:2]] == [best.pk, popular.pk]
+        assert all(title['rating'] is None for title in results[2:]), (
+            'Проверьте, что произведения без оценок идут последними'
+        )
+        results = titles({'ordering': 'rating'})
+        assert [title['id'] for title in results[:2]] == [popular.pk, best.pk]
+        assert results[-1]['rating'] is None
+
+    def test_order_by_review_count_and_year(self, rated):
+        popular, best = rated
+        results = titles({'ordering': '-review_count,year'})
+        assert [title['id'] for title in results[:2]] == [popular.pk, best.pk]
+        years = [title['year'] for title in results[2:]]
+        assert years == sorted(years)
+
+    def test_order_by_name_descending(self, catalog):
+        results = titles({'ordering': '-name'})
+        names = [title['name'] for title in results]
+        assert names == sorted(names, reverse=True)
+
+    def test_unknown_field_ignored(self, catalog):
+        results = titles({'ordering': 'rating_sum'})
+        ids = [title['id'] for title in results]
+        assert ids == sorted(ids)
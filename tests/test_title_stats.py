@@ -0,0 +1,57 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from rest_framework.test import APIClient
+
+from .fixtures.fixture_data import ITEMS_COUNT
+
+
+@pytest.mark.django_db
+class TestTitleStats:
+
+    def test_stats_endpoint(self, catalog, django_assert_num_queries):
+        title = catalog['title']
+        with django_assert_num_queries(1):
+            response = APIClient().get(f'/api/v1/titles/{title.pk}/stats/')
+        assert response.status_code == 200
+        data = response.json()
+        assert data['count'] == ITEMS_COUNT
+        assert data['distribution'] == {
+            '1': 2, '2': 2, '3': 2, '4': 2, '5': 2,
+            '6': 1, '7': 1, '8': 1, '9': 1, '10': 1,
+        }, 'Проверьте, что гистограмма считается по оценкам отзывов'
+        assert data['median'] == 4
+        assert data['rating'] == 4
+
+    def test_histogram_follows_review_changes(self, catalog):
+        review = catalog['review']
+        path = f'/api/v1/titles/{catalog["title"].pk}/stats/'
+        review.score = 10
+        review.save()
+        assert APIClient().get(path).json()['distribution']['10'] == 2
+        review.delete()
+        data = APIClient().get(path).json()
+        assert data['distribution']['10'] == 1
+        assert data['count'] == ITEMS_COUNT - 1
+        assert sum(data['distribution'].values()) == data['count']
+
+    def test_optional_stats_field(self, catalog):
+        client = APIClient()
+        path = f'/api/v1/titles/{catalog["title"].pk}/'
+        assert 'stats' not in client.get(path).json()
+        stats = client.get(path, {'stats': 'true'}).json()['stats']
+        assert stats['count'] == ITEMS_COUNT
+        results = client.get('/api/v1/titles/', {'stats': '1'}).json()
+        assert all('stats' in title for title in results['results'])
+
+    def test_recalculate_rebuilds_histogram(self, catalog):
+        from reviews.models import Title
+        Title.objects.update(score_1=0, score_10=5)
+        with pytest.raises(CommandError):
+            call_command('recalculate_rating', '--check', stdout=StringIO())
+        call_command('recalculate_rating', stdout=StringIO())
+        call_command('recalculate_rating', '--check', stdout=StringIO())
+        title = Title.objects.get(pk=catalog['title'].pk)
+        assert title.score_1 == 2
+        assert title.score_10 == 1